@@ -6,6 +6,8 @@ from math import atan2, degrees, sqrt
 from typing import Dict, List, Tuple
 import traceback
 
+from instrumentation import NULL_RECORDER, finish_video, stage_recorder
+
 
 class AdvancedSwingAnalyzer:
     """
@@ -44,6 +46,11 @@ class AdvancedSwingAnalyzer:
             'follow_through': (85, 100)
         }
 
+    def warm_up(self, frames: List) -> None:
+        """Run RGB frames through the pose graph so real analyses start warm"""
+        for frame in frames:
+            self.pose.process(frame)
+
     def analyze_swing(self, input_path: str, output_path: str) -> Dict:
         """Enhanced analysis with multiple fault detection"""
         try:
@@ -83,10 +90,13 @@ class AdvancedSwingAnalyzer:
         processed_frames = 0
         swing_landmarks_history = []
 
+        timings = stage_recorder()
+
         print(f"Processing {total_frames} frames with advanced analysis...")
 
         while cap.isOpened():
-            ret, frame = cap.read()
+            with timings.time('decode'):
+                ret, frame = cap.read()
             if not ret:
                 break
 
@@ -94,8 +104,10 @@ class AdvancedSwingAnalyzer:
             swing_progress = (frame_number / total_frames) * 100
 
             # Convert and process with MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_frame)
+            with timings.time('color_convert'):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with timings.time('inference'):
+                results = self.pose.process(rgb_frame)
 
             frame_analysis = {
                 'frame_number': frame_number,
@@ -109,13 +121,15 @@ class AdvancedSwingAnalyzer:
                 swing_landmarks_history.append(landmarks)
 
                 # Draw enhanced skeleton
-                self._draw_advanced_skeleton(frame, results.pose_landmarks)
+                with timings.time('draw'):
+                    self._draw_advanced_skeleton(frame, results.pose_landmarks)
 
                 # Multi-fault analysis
                 faults = self._analyze_all_faults(
                     landmarks,
                     swing_landmarks_history,
-                    frame_analysis['swing_phase']
+                    frame_analysis['swing_phase'],
+                    timings
                 )
 
                 frame_analysis['faults_detected'] = faults
@@ -126,16 +140,19 @@ class AdvancedSwingAnalyzer:
                         fault_counters[fault_name] += 1
 
                 # Add comprehensive visual feedback
-                self._add_advanced_annotations(
-                    frame, faults, frame_analysis['swing_phase'])
+                with timings.time('draw'):
+                    self._add_advanced_annotations(
+                        frame, faults, frame_analysis['swing_phase'])
                 processed_frames += 1
 
             else:
-                cv2.putText(frame, "No golfer detected", (10, 30),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                with timings.time('draw'):
+                    cv2.putText(frame, "No golfer detected", (10, 30),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
 
             frame_data.append(frame_analysis)
-            out.write(frame)
+            with timings.time('encode'):
+                out.write(frame)
 
             # Progress indicator
             if frame_number % 30 == 0:
@@ -145,40 +162,50 @@ class AdvancedSwingAnalyzer:
         cap.release()
         out.release()
 
-        return self._calculate_advanced_metrics(
+        timings.count('frames', len(frame_data))
+        timings.count('pose_frames', processed_frames)
+        return finish_video('AdvancedSwingAnalyzer', timings, self._calculate_advanced_metrics(
             total_frames, fault_counters, processed_frames, frame_data
-        )
+        ))
 
-    def _analyze_all_faults(self, landmarks, history: List, swing_phase: str) -> Dict:
-        """Analyze all possible swing faults"""
+    def _analyze_all_faults(self, landmarks, history: List, swing_phase: str,
+                            timings=NULL_RECORDER) -> Dict:
+        """Analyze all possible swing faults, timing each detector"""
         faults = {}
 
         # 1. Trail arm collapse (enhanced)
-        faults['trail_arm_collapse'] = self._detect_trail_arm_collapse_advanced(
-            landmarks, swing_phase)
+        with timings.time('detect_trail_arm_collapse'):
+            faults['trail_arm_collapse'] = self._detect_trail_arm_collapse_advanced(
+                landmarks, swing_phase)
 
         # 2. Early extension (enhanced)
-        faults['early_extension'] = self._detect_early_extension_advanced(
-            landmarks, swing_phase)
+        with timings.time('detect_early_extension'):
+            faults['early_extension'] = self._detect_early_extension_advanced(
+                landmarks, swing_phase)
 
         # 3. Over-the-top swing plane
-        faults['over_the_top'] = self._detect_over_the_top(
-            landmarks, history, swing_phase)
+        with timings.time('detect_over_the_top'):
+            faults['over_the_top'] = self._detect_over_the_top(
+                landmarks, history, swing_phase)
 
         # 4. Lateral sway
-        faults['sway'] = self._detect_sway(landmarks, history, swing_phase)
+        with timings.time('detect_sway'):
+            faults['sway'] = self._detect_sway(landmarks, history, swing_phase)
 
         # 5. Reverse pivot
-        faults['reverse_pivot'] = self._detect_reverse_pivot(
-            landmarks, history, swing_phase)
+        with timings.time('detect_reverse_pivot'):
+            faults['reverse_pivot'] = self._detect_reverse_pivot(
+                landmarks, history, swing_phase)
 
         # 6. Head movement
-        faults['head_movement'] = self._detect_head_movement(
-            landmarks, history, swing_phase)
+        with timings.time('detect_head_movement'):
+            faults['head_movement'] = self._detect_head_movement(
+                landmarks, history, swing_phase)
 
         # 7. Weight shift issues
-        faults['weight_shift'] = self._detect_weight_shift_issues(
-            landmarks, history, swing_phase)
+        with timings.time('detect_weight_shift'):
+            faults['weight_shift'] = self._detect_weight_shift_issues(
+                landmarks, history, swing_phase)
 
         return faults
 
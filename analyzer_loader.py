@@ -0,0 +1,226 @@
+# analyzer_loader.py - Lazy, role-aware loading of the pose-analysis stack
+import importlib
+import importlib.util
+import os
+import threading
+import time
+import weakref
+from typing import Callable, Dict, List, Optional
+
+from instrumentation import REGISTRY
+
+# What this process is for (PROCESS_ROLE env var):
+#   all    - serve requests and analyze in-process, loading the analyzer on
+#            first analysis (default; local runs and single-container deploys)
+#   web    - serve requests only; cv2/mediapipe are never imported
+#   worker - analyze only; callers warm the analyzer at startup
+PROCESS_ROLES = ('all', 'web', 'worker')
+PROCESS_ROLE = os.environ.get('PROCESS_ROLE', 'all')
+
+if PROCESS_ROLE not in PROCESS_ROLES:
+    raise ValueError(f"PROCESS_ROLE must be one of {PROCESS_ROLES}, got {PROCESS_ROLE!r}")
+
+# The first pose.process on a fresh MediaPipe graph is several times slower
+# than steady state, so this many frames go through it before a process
+# reports ready: the start of the bundled clip, or blank frames without it
+WARMUP_FRAMES = 5
+WARMUP_CLIP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'test_swing.mp4')
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+
+# A failed warm-up is retried on the next readiness check after this long
+# (seconds); until one succeeds the process stays unready and refuses work
+WARMUP_RETRY_SECONDS = 30
+
+# Set by defer_warm_ups() in a gunicorn master that preloads the app: it
+# must not import cv2/mediapipe or run threads that fork would cut short
+_defer_warm_ups = False
+
+
+class AnalyzerUnavailable(RuntimeError):
+    """Raised when a web-only process is asked to analyze a video"""
+
+
+def module_available(name: str) -> bool:
+    """True if a module can be imported, without importing it"""
+    return importlib.util.find_spec(name) is not None
+
+
+def warm_up_frames(count: int = WARMUP_FRAMES, clip: str = WARMUP_CLIP) -> List:
+    """RGB frames to warm a pose graph with, read from clip where possible"""
+    import numpy as np
+
+    frames = []
+    try:
+        import cv2
+        capture = cv2.VideoCapture(clip)
+        while len(frames) < count:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+        capture.release()
+    except ImportError:
+        pass
+
+    while len(frames) < count:
+        frames.append(np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8))
+    return frames
+
+
+class LazyAnalyzer:
+    """
+    Stand-in for a swing analyzer that imports its module (and so cv2 and
+    mediapipe) and builds the instance on first use. The first caller pays
+    the load under a lock; concurrent callers wait for the same instance.
+
+    start_warm_up() does the load and a few warm-up frames in the background
+    instead; until it succeeds the analyzer is not ready and analyses are
+    refused with AnalyzerUnavailable, so the caller can be sent elsewhere.
+    In a deferring process it only marks the analyzer pending, and the
+    warm-up starts in the worker (start_pending_warm_ups or first check).
+    """
+
+    def __init__(self, module_name: str, class_name: str, role: Optional[str] = None,
+                 fallback: Optional[Callable[[], object]] = None):
+        self.module_name = module_name
+        self.class_name = class_name
+        self.role = role or PROCESS_ROLE
+        # Used instead when the module's dependencies are not installed
+        self.fallback = fallback
+        self._instance = None
+        self._lock = threading.Lock()
+        # cold | pending -> warming -> ready | failed (-> warming again)
+        self._warm_state = 'cold'
+        self._warm_error = None
+        self._warm_failed_at = None
+        self.warm_up_seconds = None
+        _analyzers.add(self)
+
+    @property
+    def loaded(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def ready(self) -> bool:
+        """True once warmed up; web-only processes never load an analyzer"""
+        return self.role == 'web' or self._warm_state == 'ready'
+
+    def _start_if_due(self):
+        # Pending warm-ups start on the first check in the process that
+        # serves requests; failed ones are retried after a pause
+        if self._warm_state == 'pending' or (
+                self._warm_state == 'failed'
+                and time.time() - self._warm_failed_at >= WARMUP_RETRY_SECONDS):
+            self.start_warm_up()
+
+    def status(self) -> Dict:
+        self._start_if_due()
+        return {
+            'ready': self.ready,
+            'role': self.role,
+            'analyzer': self.class_name,
+            'warm_up': self._warm_state,
+            'warm_up_seconds': self.warm_up_seconds,
+            'error': self._warm_error,
+        }
+
+    def check_available(self):
+        """Raise AnalyzerUnavailable if this process can't analyze right now"""
+        if self.role == 'web':
+            raise AnalyzerUnavailable("Video analysis is not enabled in web-only processes")
+        self._start_if_due()
+        if self._warm_state in ('pending', 'warming'):
+            raise AnalyzerUnavailable("Video analysis is warming up, please retry shortly")
+        if self._warm_state == 'failed':
+            raise AnalyzerUnavailable(f"Video analysis is unavailable: {self._warm_error}")
+
+    def get(self):
+        """The analyzer instance, importing and constructing it if needed"""
+        if self._instance is not None:
+            return self._instance
+        if self.role == 'web':
+            raise AnalyzerUnavailable("Video analysis is not enabled in web-only processes")
+
+        with self._lock:
+            if self._instance is None:
+                try:
+                    module = importlib.import_module(self.module_name)
+                    self._instance = getattr(module, self.class_name)()
+                except ImportError as e:
+                    if self.fallback is None:
+                        raise
+                    print(f"Warning: {self.module_name} unavailable, using fallback: {e}")
+                    self._instance = self.fallback()
+        return self._instance
+
+    def warm_up(self) -> bool:
+        """Load the analyzer and run warm-up frames through it (blocking)"""
+        self._warm_state = 'warming'
+        started = time.time()
+        try:
+            instance = self.get()
+            if hasattr(instance, 'warm_up'):
+                instance.warm_up(warm_up_frames())
+        except Exception as e:
+            print(f"Warning: {self.class_name} warm-up failed, retrying in {WARMUP_RETRY_SECONDS}s: {e}")
+            self._warm_failed_at = time.time()
+            self._warm_state, self._warm_error = 'failed', str(e)
+            return False
+
+        self.warm_up_seconds = round(time.time() - started, 3)
+        self._warm_state, self._warm_error = 'ready', None
+        return True
+
+    def start_warm_up(self) -> Optional[threading.Thread]:
+        """warm_up() in a background thread; a no-op in web-only processes"""
+        if self.role == 'web':
+            return None
+        if _defer_warm_ups:
+            self._warm_state = 'pending'
+            return None
+        self._warm_state = 'warming'
+        thread = threading.Thread(target=self.warm_up, daemon=True,
+                                  name=f"warm-up-{self.class_name}")
+        thread.start()
+        return thread
+
+    def analyze_swing(self, input_path: str, output_path: str):
+        self.check_available()
+        with REGISTRY.in_progress('analyses_in_progress', analyzer=self.class_name):
+            return self.get().analyze_swing(input_path, output_path)
+
+    def _after_fork(self):
+        # A MediaPipe graph built before fork is unusable in the child: start
+        # over there. Warm-ups the parent wanted stay pending until the
+        # worker's app is loaded, so nothing runs mid-import in the child.
+        self._lock = threading.Lock()
+        self._instance = None
+        if self._warm_state != 'cold':
+            self._warm_state = 'pending'
+
+
+_analyzers = weakref.WeakSet()
+
+
+def defer_warm_ups():
+    """Make start_warm_up() only mark analyzers pending in this process and its children"""
+    global _defer_warm_ups
+    _defer_warm_ups = True
+
+
+def start_pending_warm_ups():
+    """Start every pending warm-up; gunicorn's post_worker_init hook calls this"""
+    global _defer_warm_ups
+    _defer_warm_ups = False
+    for analyzer in list(_analyzers):
+        if analyzer._warm_state == 'pending':
+            analyzer.start_warm_up()
+
+
+def _reset_analyzers_after_fork():
+    for analyzer in list(_analyzers):
+        analyzer._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_analyzers_after_fork)
@@ -16,27 +16,32 @@ import uuid
 # Add the parent directory to the Python path
 sys.path.append(str(Path(__file__).parent.parent))
 
-# Import our modular components with graceful fallbacks
+# Import our modular components with graceful fallbacks. The analyzer (and
+# with it cv2/mediapipe) is only imported on first use, keeping cold starts fast.
+from analyzer_loader import LazyAnalyzer, module_available
+
+MEDIAPIPE_AVAILABLE = module_available('mediapipe') and module_available('cv2')
+
+
+class ServerlessSwingAnalyzer:
+    """Stand-in used when MediaPipe is not installed in the serverless bundle"""
+
+    def analyze_swing(self, input_path, output_path):
+        return {
+            'total_frames': 0,
+            'collapse_frames': 0,
+            'collapse_percentage': 0.0,
+            'posture_loss_frames': 0,
+            'posture_loss_percentage': 0.0,
+            'error': 'MediaPipe not available in serverless environment'
+        }
+
+
 try:
-    from video_processor import SwingAnalyzer
     from coaching_engine import CoachingEngine
     from utils import cleanup_old_files, allowed_file, handle_video_orientation
-    MEDIAPIPE_AVAILABLE = True
 except ImportError as e:
     print(f"Warning: Some dependencies not available: {e}")
-    MEDIAPIPE_AVAILABLE = False
-    # Create dummy classes for serverless environment
-
-    class SwingAnalyzer:
-        def analyze_swing(self, input_path, output_path):
-            return {
-                'total_frames': 0,
-                'collapse_frames': 0,
-                'collapse_percentage': 0.0,
-                'posture_loss_frames': 0,
-                'posture_loss_percentage': 0.0,
-                'error': 'MediaPipe not available in serverless environment'
-            }
 
     class CoachingEngine:
         def generate_feedback(self, analysis_result, golfer_type="weekend_player", experience="intermediate"):
@@ -62,7 +67,8 @@ except Exception as e:
 
 # Initialize components
 try:
-    swing_analyzer = SwingAnalyzer()
+    swing_analyzer = LazyAnalyzer('video_processor', 'SwingAnalyzer',
+                                  fallback=ServerlessSwingAnalyzer)
     coaching_engine = CoachingEngine()
 except Exception as e:
     print(f"Warning: Could not initialize components: {e}")
@@ -9,11 +9,13 @@ import time
 from pathlib import Path
 
 # Import our modular components (create these next)
-from video_processor import SwingAnalyzer
+from analyzer_loader import AnalyzerUnavailable, LazyAnalyzer
 from coaching_engine import CoachingEngine
+from cache import create_cache
+from instrumentation import PROMETHEUS_CONTENT_TYPE, REGISTRY, UPLOAD_BUCKETS, install_request_metrics
 from utils import cleanup_old_files, allowed_file, handle_video_orientation
 
-app = Flask(__name__)
+app = install_request_metrics(Flask(__name__))
 app.secret_key = 'swing-sage-secret-change-in-production'
 app.config['UPLOAD_FOLDER'] = 'user_videos'
 app.config['PROCESSED_FOLDER'] = 'processed_videos'
@@ -24,8 +26,13 @@ Path(app.config['UPLOAD_FOLDER']).mkdir(exist_ok=True)
 Path(app.config['PROCESSED_FOLDER']).mkdir(exist_ok=True)
 
 # Initialize components
-swing_analyzer = SwingAnalyzer()
-coaching_engine = CoachingEngine()
+# cv2/mediapipe load on the first analysis, never in web-only processes
+swing_analyzer = LazyAnalyzer('video_processor', 'SwingAnalyzer')
+# Warmed in the background at startup (per worker under gunicorn, see
+# gunicorn.conf.py); /ready and /analyze answer 503 until then
+swing_analyzer.start_warm_up()
+# Seeded per analysis, so a given swing always gets the same tip
+coaching_engine = CoachingEngine(deterministic=True, cache=create_cache())
 
 # Background cleanup task
 
@@ -78,6 +85,9 @@ def analyze():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Upload MP4, MOV, or AVI only.'}), 400
 
+        # Refuse before saving anything if this process can't analyze yet
+        swing_analyzer.check_available()
+
         # Generate unique filenames
         session_id = session['session_id']
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -87,6 +97,7 @@ def analyze():
         # Save uploaded file
         upload_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_name)
         file.save(upload_path)
+        REGISTRY.observe('upload_bytes', os.path.getsize(upload_path), UPLOAD_BUCKETS)
 
         # Handle video orientation
         corrected_path = handle_video_orientation(upload_path)
@@ -96,6 +107,8 @@ def analyze():
             app.config['PROCESSED_FOLDER'], f"analyzed_{unique_name}")
         analysis_result = swing_analyzer.analyze_swing(
             corrected_path, output_path)
+        # Stage timings are already in /metrics; keep them out of the session cookie
+        analysis_result.pop('instrumentation', None)
 
         # Get user context
         golfer_type = request.form.get('golfer_type', 'weekend_player')
@@ -105,7 +118,8 @@ def analyze():
         coaching_tip = coaching_engine.generate_feedback(
             analysis_result,
             golfer_type=golfer_type,
-            experience=experience
+            experience=experience,
+            user_id=session_id
         )
 
         # Store results in session
@@ -121,6 +135,9 @@ def analyze():
             'redirect_url': '/results'
         })
 
+    except AnalyzerUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
     except Exception as e:
         print(f"Analysis error: {e}")
         return jsonify({'error': 'Analysis failed. Please try again.'}), 500
@@ -143,5 +160,18 @@ def health():
     return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
 
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint: analysis, request, database and cache metrics"""
+    return REGISTRY.render_prometheus(), 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 503 until the analyzer has been warmed up"""
+    status = swing_analyzer.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -4,17 +4,28 @@ import uuid
 from flask import Flask, request, jsonify, render_template, redirect, url_for, session, send_from_directory
 from werkzeug.utils import secure_filename
 from datetime import datetime
+import tempfile
 import threading
 import time
 from pathlib import Path
 
 # Import our advanced components
-from advanced_swing_analyzer import AdvancedSwingAnalyzer
+from analyzer_loader import AnalyzerUnavailable, LazyAnalyzer
 from advanced_coaching_ai import AdvancedCoachingAI
 from progress_tracker import ProgressTracker
+from social_platform import SocialPlatform
+from cache import create_cache
+from instrumentation import PROMETHEUS_CONTENT_TYPE, REGISTRY, UPLOAD_BUCKETS, install_request_metrics
 from utils import cleanup_old_files, allowed_file, handle_video_orientation
 
-app = Flask(__name__)
+# Lets only one worker per host run retention; without fcntl (Windows)
+# every process that starts it runs it
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+app = install_request_metrics(Flask(__name__))
 app.secret_key = 'swing-sage-advanced-secret-change-in-production'
 app.config['UPLOAD_FOLDER'] = 'user_videos'
 app.config['PROCESSED_FOLDER'] = 'processed_videos'
@@ -25,9 +36,58 @@ Path(app.config['UPLOAD_FOLDER']).mkdir(exist_ok=True)
 Path(app.config['PROCESSED_FOLDER']).mkdir(exist_ok=True)
 
 # Initialize advanced components
-swing_analyzer = AdvancedSwingAnalyzer()
-coaching_ai = AdvancedCoachingAI()
-progress_tracker = ProgressTracker()
+# cv2/mediapipe load on the first analysis, never in web-only processes
+swing_analyzer = LazyAnalyzer('advanced_swing_analyzer', 'AdvancedSwingAnalyzer')
+# Warmed in the background at startup (per worker under gunicorn, see
+# gunicorn.conf.py); /ready and /analyze answer 503 until then
+swing_analyzer.start_warm_up()
+# Sessions are seeded per (analysis, user) and memoized in the shared cache
+coaching_ai = AdvancedCoachingAI(deterministic=True, cache=create_cache())
+# Created on first use, so each gunicorn worker opens its own connection
+# pool instead of sharing sockets/file handles forked from the --preload
+# master. Its cache is shared across replicas through Redis when REDIS_URL is set.
+_progress_tracker = None
+_progress_tracker_lock = threading.Lock()
+
+
+def get_progress_tracker() -> ProgressTracker:
+    global _progress_tracker
+    with _progress_tracker_lock:
+        if _progress_tracker is None:
+            _progress_tracker = ProgressTracker(os.environ.get('DATABASE_URL', 'swing_progress.db'),
+                                                cache=create_cache())
+        return _progress_tracker
+
+
+# Created on first use, so its counter flusher and challenge sweeper threads
+# start in the worker that serves requests rather than the --preload master
+_social_platform = None
+_social_platform_lock = threading.Lock()
+
+
+def get_social_platform() -> SocialPlatform:
+    global _social_platform
+    with _social_platform_lock:
+        if _social_platform is None:
+            _social_platform = SocialPlatform(
+                os.environ.get('SOCIAL_DATABASE_URL') or os.environ.get('DATABASE_URL', 'social_platform.db'),
+                cache=create_cache())
+        return _social_platform
+
+
+def update_social_stats(user_id, user_stats, analysis_result=None):
+    """
+    Keep the player's profile and activity/improvement leaderboards current,
+    and score the analysis in the open challenges they have joined
+    """
+    try:
+        platform = get_social_platform()
+        platform.sync_swing_stats(user_id, user_stats)
+        if analysis_result is not None:
+            platform.submit_challenge_analyses([(user_id, analysis_result, None)])
+    except Exception as e:
+        # Social features are secondary; never fail an analysis over them
+        print(f"Social platform sync error: {e}")
 
 # Background cleanup task
 
@@ -45,6 +105,50 @@ def background_cleanup():
 cleanup_thread = threading.Thread(target=background_cleanup, daemon=True)
 cleanup_thread.start()
 
+# Background retention task - archives old analyses in small batches.
+# Started by start_retention() from gunicorn's post_worker_init (or __main__),
+# never in the --preload master. Every worker starts it, but only the one
+# holding RETENTION_LOCK archives; the others retry in case it exits.
+RETENTION_INTERVAL = 6 * 3600
+RETENTION_RETRY = 600
+RETENTION_LOCK = os.path.join(tempfile.gettempdir(), 'swing_sage_retention.lock')
+
+_retention_thread = None
+
+
+def _claim_retention(lock_file) -> bool:
+    if not fcntl:
+        return True
+    try:
+        # Held until this process exits
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def background_retention():
+    retain_days = int(os.environ.get('ANALYSIS_RETENTION_DAYS', '365'))
+    lock_file = open(RETENTION_LOCK, 'a')
+    while True:
+        if not _claim_retention(lock_file):
+            time.sleep(RETENTION_RETRY)
+            continue
+        try:
+            get_progress_tracker().archive_old_analyses(retain_days=retain_days)
+        except Exception as e:
+            print(f"Retention error: {e}")
+        time.sleep(RETENTION_INTERVAL)
+
+
+def start_retention():
+    """Start this process's retention thread (once)"""
+    global _retention_thread
+    if _retention_thread is None:
+        _retention_thread = threading.Thread(target=background_retention, daemon=True,
+                                             name='analysis-retention')
+        _retention_thread.start()
+
 
 @app.route('/')
 def index():
@@ -80,6 +184,9 @@ def analyze():
         if not allowed_file(file.filename):
             return jsonify({'error': 'Invalid file type. Upload MP4, MOV, or AVI only.'}), 400
 
+        # Refuse before saving anything if this process can't analyze yet
+        swing_analyzer.check_available()
+
         # Generate unique filenames
         session_id = session['session_id']
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -89,6 +196,7 @@ def analyze():
         # Save uploaded file
         upload_path = os.path.join(app.config['UPLOAD_FOLDER'], unique_name)
         file.save(upload_path)
+        REGISTRY.observe('upload_bytes', os.path.getsize(upload_path), UPLOAD_BUCKETS)
 
         # Handle video orientation
         corrected_path = handle_video_orientation(upload_path)
@@ -98,12 +206,15 @@ def analyze():
             app.config['PROCESSED_FOLDER'], f"analyzed_{unique_name}")
         analysis_result = swing_analyzer.analyze_swing(
             corrected_path, output_path)
+        # Stage timings are already in /metrics; keep them out of the session cookie
+        analysis_result.pop('instrumentation', None)
 
         # Get user context
         golfer_type = request.form.get('golfer_type', 'weekend_player')
         experience = request.form.get('experience', 'intermediate')
 
         # Create/get user for progress tracking
+        progress_tracker = get_progress_tracker()
         user_id = progress_tracker.create_or_get_user(
             session_id, golfer_type, experience)
 
@@ -117,19 +228,25 @@ def analyze():
             'user_id': user_id
         }
 
+        # Coaching is seeded by the analysis id, as batch_coaching backfills do,
+        # so the id is chosen before the analysis is saved
+        analysis_id = str(uuid.uuid4())
+
         # Generate ADVANCED coaching session
         coaching_session = coaching_ai.generate_coaching_session(
             analysis_result,
             user_progress,
-            user_profile
+            user_profile,
+            analysis_id=analysis_id
         )
 
         # Save analysis to progress tracker
-        analysis_id = progress_tracker.save_swing_analysis(
+        progress_tracker.save_swing_analysis(
             user_id,
             analysis_result,
             coaching_session['coaching_session']['primary_coaching'],
-            output_path
+            output_path,
+            analysis_id=analysis_id
         )
 
         # Get swing comparison data
@@ -137,6 +254,7 @@ def analyze():
 
         # Get user stats
         user_stats = progress_tracker.get_user_stats(user_id)
+        update_social_stats(user_id, user_stats, analysis_result)
 
         # Store comprehensive results in session
         session['last_analysis'] = {
@@ -155,6 +273,9 @@ def analyze():
             'redirect_url': '/results'
         })
 
+    except AnalyzerUnavailable as e:
+        return jsonify({'error': str(e)}), 503, {'Retry-After': '5'}
+
     except Exception as e:
         print(f"Analysis error: {e}")
         import traceback
@@ -176,6 +297,7 @@ def progress():
         return redirect(url_for('index'))
 
     user_id = session['session_id']
+    progress_tracker = get_progress_tracker()
     user_progress = progress_tracker.get_user_progress(
         user_id, days=90)  # Last 3 months
     practice_recommendations = progress_tracker.get_practice_recommendations(
@@ -197,7 +319,7 @@ def serve_video(filename):
 def api_get_progress(user_id):
     """API endpoint for progress data"""
     try:
-        progress = progress_tracker.get_user_progress(user_id)
+        progress = get_progress_tracker().get_user_progress(user_id)
         return jsonify(progress)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -207,7 +329,7 @@ def api_get_progress(user_id):
 def api_get_recommendations(user_id):
     """API endpoint for practice recommendations"""
     try:
-        recommendations = progress_tracker.get_practice_recommendations(
+        recommendations = get_progress_tracker().get_practice_recommendations(
             user_id)
         return jsonify(recommendations)
     except Exception as e:
@@ -218,8 +340,8 @@ def api_get_recommendations(user_id):
 def health():
     """Health check endpoint for production monitoring"""
     try:
-        # Check database connection
-        progress_tracker.get_user_stats("test")
+        # Check database connection (uncached, unlike the tracker's reads)
+        get_progress_tracker().backend.ping()
         return jsonify({
             'status': 'healthy',
             'timestamp': datetime.now().isoformat(),
@@ -233,5 +355,19 @@ def health():
         }), 500
 
 
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint: analysis, request, database and cache metrics"""
+    return REGISTRY.render_prometheus(), 200, {'Content-Type': PROMETHEUS_CONTENT_TYPE}
+
+
+@app.route('/ready')
+def ready():
+    """Readiness probe for load balancers: 503 until the analyzer is warm"""
+    status = swing_analyzer.status()
+    return jsonify(status), 200 if status['ready'] else 503
+
+
 if __name__ == '__main__':
+    start_retention()
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,140 @@
+# batch_coaching.py - Regenerate coaching sessions for stored analyses in bulk
+import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from advanced_coaching_ai import AdvancedCoachingAI
+from coaching_engine import coaching_rng
+
+# Progress shown to the coach covers this many days before each analysis,
+# matching ProgressTracker.get_user_progress's default window
+PROGRESS_WINDOW_DAYS = 30
+
+# Users handed to a worker per task, and tasks in flight per worker
+USERS_PER_TASK = 50
+TASKS_IN_FLIGHT_PER_WORKER = 4
+
+# Rewritten tips are committed this many at a time
+WRITE_BATCH_SIZE = 5000
+
+# (user_id, profile, [(analysis_id, analysis_date, overall_score,
+#   fault_percentages_json, primary_issues_json), ...]) as yielded by
+# ProgressTracker.iter_user_histories
+UserHistory = Tuple[str, Dict, List[Tuple]]
+
+_worker_coach = None
+
+
+def coach_user_history(coach: AdvancedCoachingAI, history: UserHistory,
+                       window_days: int = PROGRESS_WINDOW_DAYS) -> List[Tuple[str, str, Dict]]:
+    """
+    (user_id, analysis_id, session) for each of a user's analyses, oldest
+    first. Each session sees the progress the user had when it was analyzed:
+    the analyses inside the window before it, newest first.
+    """
+    user_id, profile, analyses = history
+    window = timedelta(days=window_days)
+    previous = deque()  # (date, metric) oldest first
+    sessions = []
+
+    for analysis_id, analysis_date, score, fault_json, issues_json in analyses:
+        cutoff = (datetime.fromisoformat(analysis_date) - window).isoformat()
+        while previous and previous[0][0] <= cutoff:
+            previous.popleft()
+
+        faults = json.loads(fault_json or '{}')
+        issues = json.loads(issues_json or '[]')
+        metrics = [metric for _, metric in reversed(previous)]
+        progress = {'user_id': user_id, 'total_swings': len(metrics),
+                    'progress_metrics': metrics}
+        analysis_result = {'overall_score': score or 0, 'fault_percentages': faults,
+                           'primary_issues': issues}
+
+        session = coach.generate_coaching_session(analysis_result, progress, profile,
+                                                  rng=coaching_rng(analysis_result, user_id,
+                                                                   analysis_id))
+        sessions.append((user_id, analysis_id, session))
+
+        previous.append((analysis_date, {'date': analysis_date, 'overall_score': score,
+                                         'faults': faults, 'primary_issues': issues}))
+    return sessions
+
+
+def _init_worker():
+    global _worker_coach
+    _worker_coach = AdvancedCoachingAI()
+
+
+def _coach_task(histories: List[UserHistory]) -> List[Tuple[str, str, Dict]]:
+    sessions = []
+    for history in histories:
+        sessions.extend(coach_user_history(_worker_coach, history))
+    return sessions
+
+
+def generate_sessions(histories: Iterable[UserHistory], workers: int = 0,
+                      users_per_task: int = USERS_PER_TASK) -> Iterator[Tuple[str, str, Dict]]:
+    """
+    Stream (user_id, analysis_id, session) for every analysis in histories.
+    workers > 1 spreads users over a process pool; input is consumed lazily
+    and only a few tasks per worker are in flight, so memory stays flat.
+    Output order follows input order either way.
+    """
+    histories = iter(histories)
+    if workers <= 1:
+        coach = AdvancedCoachingAI()
+        for history in histories:
+            yield from coach_user_history(coach, history)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        pending = deque()
+        while True:
+            while len(pending) < workers * TASKS_IN_FLIGHT_PER_WORKER:
+                task = list(islice(histories, users_per_task))
+                if not task:
+                    break
+                pending.append(executor.submit(_coach_task, task))
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def backfill_coaching_tips(tracker, user_ids: Optional[Iterable[str]] = None,
+                           workers: int = 0,
+                           write_batch_size: int = WRITE_BATCH_SIZE) -> Dict:
+    """
+    Regenerate the coaching session for every stored analysis (or those of
+    user_ids) and store its primary coaching as the analysis' coaching tip
+    """
+    started = datetime.now()
+    written = 0
+    batch = []
+
+    for user_id, analysis_id, session in generate_sessions(
+            tracker.iter_user_histories(user_ids), workers=workers):
+        batch.append((user_id, analysis_id, session['coaching_session']['primary_coaching']))
+        if len(batch) >= write_batch_size:
+            written += tracker.update_coaching_tips(batch)
+            batch = []
+    written += tracker.update_coaching_tips(batch)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    return {'analyses_recoached': written, 'elapsed_seconds': round(elapsed, 2),
+            'per_second': round(written / elapsed, 1) if elapsed else None}
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    from progress_tracker import ProgressTracker
+
+    parser = argparse.ArgumentParser(description="Regenerate coaching tips for stored analyses")
+    parser.add_argument('--database', default=os.environ.get('DATABASE_URL', 'swing_progress.db'))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(backfill_coaching_tips(ProgressTracker(args.database), workers=args.workers))
@@ -0,0 +1,394 @@
+# bench_database.py - Latency and throughput benchmarks for the progress and social databases
+#
+#   python bench_database.py --scale 10k --output results.json
+#   python bench_database.py --scale 100k --writers 8 --ops 500
+#   python bench_database.py --compare baseline.json results.json
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from bench_pipeline import REGRESSION_THRESHOLD, environment_info
+from cache import Cache, LocalStore
+from datagen import DEFAULT_SEED, SyntheticDataset, generate
+from progress_tracker import ProgressTracker
+from social_platform import SocialPlatform
+
+# Population sizes; each is generated once per seed under --data-dir and reused
+SCALES = {'10k': 10000, '100k': 100000, '1m': 1000000}
+DEFAULT_SCALE = '10k'
+DEFAULT_DATA_DIR = 'bench_data'
+
+# Calls measured per method in each phase
+DEFAULT_OPS = 200
+# Background writer threads during the concurrent phase
+DEFAULT_WRITERS = 4
+# Users, shares and analyses the operations pick their arguments from
+SAMPLE_SIZE = 1000
+# Open challenges created for the run, and how many sampled users join each
+BENCH_CHALLENGES = 5
+CHALLENGE_PARTICIPANTS = 100
+SEARCH_QUERIES = ('swing', 'swing scoring', 'golfer')
+AUTOCOMPLETE_PREFIXES = ('sw', 'golf', 'golfer1')
+
+# Public methods left out, with why; batch jobs run off the request path and
+# are timed by their own jobs. test_bench_database checks that every other
+# public method of ProgressTracker and SocialPlatform has an operation below.
+NOT_BENCHMARKED = {
+    'progress.export_history': 'batch export job',
+    'progress.import_history': 'batch import job',
+    'progress.iter_user_histories': 'batch coaching backfill',
+    'progress.update_coaching_tips': 'batch coaching backfill',
+    'progress.archive_old_analyses': 'nightly archive job',
+    'social.finalize_due_challenges': 'challenge sweeper',
+}
+
+# --compare ignores methods faster than this at p95; their noise dominates
+MIN_LATENCY_MS = 0.05
+
+
+def _no_cache() -> Cache:
+    # Every entry is evicted as it is stored, so each call reaches the database
+    return Cache(LocalStore(max_entries=0))
+
+
+def dataset_dir(users: int, seed: int, data_dir: str = DEFAULT_DATA_DIR) -> str:
+    """The generated population for (users, seed), creating it the first time"""
+    path = os.path.join(data_dir, f"{users}-seed{seed}")
+    manifest_path = os.path.join(path, 'manifest.json')
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if manifest.get('users') == users and manifest.get('seed') == seed:
+            return path
+
+    print(f"Generating {users} users into {path} (once per scale and seed)...")
+    generate(users, path, seed)
+    return path
+
+
+def working_copy(source_dir: str, target_dir: str) -> str:
+    """Copy the generated databases so a run's writes never leak into the next run"""
+    for name in ('swing_progress.db', 'social_platform.db'):
+        # Checkpoint first so the copy is complete without the -wal file
+        conn = sqlite3.connect(os.path.join(source_dir, name))
+        conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+        conn.close()
+        shutil.copyfile(os.path.join(source_dir, name), os.path.join(target_dir, name))
+    return target_dir
+
+
+def _sample(db_path: str, query: str, size: int, rng: random.Random) -> List:
+    conn = sqlite3.connect(db_path)
+    try:
+        values = [row[0] for row in conn.execute(query)]
+    finally:
+        conn.close()
+    return rng.sample(values, min(size, len(values)))
+
+
+class BenchTargets:
+    """A ProgressTracker and SocialPlatform over one working copy, with argument samples"""
+
+    def __init__(self, data_dir: str, users: int, seed: int, cached: bool = False):
+        progress_db = os.path.join(data_dir, 'swing_progress.db')
+        social_db = os.path.join(data_dir, 'social_platform.db')
+        self.tracker = ProgressTracker(progress_db, cache=Cache() if cached else _no_cache())
+        self.platform = SocialPlatform(social_db, challenge_sweep_interval=0,
+                                       counter_log_dir=os.path.join(data_dir, 'counter_logs'),
+                                       cache=Cache() if cached else _no_cache())
+
+        rng = random.Random(seed)
+        self.user_ids = rng.sample(SyntheticDataset(users, seed).user_ids, min(SAMPLE_SIZE, users))
+        self.share_ids = _sample(social_db, 'SELECT share_id FROM shared_swings', SAMPLE_SIZE, rng)
+        self.analysis_ids = _sample(progress_db, 'SELECT analysis_id FROM swing_analyses LIMIT 100000',
+                                    SAMPLE_SIZE, rng)
+
+        self.challenge_ids = []
+        for index in range(BENCH_CHALLENGES):
+            challenge_id = self.platform.create_challenge(
+                self.user_ids[0], f"Bench challenge {index}", '', 'improvement', 'early_extension', 20,
+                duration_days=30)['challenge_id']
+            for user_id in rng.sample(self.user_ids, min(CHALLENGE_PARTICIPANTS, len(self.user_ids))):
+                self.platform.join_challenge(user_id, challenge_id)
+            self.challenge_ids.append(challenge_id)
+
+    def close(self):
+        self.platform.challenges.stop_sweeper()
+        self.platform.counters.close()
+        self.platform.backend.close()
+        self.tracker.backend.close()
+
+    def read_operations(self) -> Dict[str, Callable[[random.Random], object]]:
+        tracker, platform = self.tracker, self.platform
+        user = lambda rng: rng.choice(self.user_ids)
+        share = lambda rng: rng.choice(self.share_ids)
+        challenge = lambda rng: rng.choice(self.challenge_ids)
+        return {
+            'progress.get_user_progress': lambda rng: tracker.get_user_progress(user(rng)),
+            'progress.get_user_stats': lambda rng: tracker.get_user_stats(user(rng)),
+            'progress.compare_swings': lambda rng: tracker.compare_swings(user(rng)),
+            'progress.get_practice_recommendations': lambda rng: tracker.get_practice_recommendations(user(rng)),
+            'social.get_user_feed': lambda rng: platform.get_user_feed(user(rng)),
+            'social.get_user_feed_page': lambda rng: platform.get_user_feed_page(user(rng)),
+            'social.get_trending_swings': lambda rng: platform.get_trending_swings(time_period='7d'),
+            'social.get_shared_swings_page': lambda rng: platform.get_shared_swings_page(viewer_id=user(rng)),
+            'social.get_leaderboard.overall': lambda rng: platform.get_leaderboard('overall'),
+            'social.get_leaderboard.improvement': lambda rng: platform.get_leaderboard('improvement'),
+            'social.get_leaderboard.activity': lambda rng: platform.get_leaderboard('activity'),
+            'social.get_leaderboard_page': lambda rng: platform.get_leaderboard_page('overall'),
+            'social.get_leaderboard_neighbors': lambda rng: platform.get_leaderboard_neighbors(user(rng)),
+            'social.get_user_rank': lambda rng: platform.get_user_rank(user(rng)),
+            'social.get_user_profile': lambda rng: platform.get_user_profile(user(rng), viewer_id=user(rng)),
+            'social.get_user_profiles': lambda rng: platform.get_user_profiles(
+                rng.sample(self.user_ids, min(20, len(self.user_ids))), viewer_id=user(rng)),
+            'social.get_comments_page': lambda rng: platform.get_comments_page('shared_swing', share(rng)),
+            'social.get_friends_who_liked': lambda rng: platform.get_friends_who_liked(user(rng), share(rng)),
+            'social.search': lambda rng: platform.search(rng.choice(SEARCH_QUERIES), viewer_id=user(rng)),
+            'social.autocomplete': lambda rng: platform.autocomplete(rng.choice(AUTOCOMPLETE_PREFIXES)),
+            'social.get_challenge_rankings': lambda rng: platform.get_challenge_rankings(challenge(rng)),
+            'social.get_challenge_rank': lambda rng: platform.get_challenge_rank(challenge(rng), user(rng)),
+            'social.get_challenge_participants_page':
+                lambda rng: platform.get_challenge_participants_page(challenge(rng)),
+        }
+
+    def write_operations(self) -> Dict[str, Callable[[random.Random], object]]:
+        tracker, platform = self.tracker, self.platform
+        user = lambda rng: rng.choice(self.user_ids)
+        share = lambda rng: rng.choice(self.share_ids)
+        challenge = lambda rng: rng.choice(self.challenge_ids)
+
+        def analysis_result(rng):
+            faults = {'early_extension': rng.uniform(0, 60), 'over_the_top': rng.uniform(0, 60)}
+            return {'overall_score': 100 - sum(faults.values()) / len(faults),
+                    'fault_percentages': faults, 'primary_issues': []}
+
+        def create_social_profile(rng):
+            user_id = f"bench_{rng.getrandbits(48):012x}"
+            return platform.create_social_profile(user_id, user_id, 'Bench Golfer', f"{user_id}@example.com")
+
+        def sync_swing_stats(rng):
+            return platform.sync_swing_stats(user(rng), {'total_swings': rng.randint(1, 200),
+                                                         'best_score': rng.uniform(40, 100),
+                                                         'improvement': rng.uniform(-10, 20)})
+
+        return {
+            'progress.create_or_get_user': lambda rng: tracker.create_or_get_user(user(rng)),
+            'progress.save_swing_analysis': lambda rng: tracker.save_swing_analysis(
+                user(rng), analysis_result(rng), 'Bench tip', 'bench.mp4'),
+            'social.create_social_profile': create_social_profile,
+            'social.follow_user': lambda rng: platform.follow_user(user(rng), user(rng)),
+            'social.unfollow_user': lambda rng: platform.unfollow_user(user(rng), user(rng)),
+            'social.add_reaction': lambda rng: platform.add_reaction(user(rng), 'shared_swing', share(rng)),
+            'social.add_comment': lambda rng: platform.add_comment(user(rng), 'shared_swing', share(rng),
+                                                                   'Bench comment'),
+            'social.share_swing': lambda rng: platform.share_swing(user(rng), rng.choice(self.analysis_ids),
+                                                                   'Bench swing', '', '/videos/bench.mp4'),
+            'social.record_view': lambda rng: platform.record_view(share(rng)),
+            'social.flush_counters': lambda rng: platform.flush_counters(),
+            'social.sync_swing_stats': sync_swing_stats,
+            'social.create_challenge': lambda rng: platform.create_challenge(
+                user(rng), 'Bench challenge', '', 'improvement', 'over_the_top', 20),
+            'social.join_challenge': lambda rng: platform.join_challenge(user(rng), challenge(rng)),
+            'social.submit_challenge_analyses': lambda rng: platform.submit_challenge_analyses(
+                [(user(rng), analysis_result(rng), None) for _ in range(10)]),
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(q * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict:
+    ordered = sorted(latencies)
+    return {
+        'calls': len(ordered),
+        'errors': errors,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'ops_per_second': round(len(ordered) / elapsed, 1) if elapsed else None,
+    }
+
+
+def measure(operation: Callable[[random.Random], object], ops: int, rng: random.Random) -> Dict:
+    """Call operation ops times back to back and summarize its latency"""
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for _ in range(ops):
+        call_started = time.perf_counter()
+        try:
+            operation(rng)
+        except Exception:
+            # 'database is locked' after the busy timeout, or any other failure,
+            # is counted against the method rather than ending the run
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - call_started)
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+class _WriterPool:
+    """Threads issuing a random mix of writes until stopped"""
+
+    def __init__(self, operations: Dict[str, Callable], writers: int, seed: int):
+        self.operations = list(operations.values())
+        self.stop_event = threading.Event()
+        self.completed = [0] * writers
+        self.errors = [0] * writers
+        self.threads = [threading.Thread(target=self._run, args=(index, random.Random(seed + index)),
+                                         daemon=True, name=f"bench-writer-{index}")
+                        for index in range(writers)]
+
+    def _run(self, index: int, rng: random.Random):
+        while not self.stop_event.is_set():
+            try:
+                rng.choice(self.operations)(rng)
+                self.completed[index] += 1
+            except Exception:
+                self.errors[index] += 1
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        for thread in self.threads:
+            thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop_event.set()
+        for thread in self.threads:
+            thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return False
+
+    def summary(self) -> Dict:
+        return {'writers': len(self.threads), 'completed': sum(self.completed), 'errors': sum(self.errors),
+                'ops_per_second': round(sum(self.completed) / self.elapsed, 1) if self.elapsed else None}
+
+
+def run_benchmark(scale: str = DEFAULT_SCALE, seed: int = DEFAULT_SEED, ops: int = DEFAULT_OPS,
+                  writers: int = DEFAULT_WRITERS, data_dir: str = DEFAULT_DATA_DIR,
+                  users: Optional[int] = None, cached: bool = False) -> Dict:
+    """
+    Every public read and write outside NOT_BENCHMARKED, first alone and then
+    while `writers` threads write concurrently. Runs against a fresh copy of the generated
+    population, so results are comparable between runs of the same scale.
+    """
+    users = users or SCALES[scale]
+    source_dir = dataset_dir(users, seed, data_dir)
+    results = []
+
+    with tempfile.TemporaryDirectory(prefix='bench_database_') as scratch_dir:
+        targets = BenchTargets(working_copy(source_dir, scratch_dir), users, seed, cached)
+        try:
+            operations = {**targets.read_operations(), **targets.write_operations()}
+            rng = random.Random(seed)
+
+            for name, operation in operations.items():
+                result = {'case': f"single/{name}", 'method': name, 'phase': 'single',
+                          **measure(operation, ops, rng)}
+                results.append(result)
+                print(_summary_line(result))
+
+            if writers:
+                with _WriterPool(targets.write_operations(), writers, seed) as pool:
+                    for name, operation in operations.items():
+                        result = {'case': f"concurrent/{name}", 'method': name, 'phase': 'concurrent',
+                                  **measure(operation, ops, rng)}
+                        results.append(result)
+                        print(_summary_line(result))
+                writer_summary = pool.summary()
+                print(f"{writers} background writers: {writer_summary['ops_per_second']} ops/s, "
+                      f"{writer_summary['errors']} errors")
+            else:
+                writer_summary = None
+        finally:
+            targets.close()
+
+    return {'environment': environment_info(), 'scale': scale, 'users': users, 'seed': seed,
+            'ops': ops, 'cached': cached, 'background_writers': writer_summary, 'results': results}
+
+
+def compare_results(baseline: Dict, current: Dict,
+                    threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    """
+    Per method and phase present in both runs: p95, p99 and throughput, with
+    the relative change. 'regression' marks changes for the worse beyond threshold.
+    """
+    before_cases = {result['case']: result for result in baseline['results']}
+    changes = []
+
+    for after in current['results']:
+        before = before_cases.get(after['case'])
+        if before is None:
+            continue
+        # (metric, higher_is_better)
+        for metric, higher_is_better in (('p95_ms', False), ('p99_ms', False), ('ops_per_second', True)):
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            if not higher_is_better and old < MIN_LATENCY_MS:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            changes.append({'case': after['case'], 'metric': metric, 'baseline': old, 'current': new,
+                            'change': round(change, 4), 'regression': worse > threshold})
+    return changes
+
+
+def _summary_line(result: Dict) -> str:
+    return (f"{result['case']:<52} p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  "
+            f"p99 {result['p99_ms']:>8.2f} ms  {result['ops_per_second'] or 0:>8.1f} ops/s"
+            + (f"  {result['errors']} errors" if result['errors'] else ''))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the progress and social databases")
+    parser.add_argument('--scale', choices=sorted(SCALES), default=DEFAULT_SCALE)
+    parser.add_argument('--users', type=int, help="override the scale's user count")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--ops', type=int, default=DEFAULT_OPS, help="calls per method per phase")
+    parser.add_argument('--writers', type=int, default=DEFAULT_WRITERS,
+                        help="background writer threads in the concurrent phase (0 skips it)")
+    parser.add_argument('--data-dir', default=DEFAULT_DATA_DIR, help="where generated populations are kept")
+    parser.add_argument('--cached', action='store_true', help="keep the in-process read caches enabled")
+    parser.add_argument('--output', help="write JSON results here")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'))
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as baseline_file, open(args.compare[1]) as current_file:
+            changes = compare_results(json.load(baseline_file), json.load(current_file), args.threshold)
+        regressions = [change for change in changes if change['regression']]
+        for change in regressions:
+            print(f"REGRESSION {change['case']} {change['metric']}: "
+                  f"{change['baseline']} -> {change['current']} ({change['change']:+.1%})")
+        print(f"{len(regressions)} regressions in {len(changes)} compared metrics")
+        return 1 if regressions else 0
+
+    report = run_benchmark(args.scale, args.seed, args.ops, args.writers, args.data_dir,
+                           users=args.users, cached=args.cached)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
+    else:
+        print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
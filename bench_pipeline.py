@@ -0,0 +1,309 @@
+# bench_pipeline.py - Reproducible benchmarks for the video analysis pipeline
+#
+#   python bench_pipeline.py --output results.json
+#   python bench_pipeline.py --quick --targets swing advanced
+#   python bench_pipeline.py --compare baseline.json results.json
+import argparse
+import importlib
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BUNDLED_CLIP = os.path.join(REPO_DIR, 'test_swing.mp4')
+
+# What is benchmarked: target -> (module, class)
+PIPELINE_TARGETS = {
+    'swing': ('video_processor', 'SwingAnalyzer'),
+    'advanced': ('advanced_swing_analyzer', 'AdvancedSwingAnalyzer'),
+    'optimize': ('video_optimizer', 'VideoOptimizer'),
+}
+
+# Synthetic clip matrix. cv2 can't write rotation metadata, so rotated
+# clips are portrait frames, which is what a corrected phone upload becomes.
+RESOLUTIONS = {'480p': (854, 480), '720p': (1280, 720), '1080p': (1920, 1080)}
+FRAME_RATES = (30, 60)
+DURATIONS = (2, 5)
+ROTATIONS = (0, 90)
+QUICK_MATRIX = {'resolutions': ('480p',), 'fps': (30,), 'durations': (2,), 'rotations': (0,)}
+SYNTHETIC_SEED = 7
+
+DEFAULT_REPEAT = 3
+CASE_TIMEOUT_SECONDS = 900
+
+# --compare flags a metric that got worse by more than this fraction;
+# stages under MIN_STAGE_MS per frame are too small to compare reliably
+REGRESSION_THRESHOLD = 0.10
+MIN_STAGE_MS = 0.05
+
+
+def stage_report(instrumentation: Optional[Dict], frames: int) -> Dict:
+    """Per-stage totals from the instrumentation summary an analyzer attaches"""
+    stages = (instrumentation or {}).get('stages', {})
+    return {stage: {'seconds': round(timing['total_ms'] / 1000, 4),
+                    'per_frame_ms': round(timing['total_ms'] / frames, 3) if frames else None,
+                    'p95_ms': timing['p95_ms'],
+                    'calls': timing['count']}
+            for stage, timing in sorted(stages.items())}
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def run_case(case: Dict, repeat: int = DEFAULT_REPEAT) -> Dict:
+    """
+    Benchmark one (target, clip) case in this process. Meant to run in a
+    fresh subprocess per case so peak RSS and model load belong to it alone.
+    """
+    module_name, class_name = PIPELINE_TARGETS[case['target']]
+
+    started = time.perf_counter()
+    instance = getattr(importlib.import_module(module_name), class_name)()
+    load_seconds = time.perf_counter() - started
+    if case['target'] == 'optimize':
+        # Every repeat must do the work, not read the previous run's result
+        instance._get_cached_result = lambda cache_key: None
+
+    runs = []
+    for attempt in range(repeat):
+        output_path = os.path.abspath(f"bench_output_{attempt}.mp4")
+        usage_before = resource.getrusage(resource.RUSAGE_SELF)
+        started = time.perf_counter()
+        if case['target'] == 'optimize':
+            result = instance.optimize_for_analysis(case['clip']['path'], output_path)
+        else:
+            result = instance.analyze_swing(case['clip']['path'], output_path)
+        wall = time.perf_counter() - started
+        usage_after = resource.getrusage(resource.RUSAGE_SELF)
+        cpu = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+
+        instrumentation = result.get('instrumentation') or {}
+        frames = instrumentation.get('counters', {}).get('frames', 0)
+        stages = stage_report(instrumentation, frames)
+        staged = sum(stage['seconds'] for stage in stages.values())
+        runs.append({'wall_seconds': wall, 'cpu_seconds': cpu, 'frames': frames, 'stages': stages,
+                     'other_seconds': max(0.0, wall - staged), 'error': result.get('error')})
+
+    # Report the median run; all wall times are kept to show the spread
+    median = sorted(runs, key=lambda run: run['wall_seconds'])[len(runs) // 2]
+    frames = median['frames']
+    return {
+        'case': case['id'],
+        'target': case['target'],
+        'clip': case['clip'],
+        'frames': frames,
+        'load_seconds': round(load_seconds, 3),
+        'wall_seconds': round(median['wall_seconds'], 4),
+        'run_wall_seconds': [round(run['wall_seconds'], 4) for run in runs],
+        'frames_per_second': round(frames / median['wall_seconds'], 2) if median['wall_seconds'] else None,
+        'stages': median['stages'],
+        'other_seconds': round(median['other_seconds'], 4),
+        'cpu_percent': round(100 * median['cpu_seconds'] / median['wall_seconds'], 1) if median['wall_seconds'] else None,
+        'peak_rss_mb': _peak_rss_mb(),
+        'error': median['error'],
+    }
+
+
+def make_synthetic_clip(path: str, width: int, height: int, fps: int,
+                        duration: int, rotation: int = 0):
+    """A deterministic clip of a stick figure swinging over a noisy background"""
+    import cv2
+    import numpy as np
+
+    if rotation in (90, 270):
+        width, height = height, width
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    background = np.random.default_rng(SYNTHETIC_SEED).integers(0, 60, (height, width, 3), dtype=np.uint8)
+    total = fps * duration
+    scale = min(width, height) / 4
+    colour, thickness = (200, 180, 160), max(2, int(scale / 20))
+    cx, cy = width // 2, height // 2
+
+    for index in range(total):
+        frame = background.copy()
+        angle = math.pi * (0.25 + 1.5 * index / total)
+        shoulder = (cx, int(cy - scale * 0.8))
+        hips = (cx, int(cy + scale * 0.4))
+        hands = (int(cx + scale * math.cos(angle)), int(cy - scale * math.sin(angle)))
+        cv2.circle(frame, (cx, int(cy - scale * 1.1)), int(scale * 0.2), colour, -1)
+        cv2.line(frame, shoulder, hips, colour, thickness)
+        cv2.line(frame, shoulder, hands, colour, thickness)
+        cv2.line(frame, hips, (int(cx - scale * 0.3), int(cy + scale * 1.4)), colour, thickness)
+        cv2.line(frame, hips, (int(cx + scale * 0.3), int(cy + scale * 1.4)), colour, thickness)
+        writer.write(frame)
+    writer.release()
+
+
+def build_cases(targets: List[str], quick: bool = False, bundled: bool = True) -> List[Dict]:
+    matrix = QUICK_MATRIX if quick else {'resolutions': tuple(RESOLUTIONS), 'fps': FRAME_RATES,
+                                         'durations': DURATIONS, 'rotations': ROTATIONS}
+    clips = []
+    for resolution in matrix['resolutions']:
+        for fps in matrix['fps']:
+            for duration in matrix['durations']:
+                for rotation in matrix['rotations']:
+                    clips.append({'name': f"synthetic-{resolution}-{fps}fps-{duration}s-r{rotation}",
+                                  'kind': 'synthetic', 'resolution': resolution, 'fps': fps,
+                                  'duration': duration, 'rotation': rotation})
+    if bundled and os.path.exists(BUNDLED_CLIP):
+        clips.append({'name': 'bundled-test_swing', 'kind': 'bundled', 'path': BUNDLED_CLIP})
+
+    return [{'id': f"{target}/{clip['name']}", 'target': target, 'clip': clip}
+            for target in targets for clip in clips]
+
+
+def _ensure_clip(clip: Dict, clip_dir: str) -> Dict:
+    if clip['kind'] == 'bundled':
+        return clip
+    path = os.path.join(clip_dir, f"{clip['name']}.mp4")
+    if not os.path.exists(path):
+        width, height = RESOLUTIONS[clip['resolution']]
+        make_synthetic_clip(path, width, height, clip['fps'], clip['duration'], clip['rotation'])
+    return dict(clip, path=path)
+
+
+def run_matrix(cases: List[Dict], repeat: int = DEFAULT_REPEAT, clip_dir: Optional[str] = None,
+               timeout: int = CASE_TIMEOUT_SECONDS, verbose: bool = False) -> List[Dict]:
+    """Run every case in its own subprocess and working directory"""
+    clip_dir = clip_dir or os.path.join(tempfile.gettempdir(), 'swing_sage_bench_clips')
+    os.makedirs(clip_dir, exist_ok=True)
+    results = []
+
+    for case in cases:
+        with tempfile.TemporaryDirectory() as workdir:
+            result_path = os.path.join(workdir, 'result.json')
+            output = None if verbose else subprocess.DEVNULL
+            try:
+                case = dict(case, clip=_ensure_clip(case['clip'], clip_dir))
+                command = [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case),
+                           '--case-output', result_path, '--repeat', str(repeat)]
+                subprocess.run(command, cwd=workdir, stdout=output, stderr=subprocess.PIPE,
+                               env=dict(os.environ, ANALYSIS_INSTRUMENTATION='1'),
+                               text=True, timeout=timeout, check=True)
+                with open(result_path) as result_file:
+                    result = json.load(result_file)
+            except subprocess.CalledProcessError as e:
+                last_line = (e.stderr or '').strip().splitlines()[-1:] or [f"exit status {e.returncode}"]
+                result = {'case': case['id'], 'target': case['target'], 'clip': case['clip'],
+                          'error': f"case failed: {last_line[0]}"}
+            except (ImportError, subprocess.SubprocessError, OSError, ValueError) as e:
+                result = {'case': case['id'], 'target': case['target'], 'clip': case['clip'],
+                          'error': f"case failed: {e}"}
+        results.append(result)
+        print(_summary_line(result))
+    return results
+
+
+def environment_info() -> Dict:
+    info = {'timestamp': datetime.now().isoformat(), 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+    for module_name in ('cv2', 'mediapipe', 'numpy'):
+        try:
+            info[module_name] = importlib.import_module(module_name).__version__
+        except (ImportError, AttributeError):
+            info[module_name] = None
+    try:
+        info['commit'] = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                        capture_output=True, text=True, check=True).stdout.strip()
+    except (subprocess.SubprocessError, OSError):
+        info['commit'] = None
+    return info
+
+
+def compare_results(baseline: Dict, current: Dict,
+                    threshold: float = REGRESSION_THRESHOLD) -> List[Dict]:
+    """
+    Per case present in both runs: frames/s, peak RSS and each stage's time
+    per frame, with the relative change. 'regression' marks changes for the
+    worse beyond threshold.
+    """
+    before_cases = {result['case']: result for result in baseline['results'] if not result.get('error')}
+    changes = []
+
+    for after in current['results']:
+        before = before_cases.get(after['case'])
+        if before is None or after.get('error'):
+            continue
+        # (metric, before, after, higher_is_better)
+        metrics = [('frames_per_second', before.get('frames_per_second'), after.get('frames_per_second'), True),
+                   ('peak_rss_mb', before.get('peak_rss_mb'), after.get('peak_rss_mb'), False)]
+        for stage in sorted(set(before.get('stages', {})) & set(after.get('stages', {}))):
+            old = before['stages'][stage]['per_frame_ms']
+            new = after['stages'][stage]['per_frame_ms']
+            if old is not None and new is not None and old >= MIN_STAGE_MS:
+                metrics.append((f"{stage}_ms_per_frame", old, new, False))
+
+        for metric, old, new, higher_is_better in metrics:
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = -change if higher_is_better else change
+            changes.append({'case': after['case'], 'metric': metric, 'baseline': old, 'current': new,
+                            'change': round(change, 4), 'regression': worse > threshold})
+    return changes
+
+
+def _summary_line(result: Dict) -> str:
+    if result.get('error') and 'frames' not in result:
+        return f"{result['case']:<52} ERROR {result['error']}"
+    stages = result.get('stages', {})
+    slowest = max(stages, key=lambda stage: stages[stage]['seconds']) if stages else '-'
+    return (f"{result['case']:<52} {result['frames']:>5} frames {result['frames_per_second'] or 0:>8.1f} fps "
+            f"{result['peak_rss_mb']:>7.1f} MB {result['cpu_percent'] or 0:>6.1f}% cpu  slowest: {slowest}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the swing analysis pipeline")
+    parser.add_argument('--targets', nargs='+', choices=sorted(PIPELINE_TARGETS), default=sorted(PIPELINE_TARGETS))
+    parser.add_argument('--quick', action='store_true', help="one small synthetic clip per target")
+    parser.add_argument('--no-bundled', action='store_true', help="skip test_swing.mp4")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--clip-dir', help="where synthetic clips are generated and reused")
+    parser.add_argument('--timeout', type=int, default=CASE_TIMEOUT_SECONDS)
+    parser.add_argument('--output', help="write JSON results here")
+    parser.add_argument('--verbose', action='store_true', help="show analyzer output")
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'))
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    parser.add_argument('--case-output', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.run_case:
+        with open(args.case_output, 'w') as result_file:
+            json.dump(run_case(json.loads(args.run_case), args.repeat), result_file)
+        return 0
+
+    if args.compare:
+        with open(args.compare[0]) as baseline_file, open(args.compare[1]) as current_file:
+            changes = compare_results(json.load(baseline_file), json.load(current_file), args.threshold)
+        regressions = [change for change in changes if change['regression']]
+        for change in regressions:
+            print(f"REGRESSION {change['case']} {change['metric']}: "
+                  f"{change['baseline']} -> {change['current']} ({change['change']:+.1%})")
+        print(f"{len(regressions)} regressions in {len(changes)} compared metrics")
+        return 1 if regressions else 0
+
+    cases = build_cases(args.targets, quick=args.quick, bundled=not args.no_bundled)
+    results = run_matrix(cases, repeat=args.repeat, clip_dir=args.clip_dir,
+                         timeout=args.timeout, verbose=args.verbose)
+    report = {'environment': environment_info(), 'repeat': args.repeat, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
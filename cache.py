@@ -0,0 +1,316 @@
+# cache.py - Read-through caching for hot Swing Sage reads
+import copy
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from instrumentation import REGISTRY
+
+# Redis is optional - without it every process keeps its own cache
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    redis = None
+    REDIS_AVAILABLE = False
+
+DEFAULT_CACHE_TTL = 60
+DEFAULT_CACHE_ENTRIES = 10000
+
+# Lifetime of RedisStore's version tokens (seconds). Far longer than any
+# entry TTL; a token that expires or is evicted early only orphans entries.
+TOKEN_TTL = 86400
+
+
+class LocalStore:
+    """
+    In-process LRU store with per-entry expiry.
+    Values are deep-copied in and out, so callers can never mutate a
+    cached object - the same isolation a shared store gives for free.
+
+    Invalidations stamp the namespace or key with a new version from a
+    counter; set_many drops values loaded under an older version. At most
+    max_entries versions are kept: a forgotten one reads as the counter
+    value at the time, which is newer than anything it could have been.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._namespaces: Dict[str, set] = {}
+        self._versions: OrderedDict = OrderedDict()  # namespace or (namespace, key) -> int
+        self._version_counter = 0
+        self._version_floor = 0
+        self._lock = threading.Lock()
+
+    def tokens(self, namespace: str, keys: Iterable[str]) -> Dict[str, Any]:
+        with self._lock:
+            return {key: self._token(namespace, key) for key in keys}
+
+    def _token(self, namespace: str, key: str) -> tuple:
+        return (self._versions.get(namespace, self._version_floor),
+                self._versions.get((namespace, key), self._version_floor))
+
+    def _bump(self, version_key):
+        self._version_counter += 1
+        self._versions[version_key] = self._version_counter
+        self._versions.move_to_end(version_key)
+        while len(self._versions) > self.max_entries:
+            self._versions.popitem(last=False)
+            self._version_floor = self._version_counter
+
+    def get_many(self, namespace: str, tokens: Dict[str, Any]) -> Dict[str, Any]:
+        # Invalidation removes entries, so whatever is stored is current
+        found = {}
+        now = time.time()
+        with self._lock:
+            for key in tokens:
+                entry = self._entries.get((namespace, key))
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    self._remove((namespace, key))
+                    continue
+                self._entries.move_to_end((namespace, key))
+                found[key] = copy.deepcopy(entry[1])
+        return found
+
+    def set_many(self, namespace: str, values: Dict[str, Any], ttl: float,
+                 tokens: Dict[str, Any]):
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key, value in values.items():
+                if key not in tokens or tokens[key] != self._token(namespace, key):
+                    continue  # invalidated while it was being loaded
+                self._entries[(namespace, key)] = (expires_at, copy.deepcopy(value))
+                self._entries.move_to_end((namespace, key))
+                self._namespaces.setdefault(namespace, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def delete(self, namespace: str, keys: Iterable[str]):
+        with self._lock:
+            for key in keys:
+                self._bump((namespace, key))
+                self._remove((namespace, key))
+
+    def delete_namespace(self, namespace: str):
+        with self._lock:
+            self._bump(namespace)
+            for key in list(self._namespaces.get(namespace, ())):
+                self._remove((namespace, key))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._namespaces.clear()
+            self._versions.clear()
+            self._version_counter += 1
+            self._version_floor = self._version_counter
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def _remove(self, entry_key):
+        if self._entries.pop(entry_key, None) is not None:
+            namespace, key = entry_key
+            keys = self._namespaces.get(namespace)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._namespaces[namespace]
+
+
+class RedisStore:
+    """
+    Shared Redis store so every app replica sees the same entries and
+    invalidations. Values are JSON, stored under a version token made of
+    the namespace's and the key's random version ids. Invalidating sets a
+    new id, which orphans the old entries until they expire.
+
+    Ids are never reset to a known value: one that is missing (expired, or
+    evicted under allkeys-lru) is replaced by a fresh random id, so losing
+    it can only turn entries into misses, never resurrect stale ones.
+    """
+
+    def __init__(self, url: str, prefix: str = 'swingsage'):
+        if not REDIS_AVAILABLE:
+            raise RuntimeError("redis is required for a shared cache")
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self.evictions = 0  # Redis evicts on its own (maxmemory-policy)
+
+    def tokens(self, namespace: str, keys: Iterable[str]) -> Dict[str, str]:
+        keys = list(keys)
+        names = [self._version_name(namespace)] + [self._version_name(namespace, key) for key in keys]
+        ids = self.client.mget(names)
+        if None in ids:
+            pipeline = self.client.pipeline(transaction=False)
+            for name, version_id in zip(names, ids):
+                if version_id is None:
+                    pipeline.set(name, uuid.uuid4().hex, nx=True, ex=TOKEN_TTL)
+            pipeline.execute()
+            # Re-read so concurrent callers all settle on whichever id won
+            ids = self.client.mget(names)
+        ids = [version_id.decode() if version_id else uuid.uuid4().hex for version_id in ids]
+        return {key: f'{ids[0]}.{key_id}' for key, key_id in zip(keys, ids[1:])}
+
+    def get_many(self, namespace: str, tokens: Dict[str, str]) -> Dict[str, Any]:
+        if not tokens:
+            return {}
+        keys = list(tokens)
+        values = self.client.mget([self._key(namespace, tokens[key], key) for key in keys])
+        return {key: json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+    def set_many(self, namespace: str, values: Dict[str, Any], ttl: float,
+                 tokens: Dict[str, str]):
+        # Stored under the tokens read before loading: if an invalidation
+        # landed in between, these entries are already orphaned
+        pipeline = self.client.pipeline(transaction=False)
+        for key, value in values.items():
+            if key in tokens:
+                pipeline.set(self._key(namespace, tokens[key], key), json.dumps(value),
+                             ex=max(int(ttl), 1))
+        pipeline.execute()
+
+    def delete(self, namespace: str, keys: Iterable[str]):
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(self._version_name(namespace, key), uuid.uuid4().hex, ex=TOKEN_TTL)
+        pipeline.execute()
+
+    def delete_namespace(self, namespace: str):
+        self.client.set(self._version_name(namespace), uuid.uuid4().hex, ex=TOKEN_TTL)
+
+    def clear(self):
+        for key in self.client.scan_iter(f'{self.prefix}:*'):
+            self.client.delete(key)
+
+    def size(self) -> int:
+        return self.client.dbsize()
+
+    def _version_name(self, namespace: str, key: Optional[str] = None) -> str:
+        if key is None:
+            return f'{self.prefix}:ver:{namespace}'
+        return f'{self.prefix}:ver:{namespace}:{key}'
+
+    def _key(self, namespace: str, token: str, key: str) -> str:
+        return f'{self.prefix}:{namespace}:{token}:{key}'
+
+
+class Cache:
+    """
+    Read-through cache over a LocalStore or RedisStore:
+    - get_or_load / get_many_or_load run the loader only on a miss
+    - Entries expire after a TTL and can be invalidated by key or by
+      namespace from write paths
+    - Hit, miss and error counts for monitoring; a failing shared store
+      degrades to loading from the database, never to an error
+    """
+
+    def __init__(self, store=None, default_ttl: float = DEFAULT_CACHE_TTL):
+        self.store = store or LocalStore()
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get_or_load(self, namespace: str, key: str, loader: Callable[[], Any],
+                    ttl: Optional[float] = None) -> Any:
+        value = self.get_many_or_load(namespace, [key], lambda missing: {key: loader()}, ttl)
+        return value[key]
+
+    def get_many_or_load(self, namespace: str, keys: Iterable[str],
+                         loader: Callable[[list], Dict[str, Any]],
+                         ttl: Optional[float] = None) -> Dict[str, Any]:
+        """Cached values for keys; loader(missing_keys) returns a dict for the rest"""
+        keys = list(dict.fromkeys(keys))
+        # Per-user namespaces ('progress:<user_id>') are reported under their prefix
+        cache_name = namespace.split(':', 1)[0]
+        # Versions are read once, before loading, and the loaded values are
+        # stored under them: a write that invalidates mid-load wins
+        try:
+            tokens = self.store.tokens(namespace, keys)
+            found = self.store.get_many(namespace, tokens)
+        except Exception:
+            self.errors += 1
+            REGISTRY.inc('cache_requests_total', cache=cache_name, result='error')
+            tokens, found = None, {}
+
+        missing = [key for key in keys if key not in found]
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+        if len(keys) > len(missing):
+            REGISTRY.inc('cache_requests_total', len(keys) - len(missing), cache=cache_name, result='hit')
+        if missing:
+            REGISTRY.inc('cache_requests_total', len(missing), cache=cache_name, result='miss')
+
+        if missing:
+            loaded = loader(missing)
+            if tokens is not None:
+                try:
+                    self.store.set_many(namespace, loaded, ttl or self.default_ttl, tokens)
+                except Exception:
+                    self.errors += 1
+            found.update(loaded)
+        return found
+
+    def invalidate(self, namespace: str, *keys: str):
+        try:
+            self.store.delete(namespace, keys)
+        except Exception:
+            self.errors += 1
+
+    def invalidate_namespace(self, namespace: str):
+        try:
+            self.store.delete_namespace(namespace)
+        except Exception:
+            self.errors += 1
+
+    def clear(self):
+        self.store.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        try:
+            size = self.store.size()
+        except Exception:
+            size = None
+        return {
+            'backend': type(self.store).__name__,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'errors': self.errors,
+            'evictions': self.store.evictions,
+            'size': size
+        }
+
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+def create_cache() -> Cache:
+    """
+    The process-wide cache: Redis-backed when REDIS_URL is set (and redis
+    is installed) so app replicas share entries, otherwise in-memory.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            ttl = float(os.environ.get('CACHE_TTL_SECONDS', DEFAULT_CACHE_TTL))
+            redis_url = os.environ.get('REDIS_URL')
+            if redis_url and REDIS_AVAILABLE:
+                _shared_cache = Cache(RedisStore(redis_url), default_ttl=ttl)
+            else:
+                max_entries = int(os.environ.get('CACHE_MAX_ENTRIES', DEFAULT_CACHE_ENTRIES))
+                _shared_cache = Cache(LocalStore(max_entries), default_ttl=ttl)
+        return _shared_cache
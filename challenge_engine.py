@@ -0,0 +1,201 @@
+# challenge_engine.py - Incremental scoring and ranking for community challenges
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from leaderboard import RankedScores
+
+# Live challenge rankings are reloaded after this many seconds so scores
+# written by other processes show up
+CHALLENGE_BOARD_TTL_SECONDS = 60
+
+# How often the background sweep finalizes challenges past their end_date
+CHALLENGE_SWEEP_INTERVAL = 300
+
+# User ids bound per IN (...) lookup; stays under SQLite's default limit of
+# 999 host parameters on older builds
+INGEST_USERS_PER_QUERY = 500
+
+
+def challenge_metric_value(analysis_result: Dict, metric: str) -> Optional[float]:
+    """
+    Score an analysis against a challenge metric, higher being better.
+    Top-level numbers (overall_score, ...) count as-is; fault names are read
+    from fault_percentages and inverted so less of the fault scores higher.
+    """
+    value = analysis_result.get(metric)
+    if isinstance(value, (int, float)):
+        return float(value)
+
+    fault_percentage = (analysis_result.get('fault_percentages') or {}).get(metric)
+    if isinstance(fault_percentage, (int, float)):
+        return 100.0 - fault_percentage
+    return None
+
+
+class ChallengeEngine:
+    """
+    Challenge scoring for SocialPlatform:
+    - Ingests swing analyses in batches and folds them into each open
+      challenge's participant best_score / submission_count
+    - Keeps live rankings per challenge, updated per submission in
+      O(log n) instead of re-sorting every entry
+    - Finalizes ranks once challenges pass their end_date
+    """
+
+    def __init__(self, backend, board_ttl_seconds: float = CHALLENGE_BOARD_TTL_SECONDS):
+        self.backend = backend
+        self.board_ttl_seconds = board_ttl_seconds
+        self._boards: Dict[str, RankedScores] = {}
+        self._lock = threading.RLock()
+        self._sweeper = None
+        self._stop_sweeper = threading.Event()
+
+    def ingest(self, submissions: Iterable[Tuple[str, Dict, Optional[str]]]) -> Dict:
+        """
+        Apply (user_id, analysis_result, analysis_date) submissions to every
+        open challenge each user has joined, in one transaction
+        """
+        by_user: Dict[str, List[Tuple[Dict, str]]] = {}
+        for user_id, analysis_result, analysis_date in submissions:
+            by_user.setdefault(user_id, []).append(
+                (analysis_result, analysis_date or datetime.now().isoformat()))
+        if not by_user:
+            return {'submissions': 0, 'participants_updated': 0}
+
+        # (challenge_id, user_id) -> [best value, submission count]
+        updates: Dict[Tuple[str, str], List] = {}
+
+        with self.backend.transaction() as conn:
+            cursor = conn.cursor()
+            user_ids = list(by_user)
+            entries = []
+            for start in range(0, len(user_ids), INGEST_USERS_PER_QUERY):
+                chunk = user_ids[start:start + INGEST_USERS_PER_QUERY]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(f'''
+                    SELECT cp.challenge_id, cp.user_id, c.target_metric, c.start_date, c.end_date
+                    FROM challenge_participants cp
+                    JOIN challenges c ON c.challenge_id = cp.challenge_id
+                    WHERE cp.user_id IN ({placeholders}) AND c.status = 'open'
+                ''', chunk)
+                entries.extend(cursor.fetchall())
+
+            for challenge_id, user_id, metric, start_date, end_date in entries:
+                for analysis_result, analysis_date in by_user[user_id]:
+                    if not start_date <= analysis_date <= end_date:
+                        continue
+                    value = challenge_metric_value(analysis_result, metric)
+                    if value is None:
+                        continue
+                    update = updates.setdefault((challenge_id, user_id), [value, 0])
+                    update[0] = max(update[0], value)
+                    update[1] += 1
+
+            cursor.executemany('''
+                UPDATE challenge_participants
+                SET best_score = CASE WHEN best_score IS NULL OR best_score < ?
+                                      THEN ? ELSE best_score END,
+                    submission_count = submission_count + ?
+                WHERE challenge_id = ? AND user_id = ?
+            ''', [(best, best, count, challenge_id, user_id)
+                  for (challenge_id, user_id), (best, count) in updates.items()])
+
+        # Only after commit: raise scores in loaded live boards
+        with self._lock:
+            for (challenge_id, user_id), (best, _) in updates.items():
+                board = self._boards.get(challenge_id)
+                if board is not None and best > board.scores.get(user_id, float('-inf')):
+                    board.set(user_id, best)
+
+        return {'submissions': sum(len(items) for items in by_user.values()),
+                'participants_updated': len(updates)}
+
+    def rankings(self, challenge_id: str, limit: int = 50,
+                 offset: int = 0) -> List[Tuple[int, str, float]]:
+        """(rank, user_id, best_score) for participants with a score"""
+        with self._lock:
+            board = self._board(challenge_id)
+            entries = board.ranks.slice(offset, offset + limit)
+        return [(offset + i + 1, user_id, -negative_score)
+                for i, (negative_score, user_id) in enumerate(entries)]
+
+    def rank(self, challenge_id: str, user_id: str) -> Optional[Tuple[int, float]]:
+        """(rank, best_score) for a participant, or None before their first score"""
+        with self._lock:
+            board = self._board(challenge_id)
+            score = board.scores.get(user_id)
+            if score is None:
+                return None
+            return board.ranks.index((-score, user_id)) + 1, score
+
+    def finalize_due_challenges(self, now: Optional[datetime] = None) -> int:
+        """Close every open challenge past its end_date and store final ranks"""
+        now_iso = (now or datetime.now()).isoformat()
+
+        conn = self.backend.connect()
+        due = [row[0] for row in conn.execute('''
+            SELECT challenge_id FROM challenges WHERE status = 'open' AND end_date <= ?
+        ''', (now_iso,)).fetchall()]
+        conn.close()
+
+        finalized = 0
+        for challenge_id in due:
+            with self.backend.transaction() as conn:
+                cursor = conn.cursor()
+                # Claiming the challenge first means concurrent sweeps never both rank it
+                cursor.execute('''
+                    UPDATE challenges SET status = 'completed'
+                    WHERE challenge_id = ? AND status = 'open'
+                ''', (challenge_id,))
+                if cursor.rowcount != 1:
+                    continue
+
+                cursor.execute('''
+                    SELECT user_id FROM challenge_participants
+                    WHERE challenge_id = ? AND best_score IS NOT NULL
+                    ORDER BY best_score DESC, user_id
+                ''', (challenge_id,))
+                cursor.executemany('''
+                    UPDATE challenge_participants SET final_rank = ?
+                    WHERE challenge_id = ? AND user_id = ?
+                ''', [(rank, challenge_id, user_id)
+                      for rank, (user_id,) in enumerate(cursor.fetchall(), start=1)])
+            finalized += 1
+
+            with self._lock:
+                self._boards.pop(challenge_id, None)
+
+        return finalized
+
+    def start_sweeper(self, interval_seconds: float = CHALLENGE_SWEEP_INTERVAL):
+        """Finalize due challenges on a background thread"""
+        if self._sweeper or not interval_seconds:
+            return
+
+        def sweep():
+            while not self._stop_sweeper.wait(interval_seconds):
+                try:
+                    self.finalize_due_challenges()
+                except Exception as e:
+                    print(f"Challenge sweep error: {e}")
+
+        self._sweeper = threading.Thread(target=sweep, daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop_sweeper.set()
+
+    def _board(self, challenge_id: str) -> RankedScores:
+        board = self._boards.get(challenge_id)
+        if board is None or time.time() - board.loaded_at > self.board_ttl_seconds:
+            conn = self.backend.connect()
+            rows = conn.execute('''
+                SELECT user_id, best_score FROM challenge_participants
+                WHERE challenge_id = ? AND best_score IS NOT NULL
+            ''', (challenge_id,)).fetchall()
+            conn.close()
+            board = RankedScores(dict(rows))
+            self._boards[challenge_id] = board
+        return board
@@ -3,12 +3,48 @@ Coaching Engine Module for Swing Sage
 Handles personalized coaching feedback generation
 """
 
-from typing import Dict
+from typing import Dict, Optional
+import hashlib
+import json
 import random
 
+from cache import Cache, LocalStore
+from coaching_rules import RulesEngine, default_rules
+
+# Deterministic engines memoize this many generated outputs in-process
+COACHING_MEMO_ENTRIES = 5000
+
+GENERIC_FEEDBACK = "Keep working on your swing fundamentals."
+
+
+def coaching_seed(analysis_result: Dict, user_id: Optional[str] = None,
+                  analysis_id: Optional[str] = None) -> int:
+    """
+    Stable seed for one user's coaching on one analysis: the analysis id
+    when it is known, otherwise a hash of the analysis content
+    """
+    basis = analysis_id or hashlib.sha256(
+        json.dumps(analysis_result, sort_keys=True, default=str).encode()).hexdigest()
+    digest = hashlib.sha256(f'{basis}:{user_id or ""}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def coaching_rng(analysis_result: Dict, user_id: Optional[str] = None,
+                 analysis_id: Optional[str] = None) -> random.Random:
+    """Random seeded by coaching_seed, so coaching text is a pure function of its inputs"""
+    return random.Random(coaching_seed(analysis_result, user_id, analysis_id))
+
+
 class CoachingEngine:
-    def __init__(self):
+    def __init__(self, deterministic: bool = False, cache: Optional[Cache] = None,
+                 rules: Optional[RulesEngine] = None):
+        # Deterministic engines seed per analysis and memoize their output
+        self.deterministic = deterministic
+        self.cache = cache or Cache(LocalStore(COACHING_MEMO_ENTRIES))
+        # Thresholds and wording live in coaching_rules.json (hot reloaded)
+        self.rules = rules or default_rules()
         self.feedback_database = self._build_feedback_database()
+        self._variants = (None, {})
         self.encouragement_phrases = [
             "You're on the right track",
             "I can see the improvement already", 
@@ -17,44 +53,55 @@ class CoachingEngine:
             "You're swinging with more confidence"
         ]
     
-    def generate_feedback(self, analysis_result: Dict, golfer_type: str = "weekend_player", experience: str = "intermediate") -> str:
+    def generate_feedback(self, analysis_result: Dict, golfer_type: str = "weekend_player", experience: str = "intermediate",
+                          user_id: Optional[str] = None, analysis_id: Optional[str] = None) -> str:
+        if not self.deterministic:
+            return self._generate_feedback(analysis_result, golfer_type, experience, random)
+        
+        seed = coaching_seed(analysis_result, user_id, analysis_id)
+        return self.cache.get_or_load(
+            'coaching_tip', f'{seed}:{self.rules.version}:{golfer_type}:{experience}',
+            lambda: self._generate_feedback(analysis_result, golfer_type, experience,
+                                            random.Random(seed)))
+    
+    def _generate_feedback(self, analysis_result: Dict, golfer_type: str, experience: str, rng) -> str:
         primary_fault = self._identify_primary_fault(analysis_result)
         base_feedback = self._get_fault_feedback(primary_fault, golfer_type, experience)
-        return self._personalize_feedback(base_feedback, analysis_result, golfer_type)
+        return self._personalize_feedback(base_feedback, analysis_result, golfer_type, rng)
     
     def _identify_primary_fault(self, analysis_result: Dict) -> str:
-        collapse_pct = analysis_result.get('collapse_percentage', 0)
-        posture_pct = analysis_result.get('posture_loss_percentage', 0)
-        
-        if collapse_pct > 60:
-            return "severe_trail_arm_collapse"
-        elif posture_pct > 60:
-            return "severe_posture_loss"
-        elif collapse_pct > 30:
-            return "moderate_trail_arm_collapse"
-        elif posture_pct > 30:
-            return "moderate_posture_loss"
-        elif collapse_pct > 15:
-            return "mild_trail_arm_collapse"
-        elif posture_pct > 15:
-            return "mild_posture_loss"
-        else:
-            return "good_swing"
+        return self.rules.primary_fault(analysis_result)
     
     def _get_fault_feedback(self, fault: str, golfer_type: str, experience: str) -> str:
-        fault_feedback = self.feedback_database.get(fault, {})
-        feedback = fault_feedback.get(golfer_type) or fault_feedback.get('default') or "Keep working on your swing fundamentals."
-        return self._adjust_for_experience(feedback, experience)
+        rules = self.rules.current()
+        variants = self._feedback_variants(rules)
+        experience = experience if experience in rules.rewrites else None
+        return (variants.get((fault, golfer_type, experience)) or
+                variants.get((fault, 'default', experience)) or
+                variants[(None, None, experience)])
     
-    def _adjust_for_experience(self, feedback: str, experience: str) -> str:
-        if experience == "beginner":
-            feedback = feedback.replace("trail arm", "right arm")
-            feedback = feedback.replace("posture", "body position")
-        return feedback
+    def _feedback_variants(self, rules) -> Dict:
+        """
+        Every (fault, golfer_type, experience) text with its experience
+        rewrites already applied, rebuilt only when the rules change
+        """
+        version, variants = self._variants
+        if version == rules.version:
+            return variants
+        
+        variants = {}
+        for experience in [None, *rules.rewrites]:
+            variants[(None, None, experience)] = rules.rewrite(GENERIC_FEEDBACK, experience)
+            for fault, by_golfer_type in self.feedback_database.items():
+                for golfer_type, feedback in by_golfer_type.items():
+                    variants[(fault, golfer_type, experience)] = rules.rewrite(feedback, experience)
+        self._variants = (rules.version, variants)
+        return variants
     
-    def _personalize_feedback(self, base_feedback: str, analysis_result: Dict, golfer_type: str) -> str:
-        if random.random() < 0.3:
-            encouragement = random.choice(self.encouragement_phrases)
+    def _personalize_feedback(self, base_feedback: str, analysis_result: Dict, golfer_type: str,
+                              rng=random) -> str:
+        if rng.random() < 0.3:
+            encouragement = rng.choice(self.encouragement_phrases)
             base_feedback = f"{encouragement}! {base_feedback}"
         
         total_frames = analysis_result.get('total_frames', 0)
@@ -0,0 +1,150 @@
+# coaching_rules.py - Declarative coaching thresholds, compiled for per-request lookups
+import hashlib
+import json
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from typing import Dict, Optional, Tuple
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'coaching_rules.json')
+
+# The rules file's mtime is checked at most this often (seconds)
+RULES_CHECK_INTERVAL = 2.0
+
+
+class CompiledRules:
+    """
+    One immutable snapshot of coaching_rules.json:
+    - primary fault rules as an ordered (metric, threshold, fault) tuple
+    - difficulty and severity bands as sorted thresholds for bisection
+    - experience rewrites as (old, new) pairs per experience level
+    The version is a digest of the file's bytes, so every process (and
+    every restart) loading the same rules agrees on it.
+    """
+
+    def __init__(self, raw: Dict, version: str):
+        self.version = version
+        self.fault_rules: Tuple[Tuple[str, float, str], ...] = tuple(
+            (rule['metric'], float(rule['above']), rule['fault'])
+            for rule in raw['primary_fault_rules'])
+        self.default_fault: str = raw['default_fault']
+
+        levels = sorted((float(band['min_score']), band['level']) for band in raw['difficulty_levels'])
+        self.difficulty_thresholds = tuple(threshold for threshold, _ in levels)
+        self.difficulty_names = tuple(level for _, level in levels)
+        self.default_difficulty: str = raw['default_difficulty']
+
+        bands = sorted((float(band['above']), band['severity']) for band in raw['fault_severity'])
+        self.severity_thresholds = tuple(threshold for threshold, _ in bands)
+        self.severity_names = tuple(severity for _, severity in bands)
+        self.default_severity: str = raw['default_severity']
+
+        self.rewrites: Dict[str, Tuple[Tuple[str, str], ...]] = {
+            experience: tuple((old, new) for old, new in pairs)
+            for experience, pairs in raw.get('experience_rewrites', {}).items()
+        }
+
+    def primary_fault(self, analysis_result: Dict) -> str:
+        """First rule (in priority order) whose metric is above its threshold"""
+        for metric, threshold, fault in self.fault_rules:
+            if analysis_result.get(metric, 0) > threshold:
+                return fault
+        return self.default_fault
+
+    def difficulty_level(self, score: float) -> str:
+        """Highest band whose min_score the score reaches"""
+        index = bisect_right(self.difficulty_thresholds, score)
+        return self.difficulty_names[index - 1] if index else self.default_difficulty
+
+    def fault_severity(self, fault_percentage: float) -> str:
+        """Highest band the percentage is strictly above"""
+        index = bisect_left(self.severity_thresholds, fault_percentage)
+        return self.severity_names[index - 1] if index else self.default_severity
+
+    def rewrite(self, text: str, experience: str) -> str:
+        """Apply an experience level's wording changes (used when building variants)"""
+        for old, new in self.rewrites.get(experience, ()):
+            text = text.replace(old, new)
+        return text
+
+
+class RulesEngine:
+    """
+    Loads coaching_rules.json into CompiledRules and swaps in a new snapshot
+    when the file changes on disk. A file that fails to parse is reported
+    and the previous rules stay in force.
+    """
+
+    def __init__(self, path: str = DEFAULT_RULES_PATH,
+                 check_interval: float = RULES_CHECK_INTERVAL):
+        self.path = path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked_at = 0.0
+        self._rules: Optional[CompiledRules] = None
+        self._load(initial=True)
+
+    def current(self) -> CompiledRules:
+        """The live snapshot, reloading first if the file has changed"""
+        if time.time() - self._checked_at >= self.check_interval:
+            self._load()
+        return self._rules
+
+    @property
+    def version(self) -> str:
+        return self.current().version
+
+    def primary_fault(self, analysis_result: Dict) -> str:
+        return self.current().primary_fault(analysis_result)
+
+    def difficulty_level(self, score: float) -> str:
+        return self.current().difficulty_level(score)
+
+    def fault_severity(self, fault_percentage: float) -> str:
+        return self.current().fault_severity(fault_percentage)
+
+    def _load(self, initial: bool = False):
+        with self._lock:
+            self._checked_at = time.time()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError as e:
+                if initial:
+                    raise
+                print(f"Coaching rules unavailable, keeping current rules: {e}")
+                return
+            if mtime == self._mtime:
+                return
+
+            try:
+                with open(self.path, 'rb') as rules_file:
+                    content = rules_file.read()
+                rules = CompiledRules(json.loads(content), version=rules_version(content))
+            except (ValueError, KeyError, TypeError) as e:
+                if initial:
+                    raise
+                print(f"Invalid coaching rules in {self.path}, keeping current rules: {e}")
+                self._mtime = mtime
+                return
+
+            self._rules = rules
+            self._mtime = mtime
+
+
+def rules_version(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()[:16]
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def default_rules() -> RulesEngine:
+    """Process-wide engine over coaching_rules.json (or COACHING_RULES_PATH)"""
+    global _default_engine
+    with _default_engine_lock:
+        if _default_engine is None:
+            _default_engine = RulesEngine(os.environ.get('COACHING_RULES_PATH', DEFAULT_RULES_PATH))
+        return _default_engine
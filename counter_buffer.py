@@ -0,0 +1,197 @@
+# counter_buffer.py - Write-coalescing counters for hot rows
+import atexit
+import glob
+import json
+import os
+import threading
+import uuid
+from typing import Callable, Dict, Optional
+
+# File locks tell a live process's log apart from one left by a crashed
+# process; without fcntl (Windows) orphaned logs are simply not adopted
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+def _segment_flush_id(segment_path: str) -> str:
+    # Log names are unique per process and rotation, so the id is too
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, os.path.basename(segment_path)))
+
+
+class CounterBuffer:
+    """
+    Aggregates counter increments in memory and applies them in batches:
+    - N increments of one row become a single UPDATE per flush
+    - Flushes happen on an interval or once enough increments are pending
+    - Every increment is appended to a per-process log before it is
+      buffered, so deltas survive a crash and are replayed on restart
+    - Each flush carries an id; apply_batch must ignore ids it has already
+      applied, which makes replaying a half-finished flush safe
+    """
+
+    def __init__(self, apply_batch: Callable[[str, Dict[str, Dict[str, int]]], None],
+                 log_dir: Optional[str] = None, flush_interval: float = 2.0,
+                 flush_threshold: int = 500):
+        self.apply_batch = apply_batch
+        self.log_dir = log_dir
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+
+        self._pending: Dict[str, Dict[str, int]] = {}
+        self._pending_count = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._log_file = None
+        self._log_path = None
+        self._closed = threading.Event()
+
+        if self.log_dir:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self._open_log()
+            self._recover_orphaned_logs()
+
+        self._flush_thread = None
+        if self.flush_interval:
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
+
+        atexit.register(self.close)
+
+    def increment(self, key: str, field: str, amount: int = 1):
+        """Record a delta; it is durable in the log before this returns"""
+        with self._lock:
+            if self._log_file:
+                self._log_file.write(json.dumps([key, field, amount]) + '\n')
+                self._log_file.flush()
+
+            fields = self._pending.setdefault(key, {})
+            fields[field] = fields.get(field, 0) + amount
+            self._pending_count += 1
+            should_flush = self._pending_count >= self.flush_threshold
+
+        if should_flush:
+            self.flush()
+
+    def pending(self, key: str) -> Dict[str, int]:
+        """Deltas for key that have not been flushed yet"""
+        with self._lock:
+            return dict(self._pending.get(key, {}))
+
+    def flush(self) -> int:
+        """Apply every pending delta in one batch; returns keys flushed"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                self._pending_count = 0
+                segment = self._rotate_log()
+
+            flush_id = _segment_flush_id(segment[1]) if segment else str(uuid.uuid4())
+            try:
+                self.apply_batch(flush_id, batch)
+            except Exception:
+                # Put the deltas back (and back in the live log) for the next attempt
+                with self._lock:
+                    for key, fields in batch.items():
+                        for field, amount in fields.items():
+                            pending_fields = self._pending.setdefault(key, {})
+                            pending_fields[field] = pending_fields.get(field, 0) + amount
+                            self._pending_count += 1
+                            if self._log_file:
+                                self._log_file.write(json.dumps([key, field, amount]) + '\n')
+                    if self._log_file:
+                        self._log_file.flush()
+                self._discard_segment(segment)
+                raise
+
+            self._discard_segment(segment)
+            return len(batch)
+
+    def close(self):
+        """Stop the flush thread and flush what is left"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"Counter flush on close failed: {e}")
+        with self._lock:
+            if self._log_file:
+                self._log_file.close()
+                self._log_file = None
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Counter flush error: {e}")
+
+    def _open_log(self):
+        self._log_path = os.path.join(
+            self.log_dir, f"counters-{os.getpid()}-{uuid.uuid4().hex[:8]}.log")
+        self._log_file = open(self._log_path, 'a')
+        if fcntl:
+            fcntl.flock(self._log_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def _rotate_log(self):
+        """Swap the live log for a fresh one; caller holds _lock"""
+        if not self._log_file:
+            return None
+        # The renamed file keeps its lock, so no other process adopts it mid-flush
+        segment_path = self._log_path + '.flushing'
+        os.replace(self._log_path, segment_path)
+        segment = (self._log_file, segment_path)
+        self._open_log()
+        return segment
+
+    def _discard_segment(self, segment):
+        if not segment:
+            return
+        log_file, segment_path = segment
+        os.remove(segment_path)
+        log_file.close()
+
+    def _recover_orphaned_logs(self):
+        """Adopt logs left behind by processes that died before flushing"""
+        if not fcntl:
+            return
+
+        for path in sorted(glob.glob(os.path.join(self.log_dir, 'counters-*.log*'))):
+            if path in (self._log_path, self._log_path + '.flushing'):
+                continue
+            try:
+                orphan = open(path, 'r')
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(orphan.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                orphan.close()  # Still owned by a live process
+                continue
+
+            deltas: Dict[str, Dict[str, int]] = {}
+            for line in orphan:
+                try:
+                    key, field, amount = json.loads(line)
+                except ValueError:
+                    continue  # Torn final write
+                fields = deltas.setdefault(key, {})
+                fields[field] = fields.get(field, 0) + amount
+
+            # A half-applied flush is re-applied under the id flush() used for
+            # it, so apply_batch can recognise it if it did commit
+            if path.endswith('.flushing') and deltas:
+                self.apply_batch(_segment_flush_id(path), deltas)
+            else:
+                for key, fields in deltas.items():
+                    for field, amount in fields.items():
+                        self.increment(key, field, amount)
+
+            os.remove(path)
+            orphan.close()
@@ -0,0 +1,311 @@
+# datagen.py - Deterministic synthetic data for load testing the tracker and social platform
+import json
+import os
+import random
+import uuid
+from array import array
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from progress_tracker import BULK_TABLES, ProgressTracker
+from social_platform import SocialPlatform
+
+DEFAULT_SEED = 7
+
+GOLFER_TYPES = ('weekend_player', 'beginner', 'competitive')
+EXPERIENCE_LEVELS = ('beginner', 'intermediate', 'advanced')
+
+# The faults AdvancedSwingAnalyzer reports, with a typical player's
+# percentage of frames showing each; weaker players show more of all of them
+FAULT_BASE_RATES = {
+    'trail_arm_collapse': 30, 'early_extension': 25, 'over_the_top': 20, 'sway': 15,
+    'reverse_pivot': 10, 'head_movement': 18, 'weight_shift': 22,
+}
+
+# Analyses per user are Pareto-distributed (a few very active players),
+# spread between the user's join date and now
+HISTORY_DAYS = 365
+MEAN_ANALYSES_PER_USER = 8
+MAX_ANALYSES_PER_USER = 400
+
+# Follow out-degree is Pareto-distributed and targets are drawn by a Zipf
+# law over a fixed popularity order, so in-degree follows a power law too
+MEAN_FOLLOWS = 12
+MAX_FOLLOWS = 2000
+FOLLOW_ZIPF_EXPONENT = 1.05
+PARETO_ALPHA = 2.0
+
+SHARE_PROBABILITY = 0.15
+PRIVACY_WEIGHTS = {'public': 0.85, 'friends': 0.10, 'private': 0.05}
+MEAN_REACTIONS_PER_SHARE = 6
+MEAN_COMMENTS_PER_SHARE = 1.5
+COMMENT_TEMPLATES = ('Great tempo!', 'Love the extension through impact.',
+                     'What drill fixed your early extension?', 'Huge improvement from last week.',
+                     'Try keeping your head still at the top.', 'That finish position though!')
+
+# Rows per executemany/commit when writing the social tables
+WRITE_BATCH_ROWS = 50000
+# Rows per NDJSON chunk fed to ProgressTracker.import_history
+IMPORT_CHUNK_ROWS = 5000
+
+_ID_NAMESPACE = uuid.UUID('6f1c9a52-3d0e-4b7a-9c55-2a8e4f0d7b13')
+
+
+def _pareto_count(rng: random.Random, mean: float, cap: int) -> int:
+    minimum = mean * (PARETO_ALPHA - 1) / PARETO_ALPHA
+    return min(int(minimum * rng.paretovariate(PARETO_ALPHA)), cap)
+
+
+def _random_id(rng: random.Random) -> str:
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+class SyntheticDataset:
+    """
+    A reproducible population of `users` players. Every user's history is
+    derived from (seed, index) alone, so the tracker and social passes can
+    regenerate it independently without holding it in memory.
+    """
+
+    def __init__(self, users: int, seed: int = DEFAULT_SEED, now: Optional[datetime] = None):
+        self.users = users
+        self.seed = seed
+        self.now = now or datetime.now()
+        self.user_ids = [str(uuid.uuid5(_ID_NAMESPACE, f'{seed}:{index}')) for index in range(users)]
+
+    def _rng(self, stream: str, index: int) -> random.Random:
+        return random.Random(f'{self.seed}:{stream}:{index}')
+
+    def user_profile(self, index: int) -> Tuple:
+        """A users row in BULK_TABLES column order"""
+        rng = self._rng('profile', index)
+        joined = self.now - timedelta(days=HISTORY_DAYS * rng.random())
+        return (self.user_ids[index], joined.isoformat(), rng.choice(GOLFER_TYPES),
+                rng.choice(EXPERIENCE_LEVELS), rng.randint(0, 36), None, self.now.isoformat())
+
+    def user_analyses(self, index: int) -> List[Tuple]:
+        """A user's swing_analyses rows, oldest first, in BULK_TABLES column order"""
+        rng = self._rng('analyses', index)
+        user_id = self.user_ids[index]
+        count = max(1, _pareto_count(rng, MEAN_ANALYSES_PER_USER, MAX_ANALYSES_PER_USER))
+        history_days = HISTORY_DAYS * rng.random()
+        offsets = sorted((rng.random() * history_days for _ in range(count)), reverse=True)
+
+        # Fault levels start from the player's skill and improve with practice
+        weakness = rng.uniform(0.4, 1.8)
+        improvement = rng.uniform(0.0, 0.5)
+        rows = []
+        for number, days_ago in enumerate(offsets):
+            progress = number / count
+            level = weakness * (1 - improvement * progress)
+            faults = {fault: round(min(100.0, rate * level * rng.lognormvariate(0, 0.4)), 1)
+                      for fault, rate in FAULT_BASE_RATES.items()}
+            score = round(max(0.0, 100 - sum(faults.values()) / len(faults)), 1)
+            issues = [{'fault': fault, 'percentage': pct}
+                      for fault, pct in sorted(faults.items(), key=lambda item: item[1], reverse=True)[:3]
+                      if pct > 10]
+            analysis_date = (self.now - timedelta(days=days_ago)).isoformat()
+            rows.append((_random_id(rng), user_id, analysis_date, f'analyzed_{number}.mp4', score,
+                         json.dumps(faults), json.dumps(issues),
+                         f"Focus on {issues[0]['fault'].replace('_', ' ')}" if issues else 'Keep it up',
+                         None))
+        return rows
+
+    def history_stream(self) -> Iterator[str]:
+        """The dataset as an export_history-style NDJSON stream"""
+        tables = dict(BULK_TABLES)
+        for table, rows_for in (('users', lambda index: [self.user_profile(index)]),
+                                ('swing_analyses', self.user_analyses)):
+            chunk = []
+            for index in range(self.users):
+                chunk.extend(rows_for(index))
+                if len(chunk) >= IMPORT_CHUNK_ROWS:
+                    yield json.dumps({'table': table, 'columns': tables[table], 'rows': chunk}) + '\n'
+                    chunk = []
+            if chunk:
+                yield json.dumps({'table': table, 'columns': tables[table], 'rows': chunk}) + '\n'
+
+    def follows(self) -> Iterator[Tuple[int, int]]:
+        """(follower_index, following_index) pairs with power-law degrees"""
+        popularity = list(range(self.users))
+        random.Random(f'{self.seed}:popularity').shuffle(popularity)
+        cum_weights = list(accumulate(1 / (rank + 1) ** FOLLOW_ZIPF_EXPONENT
+                                      for rank in range(self.users)))
+
+        for index in range(self.users):
+            rng = self._rng('follows', index)
+            degree = min(_pareto_count(rng, MEAN_FOLLOWS, MAX_FOLLOWS), self.users - 1)
+            targets = set(rng.choices(popularity, cum_weights=cum_weights, k=degree))
+            targets.discard(index)
+            for target in sorted(targets):
+                yield index, target
+
+
+def _close_platform(platform: SocialPlatform):
+    platform.challenges.stop_sweeper()
+    platform.counters.close()
+    platform.backend.close()
+
+
+def populate_progress(dataset: SyntheticDataset, db_path: str) -> Dict:
+    """Load users and analyses through ProgressTracker.import_history"""
+    tracker = ProgressTracker(db_path)
+    try:
+        return tracker.import_history(dataset.history_stream())
+    finally:
+        tracker.backend.close()
+
+
+def populate_social(dataset: SyntheticDataset, db_path: str) -> Dict:
+    """
+    Bulk-write profiles, follows, shares, reactions, comments and their
+    activities, then reopen the platform so it derives trending scores and
+    feed timelines from them the way it migrates an existing database
+    """
+    platform = SocialPlatform(db_path, challenge_sweep_interval=0)
+    backend = platform.backend
+    _close_platform(platform)
+
+    counts = {'social_users': 0, 'follows': 0, 'shared_swings': 0, 'reactions': 0,
+              'comments': 0, 'activity_feed': 0, 'leaderboard_swing_days': 0}
+    statements = {
+        'follows': 'INSERT OR IGNORE INTO follows (follower_id, following_id, follow_date) VALUES (?, ?, ?)',
+        'social_users': '''INSERT OR IGNORE INTO social_users
+            (user_id, username, display_name, email, bio, location, handicap, privacy_level, join_date,
+             last_active, total_swings, best_score, improvement_score, follower_count, following_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        'shared_swings': '''INSERT OR IGNORE INTO shared_swings
+            (share_id, user_id, analysis_id, title, description, video_url, privacy_level, share_date,
+             view_count, like_count, comment_count, tags)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
+        'reactions': '''INSERT OR IGNORE INTO reactions
+            (reaction_id, user_id, target_type, target_id, reaction_type, reaction_date)
+            VALUES (?, ?, ?, ?, ?, ?)''',
+        'comments': '''INSERT OR IGNORE INTO comments
+            (comment_id, user_id, target_type, target_id, content, comment_date)
+            VALUES (?, ?, ?, ?, ?, ?)''',
+        'activity_feed': '''INSERT OR IGNORE INTO activity_feed
+            (activity_id, user_id, activity_type, target_type, target_id, activity_data,
+             activity_date, visibility)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+        'leaderboard_swing_days': '''INSERT OR IGNORE INTO leaderboard_swing_days
+            (user_id, day, swing_count) VALUES (?, ?, ?)''',
+    }
+    pending = {table: [] for table in statements}
+
+    conn = backend.connect()
+    cursor = conn.cursor()
+
+    def write(table: str, row: Tuple):
+        pending[table].append(row)
+        if len(pending[table]) >= WRITE_BATCH_ROWS:
+            flush(table)
+
+    def flush(table: str):
+        if pending[table]:
+            cursor.executemany(statements[table], pending[table])
+            counts[table] += len(pending[table])
+            pending[table] = []
+            conn.commit()
+
+    try:
+        followers = array('l', [0]) * dataset.users
+        following = array('l', [0]) * dataset.users
+        user_ids = dataset.user_ids
+        follow_date = (dataset.now - timedelta(days=HISTORY_DAYS)).isoformat()
+        for follower, followed in dataset.follows():
+            write('follows', (user_ids[follower], user_ids[followed], follow_date))
+            following[follower] += 1
+            followers[followed] += 1
+
+        privacy_levels, privacy_weights = zip(*PRIVACY_WEIGHTS.items())
+        for index, user_id in enumerate(user_ids):
+            rng = dataset._rng('social', index)
+            analyses = dataset.user_analyses(index)
+            scores = [row[4] for row in analyses]
+            recent = [row[4] for row in analyses[-5:]]
+            best_score = max(scores)
+            recent_average = sum(recent) / len(recent)
+            improvement = round(recent_average - best_score * 0.8, 1) if len(analyses) > 3 else 0
+
+            profile = dataset.user_profile(index)
+            write('social_users', (user_id, f'golfer{index}', f'Golfer {index}', f'golfer{index}@example.com',
+                                   '', '', profile[4], rng.choices(privacy_levels, privacy_weights)[0],
+                                   profile[1], profile[6], len(analyses), best_score, improvement,
+                                   followers[index], following[index]))
+
+            days = {}
+            for row in analyses:
+                days[row[2][:10]] = days.get(row[2][:10], 0) + 1
+            for day, swing_count in days.items():
+                write('leaderboard_swing_days', (user_id, day, swing_count))
+
+            for analysis_id, _, analysis_date, video_path, score, *_ in analyses:
+                if rng.random() >= SHARE_PROBABILITY:
+                    continue
+                share_id = _random_id(rng)
+                share_date = (datetime.fromisoformat(analysis_date) + timedelta(minutes=rng.randint(1, 120)))
+                share_date = min(share_date, dataset.now).isoformat()
+                privacy = rng.choices(privacy_levels, privacy_weights)[0]
+                title = f'Swing scoring {score}'
+
+                reactors = rng.sample(range(dataset.users),
+                                      min(_pareto_count(rng, MEAN_REACTIONS_PER_SHARE, dataset.users), dataset.users))
+                for reactor in reactors:
+                    write('reactions', (_random_id(rng), user_ids[reactor], 'shared_swing', share_id,
+                                        'like', share_date))
+
+                comment_count = _pareto_count(rng, MEAN_COMMENTS_PER_SHARE, 200)
+                for _ in range(comment_count):
+                    commenter = user_ids[rng.randrange(dataset.users)]
+                    comment_id = _random_id(rng)
+                    content = rng.choice(COMMENT_TEMPLATES)
+                    write('comments', (comment_id, commenter, 'shared_swing', share_id, content, share_date))
+                    write('activity_feed', (_random_id(rng), commenter, 'comment', 'shared_swing', share_id,
+                                            json.dumps({'content': content}), share_date, 'public'))
+
+                write('shared_swings', (share_id, user_id, analysis_id, title, '', f'/videos/{video_path}',
+                                        privacy, share_date, len(reactors) * rng.randint(3, 20),
+                                        len(reactors), comment_count, json.dumps(['synthetic'])))
+                write('activity_feed', (_random_id(rng), user_id, 'share_swing', 'shared_swing', share_id,
+                                        json.dumps({'title': title, 'privacy': privacy}), share_date, 'public'))
+
+        for table in statements:
+            flush(table)
+    finally:
+        conn.close()
+
+    # Reopening derives trending_index and feed_timeline from the new rows
+    _close_platform(SocialPlatform(db_path, challenge_sweep_interval=0))
+    return counts
+
+
+def generate(users: int, out_dir: str, seed: int = DEFAULT_SEED) -> Dict:
+    """Write swing_progress.db and social_platform.db for a population into out_dir"""
+    os.makedirs(out_dir, exist_ok=True)
+    started = datetime.now()
+    dataset = SyntheticDataset(users, seed)
+    manifest = {
+        'users': users,
+        'seed': seed,
+        'generated_at': dataset.now.isoformat(),
+        'progress': populate_progress(dataset, os.path.join(out_dir, 'swing_progress.db')),
+        'social': populate_social(dataset, os.path.join(out_dir, 'social_platform.db')),
+    }
+    manifest['elapsed_seconds'] = round((datetime.now() - started).total_seconds(), 1)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w') as manifest_file:
+        json.dump(manifest, manifest_file, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate a synthetic Swing Sage population")
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+    parser.add_argument('--out-dir', default='bench_data')
+    args = parser.parse_args()
+
+    print(json.dumps(generate(args.users, args.out_dir, args.seed), indent=2))
@@ -0,0 +1,173 @@
+# follow_graph.py - Cached follow graph for friendship and overlap queries
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Iterable, List
+
+# Adjacency lists are kept for this many users per direction (LRU), and
+# reloaded after this many seconds so follows made by other processes show up
+FOLLOW_CACHE_USERS = 50000
+FOLLOW_CACHE_TTL_SECONDS = 60
+
+# Interned ids are renumbered once there are more than this many, keeping
+# only those the cached adjacency lists still hold
+FOLLOW_INTERNED_IDS = 2000000
+
+
+class FollowGraph:
+    """
+    In-memory view of the follows table:
+    - User ids are interned to ints; each user's following and followers
+      are compact sorted int arrays, loaded lazily by indexed lookups
+    - Mutual-follow checks are two binary searches over cached arrays
+    - Follower/friend overlaps are sorted-array intersections
+    - Entries are dropped on follow/unfollow and expire on a TTL; the
+      interning tables are rebuilt from the surviving entries when they
+      outgrow max_interned_ids
+    """
+
+    def __init__(self, backend, max_cached_users: int = FOLLOW_CACHE_USERS,
+                 ttl_seconds: float = FOLLOW_CACHE_TTL_SECONDS,
+                 max_interned_ids: int = FOLLOW_INTERNED_IDS):
+        self.backend = backend
+        self.max_cached_users = max_cached_users
+        self.ttl_seconds = ttl_seconds
+        self.max_interned_ids = max_interned_ids
+
+        self._ids = {}
+        self._names: List[str] = []
+        self._following = OrderedDict()
+        self._followers = OrderedDict()
+        self._lock = threading.RLock()
+
+    def are_mutual(self, user1_id: str, user2_id: str) -> bool:
+        """True if the two users follow each other"""
+        if not user1_id or not user2_id or user1_id == user2_id:
+            return False
+        with self._lock:
+            self._compact()
+            first, second = self._intern(user1_id), self._intern(user2_id)
+            return (_contains(self._adjacency(self._following, user1_id), second) and
+                    _contains(self._adjacency(self._following, user2_id), first))
+
+    def follows(self, follower_id: str, following_id: str) -> bool:
+        with self._lock:
+            self._compact()
+            return _contains(self._adjacency(self._following, follower_id),
+                             self._intern(following_id))
+
+    def following(self, user_id: str) -> List[str]:
+        with self._lock:
+            self._compact()
+            return self._names_of(self._adjacency(self._following, user_id))
+
+    def followers(self, user_id: str) -> List[str]:
+        with self._lock:
+            self._compact()
+            return self._names_of(self._adjacency(self._followers, user_id))
+
+    def friends(self, user_id: str) -> List[str]:
+        """Users who follow user_id and are followed back"""
+        with self._lock:
+            self._compact()
+            return self._names_of(_intersect(self._adjacency(self._following, user_id),
+                                             self._adjacency(self._followers, user_id)))
+
+    def friends_who_also(self, user_id: str, candidate_ids: Iterable[str]) -> List[str]:
+        """The user's friends among candidate_ids (e.g. everyone who liked a swing)"""
+        with self._lock:
+            self._compact()
+            candidates = array('l', sorted({self._intern(candidate) for candidate in candidate_ids}))
+            friends = _intersect(self._adjacency(self._following, user_id),
+                                 self._adjacency(self._followers, user_id))
+            return self._names_of(_intersect(friends, candidates))
+
+    def common_followers(self, user1_id: str, user2_id: str) -> List[str]:
+        """Users who follow both"""
+        with self._lock:
+            self._compact()
+            return self._names_of(_intersect(self._adjacency(self._followers, user1_id),
+                                             self._adjacency(self._followers, user2_id)))
+
+    def invalidate(self, follower_id: str, following_id: str):
+        """Drop the two adjacency lists a follow/unfollow changes"""
+        with self._lock:
+            self._following.pop(follower_id, None)
+            self._followers.pop(following_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._following.clear()
+            self._followers.clear()
+            self._ids, self._names = {}, []
+
+    def _compact(self):
+        """
+        Renumber the ids the cached lists still use once evictions have left
+        too many unused ones behind; if the cache alone holds over half the
+        limit, start over empty. Called before a query interns anything, so
+        no caller holds old numbers.
+        """
+        if len(self._names) <= self.max_interned_ids:
+            return
+        old_names = self._names
+        self._ids, self._names = {}, []
+        now = time.time()
+        for cache in (self._following, self._followers):
+            for user_id, (loaded_at, numbers) in list(cache.items()):
+                if now - loaded_at > self.ttl_seconds:
+                    del cache[user_id]  # Expired: would be reloaded anyway
+                    continue
+                cache[user_id] = (loaded_at, array('l', sorted(
+                    self._intern(old_names[number]) for number in numbers)))
+        if len(self._names) > self.max_interned_ids // 2:
+            self.clear()
+
+    def _intern(self, user_id: str) -> int:
+        number = self._ids.get(user_id)
+        if number is None:
+            number = len(self._names)
+            self._ids[user_id] = number
+            self._names.append(user_id)
+        return number
+
+    def _names_of(self, numbers: array) -> List[str]:
+        return [self._names[number] for number in numbers]
+
+    def _adjacency(self, cache: OrderedDict, user_id: str) -> array:
+        entry = cache.get(user_id)
+        if entry is not None and time.time() - entry[0] <= self.ttl_seconds:
+            cache.move_to_end(user_id)
+            return entry[1]
+
+        if cache is self._following:
+            sql = 'SELECT following_id FROM follows WHERE follower_id = ?'
+        else:
+            sql = 'SELECT follower_id FROM follows WHERE following_id = ?'
+
+        conn = self.backend.connect()
+        try:
+            rows = conn.execute(sql, (user_id,)).fetchall()
+        finally:
+            conn.close()
+
+        numbers = array('l', sorted(self._intern(row[0]) for row in rows))
+        cache[user_id] = (time.time(), numbers)
+        cache.move_to_end(user_id)
+        while len(cache) > self.max_cached_users:
+            cache.popitem(last=False)
+        return numbers
+
+
+def _contains(numbers: array, number: int) -> bool:
+    position = bisect_left(numbers, number)
+    return position < len(numbers) and numbers[position] == number
+
+
+def _intersect(first: array, second: array) -> array:
+    """Intersection of two sorted arrays (probing the larger one)"""
+    if len(first) > len(second):
+        first, second = second, first
+    return array('l', (number for number in first if _contains(second, number)))
@@ -0,0 +1,18 @@
+# gunicorn.conf.py - Read by gunicorn from the working directory at startup
+import sys
+
+import analyzer_loader
+
+# The master imports the app once (--preload) and forks the workers; it
+# never analyzes, so it must not load cv2/mediapipe or run a warm-up thread
+# that fork could catch mid-import. Each worker warms its own analyzer once
+# its app is loaded.
+analyzer_loader.defer_warm_ups()
+
+
+def post_worker_init(worker):
+    analyzer_loader.start_pending_warm_ups()
+    # Background jobs run in workers only, so the master never touches the database
+    app_module = sys.modules.get('app_advanced')
+    if app_module:
+        app_module.start_retention()
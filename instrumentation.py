@@ -0,0 +1,535 @@
+# instrumentation.py - Per-stage timers and counters for the analysis hot path
+import atexit
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence
+
+# Serializes folding exited workers' snapshots; without fcntl (Windows)
+# their snapshots are kept and merged as they are
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ANALYSIS_INSTRUMENTATION=0 swaps every recorder for a shared no-op
+INSTRUMENTATION_ENABLED = os.environ.get('ANALYSIS_INSTRUMENTATION', '1') != '0'
+
+# Histogram upper bounds in seconds. Stages are timed per call (mostly per
+# frame), so the buckets are fine-grained below a frame's budget.
+STAGE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# Whole videos and requests (seconds), analysis speed (frames/s), single
+# database calls and SQLite write-lock waits (seconds), uploads (bytes)
+ANALYSIS_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+FPS_BUCKETS = (1, 2.5, 5, 10, 15, 20, 30, 45, 60, 120)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+DB_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1, 5)
+UPLOAD_BUCKETS = (1e6, 5e6, 10e6, 25e6, 50e6, 100e6, 250e6, 500e6)
+
+METRIC_PREFIX = 'swing_sage'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Set under gunicorn (one directory shared by all workers, emptied on deploy)
+# so /metrics reports every worker rather than whichever one answered.
+# Each process rewrites its snapshot there at most this often (seconds).
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+SNAPSHOT_INTERVAL = 5.0
+# Counters and histograms of exited processes, folded into one file
+EXITED_SNAPSHOT = 'exited_workers.json'
+
+# Everything /metrics exports: name (after METRIC_PREFIX) -> (type, help)
+METRICS = {
+    'analysis_stage_seconds': ('histogram', 'Time per call of each video analysis stage'),
+    'analysis_seconds': ('histogram', 'Wall time to analyze one video'),
+    'analysis_frames_per_second': ('histogram', 'Frames analyzed per second of wall time, per video'),
+    'analysis_events_total': ('counter', 'Frames and other events counted during analysis'),
+    'analyzed_videos_total': ('counter', 'Videos run through an instrumented analyzer'),
+    'analyses_in_progress': ('gauge', 'Videos being analyzed right now'),
+    'http_request_seconds': ('histogram', 'Time to serve each HTTP request'),
+    'upload_bytes': ('histogram', 'Size of each uploaded video'),
+    'db_query_seconds': ('histogram', 'Time per call of each tracker and social platform method'),
+    'db_lock_wait_seconds': ('histogram', 'Time spent waiting for the SQLite write lock (BEGIN IMMEDIATE)'),
+    'db_lock_timeouts_total': ('counter', 'Write transactions that gave up waiting for the SQLite lock'),
+    'cache_requests_total': ('counter', 'Cache lookups by cache and result (hit, miss or error)'),
+}
+
+
+class Histogram:
+    """Bucketed observations in Prometheus' shape (each value lands in the first bucket >= it)"""
+
+    __slots__ = ('buckets', 'counts', 'count', 'sum', 'max')
+
+    def __init__(self, buckets: Sequence[float] = STAGE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: 'Histogram'):
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-th observation"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(self.buckets[index], self.max) if index < len(self.buckets) else self.max
+        return self.max
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'total_ms': round(self.sum * 1000, 3),
+            'mean_ms': round(self.sum * 1000 / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.quantile(0.5) * 1000, 3),
+            'p95_ms': round(self.quantile(0.95) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class _StageTimer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageRecorder:
+    """
+    Timers and counters for one video. Stages are used as
+    `with timings.time('inference'): ...` and each call is one observation
+    in that stage's histogram. Different threads may time different stages.
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.started = perf_counter()
+
+    def time(self, stage: str) -> _StageTimer:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        return _StageTimer(histogram)
+
+    def count(self, name: str, value: int = 1):
+        self.counters[name] += value
+
+    def summary(self) -> Dict:
+        return {
+            'wall_ms': round((perf_counter() - self.started) * 1000, 3),
+            'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()},
+            'counters': dict(self.counters),
+        }
+
+
+class NullRecorder:
+    """Stand-in when instrumentation is disabled: every call is a no-op"""
+
+    def time(self, stage: str) -> _NullTimer:
+        return _NULL_TIMER
+
+    def count(self, name: str, value: int = 1):
+        pass
+
+    def summary(self) -> Optional[Dict]:
+        return None
+
+
+NULL_RECORDER = NullRecorder()
+
+
+def stage_recorder():
+    """A recorder for one video, or the shared no-op when disabled"""
+    return StageRecorder() if INSTRUMENTATION_ENABLED else NULL_RECORDER
+
+
+def _label_value(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound))
+
+
+def _format_labels(labels: tuple, extra: str = '') -> str:
+    parts = [f'{key}="{_label_value(value)}"' for key, value in labels]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+_INF_LABEL = 'le="+Inf"'
+
+
+def _labels_key(name: str, labels) -> tuple:
+    return name, tuple(tuple(pair) for pair in labels)
+
+
+class _SeriesTotals:
+    """Sums of the series of several snapshots"""
+
+    def __init__(self):
+        self.histograms: Dict[tuple, Histogram] = {}
+        self.counters: Dict[tuple, float] = defaultdict(float)
+        self.gauges: Dict[tuple, float] = defaultdict(float)
+
+    def add(self, snapshot: Dict):
+        for name, labels, buckets, counts, total, maximum in snapshot['histograms']:
+            key = _labels_key(name, labels)
+            histogram = Histogram(buckets)
+            histogram.counts, histogram.count, histogram.sum, histogram.max = \
+                list(counts), sum(counts), total, maximum
+            if key in self.histograms:
+                self.histograms[key].merge(histogram)
+            else:
+                self.histograms[key] = histogram
+        for name, labels, value in snapshot['counters']:
+            self.counters[_labels_key(name, labels)] += value
+        for name, labels, value in snapshot['gauges']:
+            self.gauges[_labels_key(name, labels)] += value
+
+    def as_snapshot(self) -> Dict:
+        return {
+            'histograms': [[name, labels, h.buckets, h.counts, h.sum, h.max]
+                           for (name, labels), h in self.histograms.items()],
+            'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+            'gauges': [[name, labels, value] for (name, labels), value in self.gauges.items()],
+        }
+
+
+def _snapshot_pid(file_name: str) -> Optional[int]:
+    """The pid of metrics_<pid>.json, or of a temporary file written on the way to it"""
+    if not file_name.startswith('metrics_'):
+        return None
+    pid = file_name[len('metrics_'):].split('.', 1)[0]
+    return int(pid) if pid.isdigit() and file_name.endswith(('.json', '.tmp')) else None
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """
+    Process-wide histograms, counters and gauges, rendered for Prometheus.
+    Series are named after METRICS and labelled with keyword arguments.
+
+    With a metrics_dir every process also keeps a snapshot of its series
+    in metrics_<pid>.json there, and rendering merges the snapshots of all
+    processes, so a scrape served by any gunicorn worker covers the whole
+    server. Counters and histograms of exited workers keep counting:
+    they are folded into a single exited_workers.json (so recycled workers
+    don't leave a file each) and their gauges are dropped.
+    """
+
+    def __init__(self, metrics_dir: Optional[str] = None):
+        self.metrics_dir = metrics_dir
+        if metrics_dir:
+            os.makedirs(metrics_dir, exist_ok=True)
+            self._fold_exited_snapshots()
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.histograms: Dict[tuple, Histogram] = {}  # (name, labels)
+        self.counters: Dict[tuple, float] = defaultdict(float)
+        self.gauges: Dict[tuple, float] = defaultdict(float)
+        self._dirty = False
+        self._writer = None
+
+    def _after_fork(self):
+        # The parent's series stay in the parent's snapshot; counting them
+        # again in every child would multiply them by the worker count
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _changed(self):
+        self._dirty = True
+        if self.metrics_dir and self._writer is None:
+            self._writer = threading.Thread(target=self._write_snapshots, daemon=True,
+                                            name='metrics-snapshot')
+            self._writer.start()
+
+    def observe(self, name: str, value: float, buckets: Sequence[float] = STAGE_BUCKETS, **labels):
+        key = (name, tuple(labels.items()))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+            self._changed()
+
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self.counters[(name, tuple(labels.items()))] += value
+            self._changed()
+
+    def add_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self.gauges[(name, tuple(labels.items()))] += value
+            self._changed()
+
+    @contextmanager
+    def in_progress(self, name: str, **labels):
+        """Gauge of how many callers are inside the block right now"""
+        self.add_gauge(name, 1, **labels)
+        try:
+            yield
+        finally:
+            self.add_gauge(name, -1, **labels)
+
+    def record_video(self, analyzer: str, recorder):
+        if not isinstance(recorder, StageRecorder):
+            return
+        wall_seconds = perf_counter() - recorder.started
+        frames = recorder.counters.get('frames', 0)
+        with self._lock:
+            self.counters[('analyzed_videos_total', (('analyzer', analyzer),))] += 1
+            for stage, histogram in recorder.histograms.items():
+                key = ('analysis_stage_seconds', (('analyzer', analyzer), ('stage', stage)))
+                total = self.histograms.get(key)
+                if total is None:
+                    total = self.histograms[key] = Histogram(histogram.buckets)
+                total.merge(histogram)
+            for event, value in recorder.counters.items():
+                self.counters[('analysis_events_total', (('analyzer', analyzer), ('event', event)))] += value
+            self._changed()
+        self.observe('analysis_seconds', wall_seconds, ANALYSIS_BUCKETS, analyzer=analyzer)
+        if frames and wall_seconds > 0:
+            self.observe('analysis_frames_per_second', frames / wall_seconds, FPS_BUCKETS, analyzer=analyzer)
+
+    def snapshot(self) -> Dict:
+        """This process's series in a JSON-friendly shape"""
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'histograms': [[name, labels, h.buckets, h.counts, h.sum, h.max]
+                               for (name, labels), h in self.histograms.items()],
+                'counters': [[name, labels, value] for (name, labels), value in self.counters.items()],
+                'gauges': [[name, labels, value] for (name, labels), value in self.gauges.items()],
+            }
+
+    def write_snapshot(self):
+        """Atomically replace this process's snapshot file"""
+        path = os.path.join(self.metrics_dir, f"metrics_{os.getpid()}.json")
+        # Per thread: the writer thread and an explicit or atexit write may overlap
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        self._dirty = False
+        with open(temp_path, 'w') as snapshot_file:
+            json.dump(self.snapshot(), snapshot_file)
+        os.replace(temp_path, path)
+
+    def _write_snapshots(self):
+        atexit.register(self.write_snapshot)
+        while True:
+            if self._dirty:
+                try:
+                    self.write_snapshot()
+                except OSError as e:
+                    print(f"Warning: could not write metrics snapshot: {e}")
+            # Looked up on the module at call time so gevent's monkey-patching
+            # applies even though this module was imported before it (--preload)
+            time.sleep(SNAPSHOT_INTERVAL)
+
+    def _read_snapshot(self, file_name: str) -> Optional[Dict]:
+        try:
+            with open(os.path.join(self.metrics_dir, file_name)) as snapshot_file:
+                return json.load(snapshot_file)
+        except (OSError, ValueError):
+            return None  # gone, or being replaced right now
+
+    def _snapshot_files(self) -> List[str]:
+        """Snapshot files of other processes, as metrics_<pid>.json"""
+        own_file = f"metrics_{os.getpid()}.json"
+        return [file_name for file_name in os.listdir(self.metrics_dir)
+                if _snapshot_pid(file_name) is not None and file_name.endswith('.json')
+                and file_name != own_file]
+
+    def _fold_exited_snapshots(self):
+        """Add the counters and histograms of exited processes to EXITED_SNAPSHOT and delete theirs"""
+        if not fcntl:
+            return
+        exited = [file_name for file_name in os.listdir(self.metrics_dir)
+                  if _snapshot_pid(file_name) is not None and not _pid_alive(_snapshot_pid(file_name))]
+        if not exited:
+            return
+
+        with open(os.path.join(self.metrics_dir, 'exited_workers.lock'), 'a') as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            totals = _SeriesTotals()
+            totals.add(self._read_snapshot(EXITED_SNAPSHOT) or _SeriesTotals().as_snapshot())
+            folded = []
+            for file_name in exited:
+                # Writes cut short at exit leave a temporary file, which is just deleted
+                snapshot = self._read_snapshot(file_name) if file_name.endswith('.json') else None
+                if snapshot is not None:
+                    snapshot['gauges'] = []
+                    totals.add(snapshot)
+                folded.append(file_name)
+
+            if any(file_name.endswith('.json') for file_name in folded):
+                path = os.path.join(self.metrics_dir, EXITED_SNAPSHOT)
+                with open(path + '.tmp', 'w') as snapshot_file:
+                    json.dump(totals.as_snapshot(), snapshot_file)
+                os.replace(path + '.tmp', path)
+            for file_name in folded:
+                try:
+                    os.remove(os.path.join(self.metrics_dir, file_name))
+                except FileNotFoundError:
+                    pass  # folded by another process meanwhile
+
+    def _merged_snapshots(self) -> List[Dict]:
+        snapshots = [self.snapshot()]
+        if not self.metrics_dir:
+            return snapshots
+        self._fold_exited_snapshots()
+        for file_name in [EXITED_SNAPSHOT] + self._snapshot_files():
+            snapshot = self._read_snapshot(file_name)
+            if snapshot is None:
+                continue  # the next scrape reads it
+            if 'pid' in snapshot and not _pid_alive(snapshot['pid']):
+                snapshot['gauges'] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (version 0.0.4), across processes when configured"""
+        totals = _SeriesTotals()
+        for snapshot in self._merged_snapshots():
+            totals.add(snapshot)
+        histograms, counters, gauges = totals.histograms, totals.counters, totals.gauges
+
+        lines = []
+        for metric, (metric_type, help_text) in METRICS.items():
+            name = f"{METRIC_PREFIX}_{metric}"
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+            if metric_type == 'histogram':
+                for (_, labels), histogram in sorted(item for item in histograms.items()
+                                                     if item[0][0] == metric):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        le = f'le="{_format_bound(bound)}"'
+                        lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+                    lines.append(f'{name}_bucket{_format_labels(labels, _INF_LABEL)} {histogram.count}')
+                    lines.append(f'{name}_sum{_format_labels(labels)} {histogram.sum}')
+                    lines.append(f'{name}_count{_format_labels(labels)} {histogram.count}')
+            else:
+                series = counters if metric_type == 'counter' else gauges
+                for (_, labels), value in sorted(item for item in series.items() if item[0][0] == metric):
+                    lines.append(f'{name}{_format_labels(labels)} {value:g}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry(METRICS_DIR)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=lambda: REGISTRY._after_fork())
+
+
+def finish_video(analyzer: str, timings, result: Dict) -> Dict:
+    """Fold a video's timings into REGISTRY and attach their summary to result"""
+    REGISTRY.record_video(analyzer, timings)
+    summary = timings.summary()
+    if summary is not None:
+        result['instrumentation'] = summary
+    return result
+
+
+def timed_methods(store: str):
+    """
+    Class decorator timing every public method into db_query_seconds,
+    labelled with store and method. Generators are left alone, since
+    calling one doesn't run its queries.
+    """
+    def decorate(cls):
+        for method_name, method in list(vars(cls).items()):
+            if (method_name.startswith('_') or not inspect.isfunction(method)
+                    or inspect.isgeneratorfunction(method)):
+                continue
+            setattr(cls, method_name, _timed(method, store))
+        return cls
+    return decorate
+
+
+def _timed(method: Callable, store: str) -> Callable:
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        started = perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            REGISTRY.observe('db_query_seconds', perf_counter() - started, DB_BUCKETS,
+                             store=store, method=method.__name__)
+    return timed
+
+
+def install_request_metrics(app):
+    """Time every request to a Flask app into http_request_seconds"""
+    from flask import g, request
+
+    @app.before_request
+    def _start_request_timer():
+        g.metrics_started = perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        started = g.pop('metrics_started', None)
+        if started is not None:
+            # The route pattern, not the path, so ids don't become label values
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            REGISTRY.observe('http_request_seconds', perf_counter() - started, REQUEST_BUCKETS,
+                             method=request.method, endpoint=endpoint, status=str(response.status_code))
+        return response
+
+    return app
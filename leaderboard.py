@@ -0,0 +1,284 @@
+# leaderboard.py - Maintained rank structures for community leaderboards
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+from itertools import accumulate
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Boards kept in memory; improvement is only ranked for players with
+# enough swings for the number to mean something
+LEADERBOARD_TYPES = ('overall', 'improvement', 'activity')
+IMPROVEMENT_MIN_SWINGS = 5
+
+# Period boards count points/swings earned inside the window
+LEADERBOARD_PERIODS = {
+    'all_time': None,
+    'monthly': timedelta(days=30),
+    'weekly': timedelta(days=7),
+}
+
+# Boards are reloaded from the database this often (seconds), which picks
+# up writes from other processes and lets old entries leave period boards
+LEADERBOARD_REFRESH_SECONDS = 300
+
+VISIBLE_PRIVACY_LEVELS = "('public', 'friends')"
+
+
+class SortedRankList:
+    """
+    Sorted sequence stored as a list of bounded blocks.
+    Inserts and removals touch one block (O(sqrt n) worst case), lookups
+    are two binary searches, and positional rank uses cached block offsets.
+    """
+
+    def __init__(self, items: Iterable = (), block_size: int = 1000):
+        self.block_size = block_size
+        ordered = sorted(items)
+        self._blocks = [ordered[i:i + block_size] for i in range(0, len(ordered), block_size)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._offsets = None
+        self._len = len(ordered)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def add(self, item):
+        """Insert item, keeping the sequence sorted"""
+        self._offsets = None
+        self._len += 1
+
+        if not self._blocks:
+            self._blocks.append([item])
+            self._maxes.append(item)
+            return
+
+        index = bisect_left(self._maxes, item)
+        if index == len(self._maxes):
+            index -= 1
+        block = self._blocks[index]
+        insort(block, item)
+        self._maxes[index] = block[-1]
+
+        if len(block) > 2 * self.block_size:
+            half = len(block) // 2
+            self._blocks[index:index + 1] = [block[:half], block[half:]]
+            self._maxes[index:index + 1] = [block[half - 1], block[-1]]
+
+    def remove(self, item):
+        """Remove item; raises ValueError if it is not present"""
+        index, position = self._find(item)
+        block = self._blocks[index]
+        del block[position]
+        if block:
+            self._maxes[index] = block[-1]
+        else:
+            del self._blocks[index]
+            del self._maxes[index]
+        self._offsets = None
+        self._len -= 1
+
+    def index(self, item) -> int:
+        """Zero-based position of item; raises ValueError if absent"""
+        index, position = self._find(item)
+        return self._block_offsets()[index] + position
+
+    def bisect_right(self, item) -> int:
+        """Position just after any entries <= item"""
+        index = bisect_right(self._maxes, item)
+        if index == len(self._maxes):
+            return self._len
+        return self._block_offsets()[index] + bisect_right(self._blocks[index], item)
+
+    def slice(self, start: int, stop: int) -> List:
+        """Items at positions [start, stop)"""
+        start, stop = max(start, 0), min(stop, self._len)
+        if start >= stop:
+            return []
+
+        offsets = self._block_offsets()
+        index = bisect_right(offsets, start) - 1
+        position = start - offsets[index]
+        items = []
+        while len(items) < stop - start:
+            items.extend(self._blocks[index][position:position + stop - start - len(items)])
+            index += 1
+            position = 0
+        return items
+
+    def _find(self, item) -> Tuple[int, int]:
+        index = bisect_left(self._maxes, item)
+        if index < len(self._maxes):
+            block = self._blocks[index]
+            position = bisect_left(block, item)
+            if position < len(block) and block[position] == item:
+                return index, position
+        raise ValueError(f"{item!r} not in list")
+
+    def _block_offsets(self) -> List[int]:
+        if self._offsets is None:
+            self._offsets = [0] + list(accumulate(len(block) for block in self._blocks))
+        return self._offsets
+
+
+class RankedScores:
+    """Scores keyed by user id plus their rank order (highest first)"""
+
+    def __init__(self, scores: Dict[str, float]):
+        self.scores = scores
+        # Highest score first; user id breaks ties so ranks are stable
+        self.ranks = SortedRankList((-score, user_id) for user_id, score in scores.items())
+        self.loaded_at = time.time()
+
+    def set(self, user_id: str, score: float):
+        self.discard(user_id)
+        self.scores[user_id] = score
+        self.ranks.add((-score, user_id))
+
+    def discard(self, user_id: str):
+        old_score = self.scores.pop(user_id, None)
+        if old_score is not None:
+            self.ranks.remove((-old_score, user_id))
+
+
+class LeaderboardEngine:
+    """
+    In-memory leaderboards per board type and time period:
+    - Loaded lazily from the database and refreshed on a TTL
+    - Updated incrementally as points, swings and stats change
+    - Top-N pages, a user's rank and the players around them without
+      sorting the users table
+    """
+
+    def __init__(self, backend, refresh_seconds: float = LEADERBOARD_REFRESH_SECONDS):
+        self.backend = backend
+        self.refresh_seconds = refresh_seconds
+        self._boards: Dict[Tuple[str, str], RankedScores] = {}
+        self._lock = threading.RLock()
+
+    def top(self, board_type: str, period: str = 'all_time', limit: int = 50,
+            offset: int = 0) -> List[Tuple[int, str, float]]:
+        """(rank, user_id, score) for a page of the board"""
+        with self._lock:
+            board = self._board(board_type, period)
+            entries = board.ranks.slice(offset, offset + limit)
+        return [(offset + i + 1, user_id, -negative_score)
+                for i, (negative_score, user_id) in enumerate(entries)]
+
+    def page(self, board_type: str, period: str = 'all_time', limit: int = 50,
+             after: Optional[Tuple[float, str]] = None) -> List[Tuple[int, str, float]]:
+        """(rank, user_id, score) entries following the (score, user_id) after"""
+        with self._lock:
+            board = self._board(board_type, period)
+            offset = board.ranks.bisect_right((-after[0], after[1])) if after else 0
+            entries = board.ranks.slice(offset, offset + limit)
+        return [(offset + i + 1, user_id, -negative_score)
+                for i, (negative_score, user_id) in enumerate(entries)]
+
+    def rank(self, board_type: str, period: str, user_id: str) -> Optional[Tuple[int, float]]:
+        """(rank, score) for user, or None if they are not on the board"""
+        with self._lock:
+            board = self._board(board_type, period)
+            score = board.scores.get(user_id)
+            if score is None:
+                return None
+            return board.ranks.index((-score, user_id)) + 1, score
+
+    def neighbors(self, board_type: str, period: str, user_id: str,
+                  radius: int = 5) -> List[Tuple[int, str, float]]:
+        """The user's entry plus up to radius entries either side"""
+        position = self.rank(board_type, period, user_id)
+        if position is None:
+            return []
+        start = max(position[0] - 1 - radius, 0)
+        return self.top(board_type, period, limit=position[0] + radius - start, offset=start)
+
+    def size(self, board_type: str, period: str = 'all_time') -> int:
+        with self._lock:
+            return len(self._board(board_type, period).ranks)
+
+    def adjust(self, board_type: str, user_id: str, delta: float):
+        """Add delta to the user's score in every loaded period of an additive board"""
+        with self._lock:
+            for (loaded_type, _), board in self._boards.items():
+                if loaded_type == board_type and user_id in board.scores:
+                    board.set(user_id, board.scores[user_id] + delta)
+
+    def set_score(self, board_type: str, user_id: str, score: float, eligible: bool = True):
+        """Replace the user's score in a non-additive board (or drop them from it)"""
+        with self._lock:
+            for (loaded_type, _), board in self._boards.items():
+                if loaded_type != board_type:
+                    continue
+                if eligible:
+                    board.set(user_id, score)
+                else:
+                    board.discard(user_id)
+
+    def register_user(self, user_id: str, visible: bool):
+        """Add a new player at zero (or remove a hidden one) in loaded boards"""
+        with self._lock:
+            for (loaded_type, _), board in self._boards.items():
+                if not visible:
+                    board.discard(user_id)
+                elif loaded_type != 'improvement' and user_id not in board.scores:
+                    board.set(user_id, 0)
+
+    def invalidate(self):
+        """Forget every board; they reload on next use"""
+        with self._lock:
+            self._boards.clear()
+
+    def _board(self, board_type: str, period: str) -> RankedScores:
+        if board_type not in LEADERBOARD_TYPES:
+            raise ValueError(f"Unknown leaderboard: {board_type}")
+        if period not in LEADERBOARD_PERIODS:
+            period = 'all_time'
+
+        key = (board_type, period)
+        board = self._boards.get(key)
+        if board is None or time.time() - board.loaded_at > self.refresh_seconds:
+            board = RankedScores(self._load_scores(board_type, period))
+            self._boards[key] = board
+        return board
+
+    def _load_scores(self, board_type: str, period: str) -> Dict[str, float]:
+        window = LEADERBOARD_PERIODS[period]
+        cutoff = (datetime.now() - window).isoformat() if window else None
+
+        conn = self.backend.connect()
+        cursor = conn.cursor()
+
+        if board_type == 'improvement':
+            cursor.execute(f'''
+                SELECT user_id, improvement_score FROM social_users
+                WHERE privacy_level IN {VISIBLE_PRIVACY_LEVELS} AND total_swings >= ?
+            ''', (IMPROVEMENT_MIN_SWINGS,))
+        elif cutoff is None:
+            column = 'achievement_points' if board_type == 'overall' else 'total_swings'
+            cursor.execute(f'''
+                SELECT user_id, {column} FROM social_users
+                WHERE privacy_level IN {VISIBLE_PRIVACY_LEVELS}
+            ''')
+        elif board_type == 'overall':
+            cursor.execute(f'''
+                SELECT su.user_id, COALESCE(SUM(a.points), 0)
+                FROM social_users su
+                LEFT JOIN achievements a
+                    ON a.user_id = su.user_id AND a.achievement_date >= ?
+                WHERE su.privacy_level IN {VISIBLE_PRIVACY_LEVELS}
+                GROUP BY su.user_id
+            ''', (cutoff,))
+        else:
+            cursor.execute(f'''
+                SELECT su.user_id, COALESCE(SUM(d.swing_count), 0)
+                FROM social_users su
+                LEFT JOIN leaderboard_swing_days d
+                    ON d.user_id = su.user_id AND d.day >= ?
+                WHERE su.privacy_level IN {VISIBLE_PRIVACY_LEVELS}
+                GROUP BY su.user_id
+            ''', (cutoff[:10],))
+
+        scores = {user_id: score or 0 for user_id, score in cursor.fetchall()}
+        conn.close()
+        return scores
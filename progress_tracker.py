@@ -1,26 +1,71 @@
 # progress_tracker.py - Drop this file in your root directory
 import json
-import sqlite3
 import os
+import re
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, IO, Iterable, List, Optional, Tuple
 import uuid
 import numpy as np
 from pathlib import Path
+from storage import create_backend
+from cache import Cache
+from instrumentation import timed_methods
 
+# Milestone rules are plain data: a milestone is granted (once per user) the
+# first time the named analysis metric reaches the threshold.
+MILESTONE_RULES = [
+    {'type': 'first_good_swing', 'metric': 'overall_score', 'threshold': 70,
+     'description': 'First swing with 70+ overall score!'},
+    {'type': 'great_swing', 'metric': 'overall_score', 'threshold': 80,
+     'description': 'Excellent swing with 80+ score!'},
+    {'type': 'outstanding_swing', 'metric': 'overall_score', 'threshold': 90,
+     'description': 'Outstanding swing technique!'},
+]
+
+# Tables (and column order) carried by bulk export/import, parents first
+BULK_TABLES = [
+    ('users', ['user_id', 'created_date', 'golfer_type', 'experience_level',
+               'handicap', 'goals', 'last_active']),
+    ('swing_analyses', ['analysis_id', 'user_id', 'analysis_date', 'video_path',
+                        'overall_score', 'fault_percentages', 'primary_issues',
+                        'coaching_tip', 'session_notes']),
+    ('milestones', ['milestone_id', 'user_id', 'milestone_type', 'milestone_date',
+                    'description', 'achievement_data']),
+    ('analysis_daily_rollups', ['user_id', 'day', 'swing_count', 'score_sum', 'best_score']),
+]
+
+# Stats and progress reads are cached this long (seconds); saving an
+# analysis invalidates the user's entries straight away
+STATS_CACHE_TTL = 300
+
+# Analyses older than this move out of swing_analyses into monthly partitions
+DEFAULT_RETENTION_DAYS = 365
+
+ANALYSIS_COLUMNS = ('analysis_id, user_id, analysis_date, video_path, overall_score, '
+                    'fault_percentages, primary_issues, coaching_tip, session_notes')
+
+@timed_methods('progress')
 class ProgressTracker:
     """
     Tracks user progress over time, compares swings, identifies trends.
     Creates a personalized improvement journey for each golfer.
     """
     
-    def __init__(self, db_path: str = "swing_progress.db"):
+    def __init__(self, db_path: str = "swing_progress.db",
+                 milestone_rules: Optional[List[Dict]] = None, backend=None,
+                 cache: Optional[Cache] = None):
+        # db_path may also be a postgresql:// URL (e.g. DATABASE_URL)
         self.db_path = db_path
+        self.backend = backend or create_backend(db_path)
+        # Pass cache.create_cache() to share entries across processes
+        self.cache = cache or Cache()
+        self.milestone_rules = milestone_rules if milestone_rules is not None else MILESTONE_RULES
         self._init_database()
     
     def _init_database(self):
-        """Initialize SQLite database for progress tracking"""
-        conn = sqlite3.connect(self.db_path)
+        """Initialize progress tracking tables"""
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
         # Users table
@@ -79,13 +124,67 @@ class ProgressTracker:
             )
         ''')
         
+        # Per-user lookups and the archival sweep both scan by date
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analyses_user_date
+            ON swing_analyses (user_id, analysis_date)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_analyses_date
+            ON swing_analyses (analysis_date)
+        ''')
+        
+        # Catalog of monthly archive partitions (swing_analyses_YYYY_MM)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_partitions (
+                partition_name TEXT PRIMARY KEY,
+                month TEXT,
+                row_count INTEGER DEFAULT 0
+            )
+        ''')
+        
+        # Daily rollups of archived analyses keep lifetime stats intact
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS analysis_daily_rollups (
+                user_id TEXT,
+                day TEXT,
+                swing_count INTEGER DEFAULT 0,
+                score_sum REAL DEFAULT 0,
+                best_score REAL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            )
+        ''')
+        
         conn.commit()
+        self._ensure_milestone_unique_index(conn)
         conn.close()
     
+    def _ensure_milestone_unique_index(self, conn):
+        """Enforce one milestone per (user, type), dropping legacy duplicates first"""
+        create_index = '''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_milestones_user_type
+            ON milestones (user_id, milestone_type)
+        '''
+        cursor = conn.cursor()
+        try:
+            cursor.execute(create_index)
+            conn.commit()
+        except self.backend.IntegrityError:
+            # Databases created before the index may hold double-granted rows
+            conn.rollback()
+            cursor.execute('''
+                DELETE FROM milestones WHERE milestone_id NOT IN (
+                    SELECT MIN(milestone_id) FROM milestones
+                    GROUP BY user_id, milestone_type
+                )
+            ''')
+            cursor.execute(create_index)
+            conn.commit()
+    
     def create_or_get_user(self, session_id: str, golfer_type: str = "weekend_player", 
                           experience: str = "intermediate") -> str:
         """Create new user or return existing user ID"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
         # Check if user exists (using session_id as temporary user_id for demo)
@@ -111,50 +210,71 @@ class ProgressTracker:
         return session_id
     
     def save_swing_analysis(self, user_id: str, analysis_result: Dict, 
-                           coaching_tip: str, video_path: str) -> str:
-        """Save swing analysis results for progress tracking"""
-        analysis_id = str(uuid.uuid4())
+                           coaching_tip: str, video_path: str,
+                           analysis_id: Optional[str] = None) -> str:
+        """
+        Save swing analysis results for progress tracking. Callers that
+        coach before saving pass the analysis_id they seeded coaching with.
+        """
+        analysis_id = analysis_id or str(uuid.uuid4())
+        analysis_date = datetime.now().isoformat()
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO swing_analyses 
-            (analysis_id, user_id, analysis_date, video_path, overall_score, 
-             fault_percentages, primary_issues, coaching_tip)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            analysis_id,
-            user_id,
-            datetime.now().isoformat(),
-            video_path,
-            analysis_result.get('overall_score', 0),
-            json.dumps(analysis_result.get('fault_percentages', {})),
-            json.dumps(analysis_result.get('primary_issues', [])),
-            coaching_tip
-        ))
-        
-        conn.commit()
-        conn.close()
-        
-        # Check for milestones
-        self._check_and_create_milestones(user_id, analysis_result)
+        try:
+            cursor.execute('''
+                INSERT INTO swing_analyses 
+                (analysis_id, user_id, analysis_date, video_path, overall_score, 
+                 fault_percentages, primary_issues, coaching_tip)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (
+                analysis_id,
+                user_id,
+                analysis_date,
+                video_path,
+                analysis_result.get('overall_score', 0),
+                json.dumps(analysis_result.get('fault_percentages', {})),
+                json.dumps(analysis_result.get('primary_issues', [])),
+                coaching_tip
+            ))
+            
+            # Milestones commit atomically with the analysis that earned them
+            self._check_and_create_milestones(cursor, user_id, analysis_result, analysis_date)
+            
+            conn.commit()
+        finally:
+            conn.close()
         
+        self._invalidate_user(user_id)
         return analysis_id
     
+    def _invalidate_user(self, user_id: str):
+        """Drop a user's cached stats and progress after their analyses change"""
+        self.cache.invalidate('stats', user_id)
+        self.cache.invalidate_namespace(f'progress:{user_id}')
+    
     def get_user_progress(self, user_id: str, days: int = 30) -> Dict:
         """Get comprehensive user progress data"""
-        conn = sqlite3.connect(self.db_path)
+        return self.cache.get_or_load(f'progress:{user_id}', str(days),
+                                      lambda: self._load_user_progress(user_id, days),
+                                      STATS_CACHE_TTL)
+    
+    def _load_user_progress(self, user_id: str, days: int) -> Dict:
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
-        # Get recent analyses
+        # Get recent analyses (archive partitions are only read if the window reaches them)
         cutoff_date = (datetime.now() - timedelta(days=days)).isoformat()
-        cursor.execute('''
-            SELECT analysis_date, overall_score, fault_percentages, primary_issues, coaching_tip
-            FROM swing_analyses 
-            WHERE user_id = ? AND analysis_date > ?
-            ORDER BY analysis_date DESC
-        ''', (user_id, cutoff_date))
+        tables = ['swing_analyses'] + self._partitions_since(cursor, cutoff_date)
+        cursor.execute(
+            ' UNION ALL '.join(
+                f"SELECT analysis_date, overall_score, fault_percentages, primary_issues, coaching_tip "
+                f"FROM {table} WHERE user_id = ? AND analysis_date > ?"
+                for table in tables
+            ) + ' ORDER BY analysis_date DESC',
+            [value for _ in tables for value in (user_id, cutoff_date)]
+        )
         
         analyses = cursor.fetchall()
         
@@ -195,7 +315,7 @@ class ProgressTracker:
     
     def compare_swings(self, user_id: str, limit: int = 5) -> Dict:
         """Compare recent swings to show improvement patterns"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -207,6 +327,20 @@ class ProgressTracker:
         ''', (user_id, limit))
         
         analyses = cursor.fetchall()
+        
+        # Users returning after a long break may only have archived swings
+        if len(analyses) < limit:
+            for table in reversed(self._partitions_since(cursor, '')):
+                cursor.execute(f'''
+                    SELECT analysis_date, overall_score, fault_percentages, primary_issues
+                    FROM {table}
+                    WHERE user_id = ?
+                    ORDER BY analysis_date DESC
+                    LIMIT ?
+                ''', (user_id, limit - len(analyses)))
+                analyses.extend(cursor.fetchall())
+                if len(analyses) >= limit:
+                    break
         conn.close()
         
         if len(analyses) < 2:
@@ -346,35 +480,33 @@ class ProgressTracker:
         
         return focus_areas if focus_areas else ['tempo_and_rhythm']
     
-    def _check_and_create_milestones(self, user_id: str, analysis_result: Dict):
-        """Check for achievement milestones and create them"""
-        overall_score = analysis_result.get('overall_score', 0)
-        
-        milestones_to_check = [
-            (70, 'first_good_swing', 'First swing with 70+ overall score!'),
-            (80, 'great_swing', 'Excellent swing with 80+ score!'),
-            (90, 'outstanding_swing', 'Outstanding swing technique!'),
+    def _check_and_create_milestones(self, cursor, user_id: str, analysis_result: Dict,
+                                     milestone_date: Optional[str] = None):
+        """Grant any milestones earned by this analysis using the caller's transaction"""
+        earned = [
+            rule for rule in self.milestone_rules
+            if (analysis_result.get(rule['metric']) or 0) >= rule['threshold']
         ]
+        if not earned:
+            return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # One query for everything the user already holds
+        cursor.execute('''
+            SELECT milestone_type FROM milestones WHERE user_id = ?
+        ''', (user_id,))
+        existing = {row[0] for row in cursor.fetchall()}
         
-        for score_threshold, milestone_type, description in milestones_to_check:
-            if overall_score >= score_threshold:
-                # Check if milestone already exists
-                cursor.execute('''
-                    SELECT COUNT(*) FROM milestones 
-                    WHERE user_id = ? AND milestone_type = ?
-                ''', (user_id, milestone_type))
-                
-                if cursor.fetchone()[0] == 0:  # Milestone doesn't exist
-                    cursor.execute('''
-                        INSERT INTO milestones (milestone_id, user_id, milestone_type, milestone_date, description)
-                        VALUES (?, ?, ?, ?, ?)
-                    ''', (str(uuid.uuid4()), user_id, milestone_type, datetime.now().isoformat(), description))
+        milestone_date = milestone_date or datetime.now().isoformat()
+        new_milestones = [
+            (str(uuid.uuid4()), user_id, rule['type'], milestone_date, rule['description'])
+            for rule in earned if rule['type'] not in existing
+        ]
         
-        conn.commit()
-        conn.close()
+        # The unique index makes concurrent grants of the same milestone a no-op
+        cursor.executemany('''
+            INSERT OR IGNORE INTO milestones (milestone_id, user_id, milestone_type, milestone_date, description)
+            VALUES (?, ?, ?, ?, ?)
+        ''', new_milestones)
     
     def _create_practice_plan(self, persistent_issues: List) -> Dict:
         """Create personalized practice plan based on issues"""
@@ -489,34 +621,39 @@ class ProgressTracker:
     
     def get_user_stats(self, user_id: str) -> Dict:
         """Get quick user statistics"""
-        conn = sqlite3.connect(self.db_path)
+        return self.cache.get_or_load('stats', user_id,
+                                      lambda: self._load_user_stats(user_id),
+                                      STATS_CACHE_TTL)
+    
+    def _load_user_stats(self, user_id: str) -> Dict:
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
-        # Total swings
-        cursor.execute("SELECT COUNT(*) FROM swing_analyses WHERE user_id = ?", (user_id,))
-        total_swings = cursor.fetchone()[0]
-        
-        # Best score
-        cursor.execute("SELECT MAX(overall_score) FROM swing_analyses WHERE user_id = ?", (user_id,))
-        best_score = cursor.fetchone()[0] or 0
-        
-        # Recent average (last 5 swings)
+        # One round trip: the database computes every aggregate, folding in
+        # the daily rollups of archived analyses
         cursor.execute('''
-            SELECT AVG(overall_score) FROM (
-                SELECT overall_score FROM swing_analyses 
-                WHERE user_id = ? 
-                ORDER BY analysis_date DESC 
-                LIMIT 5
-            )
-        ''', (user_id,))
-        recent_average = cursor.fetchone()[0] or 0
-        
-        # Days active
-        cursor.execute('''
-            SELECT COUNT(DISTINCT DATE(analysis_date)) 
-            FROM swing_analyses WHERE user_id = ?
-        ''', (user_id,))
-        days_active = cursor.fetchone()[0]
+            SELECT (SELECT COUNT(*) FROM swing_analyses WHERE user_id = ?)
+                   + (SELECT COALESCE(SUM(swing_count), 0) FROM analysis_daily_rollups WHERE user_id = ?),
+                   (SELECT MAX(score) FROM (
+                       SELECT MAX(overall_score) AS score FROM swing_analyses WHERE user_id = ?
+                       UNION ALL
+                       SELECT MAX(best_score) FROM analysis_daily_rollups WHERE user_id = ?
+                   ) scores),
+                   (SELECT COUNT(*) FROM (
+                       SELECT SUBSTR(analysis_date, 1, 10) AS day FROM swing_analyses WHERE user_id = ?
+                       UNION
+                       SELECT day FROM analysis_daily_rollups WHERE user_id = ?
+                   ) days),
+                   (SELECT AVG(overall_score) FROM (
+                       SELECT overall_score FROM swing_analyses 
+                       WHERE user_id = ? 
+                       ORDER BY analysis_date DESC 
+                       LIMIT 5
+                   ) recent)
+        ''', (user_id,) * 7)
+        total_swings, best_score, days_active, recent_average = cursor.fetchone()
+        best_score = best_score or 0
+        recent_average = recent_average or 0
         
         conn.close()
         
@@ -526,4 +663,416 @@ class ProgressTracker:
             'recent_average': round(recent_average, 1),
             'days_active': days_active,
             'improvement': round(recent_average - (best_score * 0.8), 1) if total_swings > 3 else 0
-        } 
\ No newline at end of file
+        } 
+    
+    def export_history(self, output: IO[str], user_ids: Optional[Iterable[str]] = None,
+                       batch_size: int = 5000) -> Dict:
+        """
+        Stream users, analyses, milestones and daily rollups as NDJSON.
+        Each line is one columnar chunk: {"table", "columns", "rows"} holding at
+        most batch_size rows, so memory stays bounded regardless of table size.
+        Chunks of archived analyses are marked "archived", so an import puts
+        them back in partitions (the rollups already count them).
+        """
+        conn = self.backend.connect()
+        cursor = conn.cursor()
+        counts = {}
+        
+        try:
+            user_filter = ''
+            if user_ids is not None:
+                # Stage the id list in the database instead of building huge IN clauses
+                cursor.execute('CREATE TEMP TABLE IF NOT EXISTS export_users (user_id TEXT PRIMARY KEY)')
+                cursor.execute('DELETE FROM export_users')
+                cursor.executemany('INSERT OR IGNORE INTO export_users (user_id) VALUES (?)',
+                                   ((user_id,) for user_id in user_ids))
+                user_filter = ' WHERE user_id IN (SELECT user_id FROM export_users)'
+            
+            for table, columns in BULK_TABLES:
+                counts[table] = 0
+                
+                # Archived analyses are exported alongside live ones
+                sources = [table]
+                if table == 'swing_analyses':
+                    sources += self._partitions_since(cursor, '')
+                
+                for source in sources:
+                    chunk = {'table': table, 'columns': columns}
+                    if source != table:
+                        chunk['archived'] = True
+                    # Server-side on PostgreSQL, so only one batch is held at a time
+                    rows_cursor = conn.streaming_cursor()
+                    rows_cursor.execute(f"SELECT {', '.join(columns)} FROM {source}{user_filter}")
+                    while True:
+                        rows = rows_cursor.fetchmany(batch_size)
+                        if not rows:
+                            break
+                        output.write(json.dumps(dict(chunk, rows=[list(row) for row in rows])))
+                        output.write('\n')
+                        counts[table] += len(rows)
+                    rows_cursor.close()
+        finally:
+            conn.close()
+        
+        return counts
+    
+    def import_history(self, source: IO[str], commit_every: int = 50000,
+                       recompute_milestones: bool = True) -> Dict:
+        """
+        Bulk load an export_history stream; counts are rows actually inserted.
+        Rows are written with executemany and committed in large transactions;
+        existing primary keys are skipped, so re-running an import is safe.
+        Only the imported users' cache entries are invalidated.
+        Archived analyses go back into their monthly partitions, never the
+        live table, so the imported rollups don't count them twice.
+        Milestones are recomputed once at the end rather than per analysis.
+        """
+        known_columns = dict(BULK_TABLES)
+        counts = {table: 0 for table in known_columns}
+        
+        conn = self.backend.connect()
+        cursor = conn.cursor()
+        
+        try:
+            # Track touched users in the database so memory does not grow with the import
+            cursor.execute('CREATE TEMP TABLE IF NOT EXISTS imported_users (user_id TEXT PRIMARY KEY)')
+            cursor.execute('DELETE FROM imported_users')
+            
+            pending = 0
+            for line in source:
+                if not line.strip():
+                    continue
+                
+                chunk = json.loads(line)
+                table = chunk['table']
+                if table not in known_columns:
+                    raise ValueError(f"Unknown table in import stream: {table}")
+                
+                columns = [c for c in chunk['columns'] if c in known_columns[table]]
+                indexes = [chunk['columns'].index(c) for c in columns]
+                rows = [[row[i] for i in indexes] for row in chunk['rows']]
+                
+                placeholders = ', '.join('?' for _ in columns)
+                if chunk.get('archived') and table == 'swing_analyses':
+                    inserted = self._import_archived(cursor, columns, rows)
+                else:
+                    cursor.executemany(
+                        f"INSERT OR IGNORE INTO {table} ({', '.join(columns)}) VALUES ({placeholders})",
+                        rows
+                    )
+                    inserted = max(cursor.rowcount, 0)
+                
+                if 'user_id' in columns:
+                    user_index = columns.index('user_id')
+                    cursor.executemany('INSERT OR IGNORE INTO imported_users (user_id) VALUES (?)',
+                                       ((row[user_index],) for row in rows))
+                
+                counts[table] += inserted
+                pending += len(rows)
+                if pending >= commit_every:
+                    conn.commit()
+                    pending = 0
+            
+            conn.commit()
+            
+            if recompute_milestones:
+                counts['milestones_granted'] = self._recompute_milestones(conn)
+                conn.commit()
+            
+            # The cache may be shared with other replicas, so drop only these users
+            users_cursor = conn.streaming_cursor()
+            users_cursor.execute('SELECT user_id FROM imported_users')
+            while True:
+                rows = users_cursor.fetchmany(5000)
+                if not rows:
+                    break
+                for (user_id,) in rows:
+                    self._invalidate_user(user_id)
+            users_cursor.close()
+        finally:
+            conn.close()
+        
+        return counts
+    
+    def _import_archived(self, cursor, columns: List[str], rows: List[List]) -> int:
+        """Insert archived analyses into the monthly partitions their dates belong to; returns rows inserted"""
+        date_index = columns.index('analysis_date') if 'analysis_date' in columns else None
+        by_partition = {}
+        for row in rows:
+            analysis_date = (row[date_index] if date_index is not None else None) or ''
+            by_partition.setdefault(self._partition_name(analysis_date), []).append(row)
+        
+        placeholders = ', '.join('?' for _ in columns)
+        inserted = 0
+        for partition_name, partition_rows in by_partition.items():
+            self._ensure_partition(cursor, partition_name)
+            cursor.executemany(
+                f"INSERT OR IGNORE INTO {partition_name} ({', '.join(columns)}) VALUES ({placeholders})",
+                partition_rows
+            )
+            partition_inserted = max(cursor.rowcount, 0)
+            cursor.execute('''
+                UPDATE analysis_partitions SET row_count = row_count + ?
+                WHERE partition_name = ?
+            ''', (partition_inserted, partition_name))
+            inserted += partition_inserted
+        return inserted
+    
+    def _recompute_milestones(self, conn, batch_size: int = 5000) -> int:
+        """Grant score milestones for every user touched by an import, set-based"""
+        granted = 0
+        write_cursor = conn.cursor()
+        analyses = ' UNION ALL '.join(
+            f"SELECT user_id, analysis_date, overall_score FROM {table}"
+            for table in ['swing_analyses'] + self._partitions_since(write_cursor, ''))
+        
+        for rule in self.milestone_rules:
+            # Only column-backed metrics can be evaluated in SQL
+            if rule['metric'] != 'overall_score':
+                continue
+            
+            cursor = conn.streaming_cursor()
+            # The milestone date is when the user first reached the threshold
+            cursor.execute(f'''
+                SELECT sa.user_id, MIN(sa.analysis_date)
+                FROM ({analyses}) sa
+                JOIN imported_users iu ON iu.user_id = sa.user_id
+                WHERE sa.overall_score >= ?
+                GROUP BY sa.user_id
+            ''', (rule['threshold'],))
+            
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                write_cursor.executemany('''
+                    INSERT OR IGNORE INTO milestones (milestone_id, user_id, milestone_type, milestone_date, description)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(str(uuid.uuid4()), user_id, rule['type'], first_date, rule['description'])
+                      for user_id, first_date in rows])
+                granted += max(write_cursor.rowcount, 0)
+            cursor.close()
+        
+        return granted
+    
+    def iter_user_histories(self, user_ids: Optional[Iterable[str]] = None,
+                            users_per_batch: int = 500):
+        """
+        Yield (user_id, profile, analyses) per user, analyses oldest first as
+        (analysis_id, analysis_date, overall_score, fault_percentages,
+        primary_issues) rows. Users are read a batch at a time on short-lived
+        connections, so every history is read once and memory stays bounded.
+        Archived partitions are included.
+        """
+        if user_ids is not None:
+            wanted = sorted(set(user_ids))
+            batches = (wanted[i:i + users_per_batch] for i in range(0, len(wanted), users_per_batch))
+        else:
+            batches = self._user_id_batches(users_per_batch)
+        
+        for batch in batches:
+            conn = self.backend.connect()
+            cursor = conn.cursor()
+            try:
+                placeholders = ','.join('?' * len(batch))
+                cursor.execute(f'''
+                    SELECT user_id, golfer_type, experience_level FROM users
+                    WHERE user_id IN ({placeholders})
+                ''', batch)
+                profiles = {row[0]: {'user_id': row[0],
+                                     'golfer_type': row[1] or 'weekend_player',
+                                     'experience': row[2] or 'intermediate'}
+                            for row in cursor.fetchall()}
+                
+                tables = ['swing_analyses'] + self._partitions_since(cursor, '')
+                cursor.execute(
+                    ' UNION ALL '.join(
+                        f"SELECT user_id, analysis_id, analysis_date, overall_score, "
+                        f"fault_percentages, primary_issues "
+                        f"FROM {table} WHERE user_id IN ({placeholders})"
+                        for table in tables
+                    ) + ' ORDER BY user_id, analysis_date',
+                    batch * len(tables)
+                )
+                histories = {}
+                for row in cursor.fetchall():
+                    histories.setdefault(row[0], []).append(tuple(row[1:]))
+            finally:
+                conn.close()
+            
+            for user_id in batch:
+                if user_id in histories:
+                    profile = profiles.get(user_id, {'user_id': user_id,
+                                                     'golfer_type': 'weekend_player',
+                                                     'experience': 'intermediate'})
+                    yield user_id, profile, histories[user_id]
+    
+    def _user_id_batches(self, batch_size: int):
+        """
+        Every user, in keyset-paginated batches over the users primary key
+        (users whose analyses are all archived included; those without any
+        analyses yield no history)
+        """
+        last_user_id = ''
+        while True:
+            conn = self.backend.connect()
+            try:
+                rows = conn.execute('''
+                    SELECT user_id FROM users
+                    WHERE user_id > ? ORDER BY user_id LIMIT ?
+                ''', (last_user_id, batch_size)).fetchall()
+            finally:
+                conn.close()
+            if not rows:
+                return
+            batch = [row[0] for row in rows]
+            yield batch
+            last_user_id = batch[-1]
+    
+    def update_coaching_tips(self, updates: Iterable[Tuple[str, str, str]]) -> int:
+        """Rewrite stored coaching tips from (user_id, analysis_id, coaching_tip) rows, archived or not"""
+        updates = list(updates)
+        if not updates:
+            return 0
+        
+        conn = self.backend.connect()
+        try:
+            cursor = conn.cursor()
+            for table in ['swing_analyses'] + self._partitions_since(cursor, ''):
+                cursor.executemany(f'''
+                    UPDATE {table} SET coaching_tip = ? WHERE analysis_id = ?
+                ''', [(tip, analysis_id) for _, analysis_id, tip in updates])
+            conn.commit()
+        finally:
+            conn.close()
+        
+        for user_id in {user_id for user_id, _, _ in updates}:
+            self._invalidate_user(user_id)
+        return len(updates)
+    
+    def archive_old_analyses(self, retain_days: int = DEFAULT_RETENTION_DAYS,
+                             batch_size: int = 500, max_batches: Optional[int] = None,
+                             pause_seconds: float = 0.05) -> Dict:
+        """
+        Move analyses older than retain_days into monthly partition tables.
+        Work is done in short batches (one transaction each, with a pause in
+        between) so the write lock is never held for long. Archived rows are
+        folded into analysis_daily_rollups so lifetime stats stay intact.
+        """
+        cutoff_date = (datetime.now() - timedelta(days=retain_days)).isoformat()
+        archived = 0
+        batches = 0
+        
+        while max_batches is None or batches < max_batches:
+            conn = self.backend.connect()
+            cursor = conn.cursor()
+            
+            try:
+                cursor.execute(f'''
+                    SELECT {ANALYSIS_COLUMNS}
+                    FROM swing_analyses
+                    WHERE analysis_date < ?
+                    ORDER BY analysis_date
+                    LIMIT ?
+                ''', (cutoff_date, batch_size))
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                
+                # Delete first and archive only what this worker removed, so
+                # concurrent sweeps never double count a row in the rollups
+                moved = []
+                for row in rows:
+                    cursor.execute('DELETE FROM swing_analyses WHERE analysis_id = ?', (row[0],))
+                    if cursor.rowcount == 1:
+                        moved.append(row)
+                
+                by_partition = {}
+                rollups = {}
+                for row in moved:
+                    user_id, analysis_date, score = row[1], row[2] or '', row[4] or 0
+                    by_partition.setdefault(self._partition_name(analysis_date), []).append(row)
+                    
+                    rollup = rollups.setdefault((user_id, analysis_date[:10]), [0, 0.0, 0.0])
+                    rollup[0] += 1
+                    rollup[1] += score
+                    rollup[2] = max(rollup[2], score)
+                
+                for partition_name, partition_rows in by_partition.items():
+                    self._ensure_partition(cursor, partition_name)
+                    cursor.executemany(f'''
+                        INSERT OR IGNORE INTO {partition_name} ({ANALYSIS_COLUMNS})
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', partition_rows)
+                    cursor.execute('''
+                        UPDATE analysis_partitions SET row_count = row_count + ?
+                        WHERE partition_name = ?
+                    ''', (len(partition_rows), partition_name))
+                
+                cursor.executemany('''
+                    INSERT INTO analysis_daily_rollups (user_id, day, swing_count, score_sum, best_score)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id, day) DO UPDATE SET
+                        swing_count = analysis_daily_rollups.swing_count + excluded.swing_count,
+                        score_sum = analysis_daily_rollups.score_sum + excluded.score_sum,
+                        best_score = CASE WHEN excluded.best_score > analysis_daily_rollups.best_score
+                                          THEN excluded.best_score
+                                          ELSE analysis_daily_rollups.best_score END
+                ''', [(user_id, day, count, total, best)
+                      for (user_id, day), (count, total, best) in rollups.items()])
+                
+                conn.commit()
+                archived += len(moved)
+                batches += 1
+            finally:
+                conn.close()
+            
+            for user_id in {row[1] for row in moved}:
+                self._invalidate_user(user_id)
+            
+            if len(rows) < batch_size:
+                break
+            time.sleep(pause_seconds)
+        
+        return {'archived': archived, 'batches': batches, 'cutoff_date': cutoff_date}
+    
+    def _partition_name(self, analysis_date: str) -> str:
+        """Monthly partition table for an ISO date (never built from unchecked input)"""
+        month = analysis_date[:7]
+        if not re.fullmatch(r'\d{4}-\d{2}', month):
+            month = '0000-00'
+        return f"swing_analyses_{month.replace('-', '_')}"
+    
+    def _ensure_partition(self, cursor, partition_name: str):
+        """Create a monthly partition table and register it in the catalog"""
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {partition_name} (
+                analysis_id TEXT PRIMARY KEY,
+                user_id TEXT,
+                analysis_date TEXT,
+                video_path TEXT,
+                overall_score REAL,
+                fault_percentages TEXT,
+                primary_issues TEXT,
+                coaching_tip TEXT,
+                session_notes TEXT
+            )
+        ''')
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_{partition_name}_user_date
+            ON {partition_name} (user_id, analysis_date)
+        ''')
+        month = partition_name[len('swing_analyses_'):].replace('_', '-')
+        cursor.execute('''
+            INSERT OR IGNORE INTO analysis_partitions (partition_name, month, row_count)
+            VALUES (?, ?, 0)
+        ''', (partition_name, month))
+    
+    def _partitions_since(self, cursor, since_date: str) -> List[str]:
+        """Archive partitions that may hold rows on or after since_date, oldest first"""
+        cursor.execute('''
+            SELECT partition_name FROM analysis_partitions
+            WHERE month >= ?
+            ORDER BY month
+        ''', (since_date[:7],))
+        return [row[0] for row in cursor.fetchall()]
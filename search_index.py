@@ -0,0 +1,398 @@
+# search_index.py - Full-text search over shared swings, users and groups
+import re
+from typing import Dict, List, Tuple
+
+# (table, key column, FTS table, indexed columns, bm25 weights, changed-by columns)
+# Bios are only indexed for public profiles
+FTS_SOURCES = (
+    ('shared_swings', 'share_id', 'shared_swings_fts',
+     (('title', 'new.title'), ('description', 'new.description'), ('tags', 'new.tags')),
+     (10.0, 2.0, 5.0), 'title, description, tags'),
+    ('social_users', 'user_id', 'social_users_fts',
+     (('username', 'new.username'), ('display_name', 'new.display_name'),
+      ('bio', "CASE WHEN new.privacy_level = 'public' THEN new.bio ELSE '' END")),
+     (10.0, 8.0, 1.0), 'username, display_name, bio, privacy_level'),
+    ('groups', 'group_id', 'groups_fts',
+     (('name', 'new.name'), ('description', 'new.description'), ('tags', 'new.tags')),
+     (10.0, 2.0, 5.0), 'name, description, tags'),
+)
+
+# Tags are normalized out of the JSON tags column into (tag, owner) tables
+TAG_SOURCES = (
+    ('shared_swings', 'share_id', 'shared_swing_tags'),
+    ('groups', 'group_id', 'group_tags'),
+)
+
+_TERM = re.compile(r'#?\w+', re.UNICODE)
+
+# PostgreSQL has four tsvector weight classes; bm25 weights map onto them
+TS_WEIGHT_CLASSES = ((10.0, 'A'), (5.0, 'B'), (2.0, 'C'), (0.0, 'D'))
+TS_CONFIG = 'english'
+
+# Normalized tags of one JSON tags value; malformed JSON yields none
+_PG_TAGS_FUNCTION = '''
+    CREATE OR REPLACE FUNCTION swing_sage_tags(raw TEXT) RETURNS SETOF TEXT AS $$
+    BEGIN
+        RETURN QUERY
+            SELECT DISTINCT LOWER(LTRIM(TRIM(value), '#'))
+            FROM jsonb_array_elements_text(COALESCE(raw, '[]')::jsonb) AS value
+            WHERE TRIM(LTRIM(TRIM(value), '#')) != '';
+    EXCEPTION WHEN others THEN
+        RETURN;
+    END
+    $$ LANGUAGE plpgsql IMMUTABLE
+'''
+
+
+def normalize_tag(tag: str) -> str:
+    return tag.strip().lstrip('#').lower()
+
+
+def _parse_query(query: str) -> Tuple[str, List[str]]:
+    """
+    Split user input into an FTS5 MATCH expression and #tag filters.
+    Every term is quoted, so punctuation or FTS operators in the input can
+    never produce a syntax error.
+    """
+    words, tags = [], []
+    for term in _TERM.findall(query):
+        if term.startswith('#'):
+            tags.append(normalize_tag(term))
+        else:
+            words.append(f'"{term}"')
+    return ' '.join(words), tags
+
+
+class SearchIndex:
+    """
+    Search for SocialPlatform:
+    - SQLite: FTS5 tables kept in sync with their source tables by
+      triggers, ranked with bm25, prefix-indexed for autocomplete
+    - Tags from the JSON tags columns normalized into join tables (also
+      trigger-maintained) for exact #tag filters and tag suggestions
+    - PostgreSQL: a generated, weighted tsvector column per source table
+      behind a GIN index, ranked with ts_rank; the same tag tables, kept
+      in sync by plpgsql triggers
+    - SQLite without FTS5: LOWER(...) LIKE matching on the same columns,
+      so the API behaves the same everywhere
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.fts_enabled = False
+        self.tsvector_enabled = False
+        self.tag_tables_enabled = False
+
+    def ensure_schema(self, conn):
+        """Create search tables and triggers, backfilling existing rows once"""
+        if self.backend.dialect == 'postgresql':
+            self._ensure_postgres_schema(conn)
+            return
+
+        cursor = conn.cursor()
+        try:
+            cursor.execute('CREATE VIRTUAL TABLE IF NOT EXISTS fts5_probe USING fts5(probe)')
+            cursor.execute('DROP TABLE fts5_probe')
+        except Exception:
+            conn.rollback()
+            return  # Built without FTS5: search falls back to LIKE
+        self.fts_enabled = self.tag_tables_enabled = True
+
+        for table, key, fts_table, columns, _, changed_by in FTS_SOURCES:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts_table,))
+            is_new = cursor.fetchone() is None
+
+            names = ', '.join(name for name, _ in columns)
+            new_values = ', '.join(expression for _, expression in columns)
+            old_values = new_values.replace('new.', 'old.')
+
+            # External-content table: the index stores terms, rows stay in the source
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5(
+                    {names}, content='{table}', content_rowid='rowid',
+                    tokenize='porter unicode61', prefix='2 3'
+                )
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT INTO {fts_table} (rowid, {names}) VALUES (new.rowid, {new_values});
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_delete AFTER DELETE ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, {names})
+                    VALUES ('delete', old.rowid, {old_values});
+                END
+            ''')
+            # Counter updates (likes, views, ...) never touch the index
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {fts_table}_update
+                AFTER UPDATE OF {changed_by} ON {table} BEGIN
+                    INSERT INTO {fts_table} ({fts_table}, rowid, {names})
+                    VALUES ('delete', old.rowid, {old_values});
+                    INSERT INTO {fts_table} (rowid, {names}) VALUES (new.rowid, {new_values});
+                END
+            ''')
+
+            if is_new:
+                cursor.execute(f'''
+                    INSERT INTO {fts_table} (rowid, {names})
+                    SELECT rowid, {new_values.replace('new.', '')} FROM {table}
+                ''')
+
+        for table, key, tag_table in TAG_SOURCES:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (tag_table,))
+            is_new = cursor.fetchone() is None
+
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {tag_table} (
+                    tag TEXT,
+                    {key} TEXT,
+                    PRIMARY KEY (tag, {key})
+                )
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{tag_table}_owner ON {tag_table} ({key})')
+
+            # Malformed JSON simply yields no tags
+            tag_rows = f'''
+                SELECT DISTINCT LOWER(LTRIM(TRIM(value), '#')), {{row}}.{key}
+                FROM json_each(CASE WHEN json_valid({{row}}.tags) THEN {{row}}.tags ELSE '[]' END)
+                WHERE TRIM(LTRIM(TRIM(value), '#')) != ''
+            '''
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tag_table}_insert AFTER INSERT ON {table} BEGIN
+                    INSERT OR IGNORE INTO {tag_table} (tag, {key}) {tag_rows.format(row='new')};
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tag_table}_delete AFTER DELETE ON {table} BEGIN
+                    DELETE FROM {tag_table} WHERE {key} = old.{key};
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {tag_table}_update AFTER UPDATE OF tags ON {table} BEGIN
+                    DELETE FROM {tag_table} WHERE {key} = old.{key};
+                    INSERT OR IGNORE INTO {tag_table} (tag, {key}) {tag_rows.format(row='new')};
+                END
+            ''')
+
+            if is_new:
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO {tag_table} (tag, {key})
+                    SELECT DISTINCT LOWER(LTRIM(TRIM(j.value), '#')), t.{key}
+                    FROM {table} t, json_each(CASE WHEN json_valid(t.tags) THEN t.tags ELSE '[]' END) j
+                    WHERE TRIM(LTRIM(TRIM(j.value), '#')) != ''
+                ''')
+
+        conn.commit()
+
+    def _ensure_postgres_schema(self, conn):
+        cursor = conn.cursor()
+
+        for table, key, _, columns, weights, _ in FTS_SOURCES:
+            # Generated, so every write keeps it current without triggers
+            vector = ' || '.join(
+                f"setweight(to_tsvector('{TS_CONFIG}', COALESCE({expression.replace('new.', '')}, '')), "
+                f"'{_weight_class(weight)}')"
+                for (_, expression), weight in zip(columns, weights))
+            cursor.execute(f'''
+                ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS ({vector}) STORED
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{table}_search ON {table} USING GIN (search_vector)')
+
+        # Autocomplete is a prefix range scan on the lowercased name
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_social_users_username_prefix '
+                       'ON social_users (LOWER(username) text_pattern_ops)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_groups_name_prefix '
+                       'ON groups (LOWER(name) text_pattern_ops)')
+
+        cursor.execute(_PG_TAGS_FUNCTION)
+        for table, key, tag_table in TAG_SOURCES:
+            cursor.execute('SELECT to_regclass(?)', (tag_table,))
+            is_new = cursor.fetchone()[0] is None
+
+            cursor.execute(f'''
+                CREATE TABLE IF NOT EXISTS {tag_table} (
+                    tag TEXT,
+                    {key} TEXT,
+                    PRIMARY KEY (tag, {key})
+                )
+            ''')
+            cursor.execute(f'CREATE INDEX IF NOT EXISTS idx_{tag_table}_owner ON {tag_table} ({key})')
+            cursor.execute(f'''
+                CREATE OR REPLACE FUNCTION {tag_table}_sync() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        DELETE FROM {tag_table} WHERE {key} = OLD.{key};
+                    END IF;
+                    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                        INSERT INTO {tag_table} (tag, {key})
+                        SELECT tag, NEW.{key} FROM swing_sage_tags(NEW.tags) AS tag
+                        ON CONFLICT DO NOTHING;
+                    END IF;
+                    RETURN NULL;
+                END
+                $$ LANGUAGE plpgsql
+            ''')
+            cursor.execute(f'DROP TRIGGER IF EXISTS {tag_table}_sync ON {table}')
+            cursor.execute(f'''
+                CREATE TRIGGER {tag_table}_sync
+                AFTER INSERT OR DELETE OR UPDATE OF tags ON {table}
+                FOR EACH ROW EXECUTE FUNCTION {tag_table}_sync()
+            ''')
+
+            if is_new:
+                cursor.execute(f'''
+                    INSERT INTO {tag_table} (tag, {key})
+                    SELECT tag, t.{key} FROM {table} t, swing_sage_tags(t.tags) AS tag
+                    ON CONFLICT DO NOTHING
+                ''')
+
+        conn.commit()
+        self.tsvector_enabled = self.tag_tables_enabled = True
+
+    def search_shared_swings(self, cursor, query: str, limit: int) -> List[str]:
+        """Public share ids best matching query; #tags must all be present"""
+        words, tags = _parse_query(query)
+        if not words and not tags:
+            return []
+
+        conditions, params = ["ss.privacy_level = 'public'"], []
+        for tag in tags:
+            if self.tag_tables_enabled:
+                conditions.append('ss.share_id IN (SELECT share_id FROM shared_swing_tags WHERE tag = ?)')
+                params.append(tag)
+            else:
+                conditions.append('LOWER(ss.tags) LIKE ?')
+                params.append(f'%"{tag}"%')
+
+        return self._ranked_ids(cursor, 'shared_swings', 'ss', 'share_id', words,
+                                conditions, params, limit, fallback_order='ss.share_date DESC')
+
+    def search_users(self, cursor, query: str, limit: int) -> List[str]:
+        words, _ = _parse_query(query)
+        if not words:
+            return []
+        return self._ranked_ids(cursor, 'social_users', 'su', 'user_id', words,
+                                ["su.privacy_level != 'private'"], [], limit,
+                                fallback_order='su.achievement_points DESC')
+
+    def search_groups(self, cursor, query: str, limit: int) -> List[str]:
+        words, tags = _parse_query(query)
+        if not words and not tags:
+            return []
+
+        conditions, params = ["g.group_type = 'public'"], []
+        for tag in tags:
+            if self.tag_tables_enabled:
+                conditions.append('g.group_id IN (SELECT group_id FROM group_tags WHERE tag = ?)')
+                params.append(tag)
+            else:
+                conditions.append('LOWER(g.tags) LIKE ?')
+                params.append(f'%"{tag}"%')
+
+        return self._ranked_ids(cursor, 'groups', 'g', 'group_id', words,
+                                conditions, params, limit, fallback_order='g.member_count DESC')
+
+    def autocomplete(self, cursor, prefix: str, limit: int) -> Dict[str, List[str]]:
+        """Usernames, tags and group names starting with prefix"""
+        term = normalize_tag(prefix)
+        if not term:
+            return {'users': [], 'tags': [], 'groups': []}
+
+        if self.fts_enabled:
+            match = f'"{term}"*'
+            cursor.execute('''
+                SELECT su.username FROM social_users_fts
+                JOIN social_users su ON su.rowid = social_users_fts.rowid
+                WHERE social_users_fts MATCH ? AND su.privacy_level != 'private'
+                ORDER BY bm25(social_users_fts, 10.0, 8.0, 0.0) LIMIT ?
+            ''', (f'{{username display_name}} : {match}', limit))
+            users = [row[0] for row in cursor.fetchall()]
+
+            cursor.execute('''
+                SELECT g.name FROM groups_fts
+                JOIN groups g ON g.rowid = groups_fts.rowid
+                WHERE groups_fts MATCH ? AND g.group_type = 'public'
+                ORDER BY bm25(groups_fts, 10.0, 0.0, 0.0) LIMIT ?
+            ''', (f'name : {match}', limit))
+            groups = [row[0] for row in cursor.fetchall()]
+        else:
+            pattern = f'{_escape_like(term)}%'
+            cursor.execute('''
+                SELECT username FROM social_users
+                WHERE LOWER(username) LIKE ? ESCAPE '\\' AND privacy_level != 'private'
+                ORDER BY username LIMIT ?
+            ''', (pattern, limit))
+            users = [row[0] for row in cursor.fetchall()]
+            cursor.execute('''
+                SELECT name FROM groups
+                WHERE LOWER(name) LIKE ? ESCAPE '\\' AND group_type = 'public'
+                ORDER BY member_count DESC LIMIT ?
+            ''', (pattern, limit))
+            groups = [row[0] for row in cursor.fetchall()]
+
+        tags = []
+        if self.tag_tables_enabled:
+            # Tag suggestions are a range scan of the tag primary key
+            cursor.execute('''
+                SELECT tag FROM shared_swing_tags WHERE tag >= ? AND tag < ?
+                GROUP BY tag ORDER BY COUNT(*) DESC, tag LIMIT ?
+            ''', (term, term + '￿', limit))
+            tags = [row[0] for row in cursor.fetchall()]
+
+        return {'users': users, 'tags': tags, 'groups': groups}
+
+    def _ranked_ids(self, cursor, table: str, alias: str, key: str, words: str,
+                    conditions: List[str], params: List, limit: int,
+                    fallback_order: str) -> List[str]:
+        source = next(source for source in FTS_SOURCES if source[0] == table)
+        fts_table, columns, weights = source[2], source[3], source[4]
+
+        if words and self.fts_enabled:
+            weight_list = ', '.join(str(weight) for weight in weights)
+            cursor.execute(f'''
+                SELECT {alias}.{key} FROM {fts_table}
+                JOIN {table} {alias} ON {alias}.rowid = {fts_table}.rowid
+                WHERE {fts_table} MATCH ? AND {' AND '.join(conditions)}
+                ORDER BY bm25({fts_table}, {weight_list})
+                LIMIT ?
+            ''', (words, *params, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+        if words and self.tsvector_enabled:
+            plain_words = words.replace('"', '')
+            cursor.execute(f'''
+                SELECT {alias}.{key} FROM {table} {alias}
+                WHERE {alias}.search_vector @@ plainto_tsquery('{TS_CONFIG}', ?)
+                  AND {' AND '.join(conditions)}
+                ORDER BY ts_rank({alias}.search_vector, plainto_tsquery('{TS_CONFIG}', ?)) DESC
+                LIMIT ?
+            ''', (plain_words, *params, plain_words, limit))
+            return [row[0] for row in cursor.fetchall()]
+
+        # LIKE fallback: every word must appear in one of the plainly indexed
+        # columns (so private bios stay unsearchable here too)
+        names = [name for name, expression in columns if expression == f'new.{name}']
+        for word in words.replace('"', '').split():
+            pattern = f'%{_escape_like(word.lower())}%'
+            conditions = conditions + ['(' + ' OR '.join(
+                f"LOWER({alias}.{name}) LIKE ? ESCAPE '\\'" for name in names) + ')']
+            params = params + [pattern] * len(names)
+
+        cursor.execute(f'''
+            SELECT {alias}.{key} FROM {table} {alias}
+            WHERE {' AND '.join(conditions)}
+            ORDER BY {fallback_order}
+            LIMIT ?
+        ''', (*params, limit))
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _weight_class(weight: float) -> str:
+    return next(label for floor, label in TS_WEIGHT_CLASSES if weight >= floor)
+
+
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
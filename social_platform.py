@@ -1,13 +1,103 @@
 # social_platform.py - Social features and community system
-import sqlite3
+import base64
 import json
+import math
 import uuid
 import hashlib
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
+from storage import create_backend
+from cache import Cache
+from instrumentation import timed_methods
+from counter_buffer import CounterBuffer
+from challenge_engine import ChallengeEngine, CHALLENGE_SWEEP_INTERVAL
+from follow_graph import FollowGraph
+from search_index import SearchIndex
+from leaderboard import LeaderboardEngine, LEADERBOARD_TYPES, IMPROVEMENT_MIN_SWINGS
 
+# Accounts with more followers than this are not fanned out on write;
+# their activity is merged into followers' feeds at read time instead
+FANOUT_FOLLOWER_LIMIT = 10000
+
+# How many recent activities a new follow copies into the follower's feed
+FEED_BACKFILL_LIMIT = 50
+
+# Trending windows and the age (in seconds) that costs a share one order of
+# magnitude of engagement. Scores only depend on engagement and share time,
+# so stored scores never need rescoring as the clock moves.
+TRENDING_WINDOWS = {
+    '24h': (timedelta(days=1), 6 * 3600),
+    '7d': (timedelta(days=7), 36 * 3600),
+    '30d': (timedelta(days=30), 5 * 86400),
+}
+
+# Expired trending entries are swept at most this often (seconds)
+TRENDING_COMPACTION_INTERVAL = 600
+
+# Likes, comments and views are coalesced in memory and written at most
+# this often (seconds), or sooner once this many increments are pending
+COUNTER_FLUSH_INTERVAL = 2.0
+COUNTER_FLUSH_THRESHOLD = 500
+
+# Profiles are hydrated this many ids at a time (keeps IN lists under
+# SQLite's bound-parameter limit)
+PROFILE_BATCH_SIZE = 400
+
+# Only these shared_swings columns are bumped through the counter buffer
+SHARE_COUNTERS = ('like_count', 'comment_count', 'view_count')
+
+# shared_swings columns in the order _format_shared_swing reads them; named
+# rather than ss.* because PostgreSQL adds a generated search_vector column
+SHARED_SWING_COLUMNS = ', '.join(f'ss.{column}' for column in (
+    'share_id', 'user_id', 'analysis_id', 'title', 'description', 'video_url',
+    'thumbnail_url', 'privacy_level', 'allow_comments', 'share_date',
+    'view_count', 'like_count', 'comment_count', 'tags'))
+
+# Profile cards are cached until a write invalidates them (or this TTL,
+# for writes made by other processes); trending lists only expire
+PROFILE_CACHE_TTL = 300
+TRENDING_CACHE_TTL = 30
+
+def _encode_cursor(*values) -> str:
+    """Opaque page cursor holding the sort key of the last item served"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: Optional[str], size: int) -> Optional[List]:
+    """Sort key from a page cursor (None for the first page); ValueError if malformed"""
+    if not cursor:
+        return None
+    values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Malformed cursor")
+    return values
+
+
+class _UnitOfWork:
+    """
+    One write transaction: its cursor, the activities it generates (inserted
+    together just before commit) and in-memory updates that must only happen
+    once the transaction has committed.
+    """
+    
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.activities = []
+        self._after_commit = []
+    
+    def after_commit(self, callback, *args):
+        self._after_commit.append((callback, args))
+    
+    def run_after_commit(self):
+        for callback, args in self._after_commit:
+            callback(*args)
+
+
+@timed_methods('social')
 class SocialPlatform:
     """
     Social platform features for Swing Sage:
@@ -20,13 +110,89 @@ class SocialPlatform:
     - Group coaching sessions
     """
     
-    def __init__(self, db_path: str = "social_platform.db"):
+    def __init__(self, db_path: str = "social_platform.db", backend=None,
+                 fanout_limit: int = FANOUT_FOLLOWER_LIMIT,
+                 counter_log_dir: Optional[str] = None,
+                 counter_flush_interval: float = COUNTER_FLUSH_INTERVAL,
+                 challenge_sweep_interval: float = CHALLENGE_SWEEP_INTERVAL,
+                 cache: Optional[Cache] = None):
+        # db_path may also be a postgresql:// URL (e.g. DATABASE_URL)
         self.db_path = db_path
+        self.backend = backend or create_backend(db_path)
+        # Pass cache.create_cache() to share entries across processes
+        self.cache = cache or Cache()
+        self.fanout_limit = fanout_limit
+        self._last_trending_compaction = 0.0
+        self.search_index = SearchIndex(self.backend)
         self._init_database()
+        self.leaderboards = LeaderboardEngine(self.backend)
+        self.follow_graph = FollowGraph(self.backend)
+        self.challenges = ChallengeEngine(self.backend)
+        self.challenges.start_sweeper(challenge_sweep_interval)
+        
+        # Counter logs live next to a SQLite file, or in the working directory
+        if counter_log_dir is None:
+            if self.backend.dialect == 'sqlite':
+                counter_log_dir = os.path.join(
+                    os.path.dirname(os.path.abspath(self.backend.db_path)), 'counter_logs')
+            else:
+                counter_log_dir = 'counter_logs'
+        self.counters = CounterBuffer(self._apply_counter_batch, log_dir=counter_log_dir,
+                                      flush_interval=counter_flush_interval,
+                                      flush_threshold=COUNTER_FLUSH_THRESHOLD)
+    
+    @contextmanager
+    def _transaction(self):
+        """
+        Unit of work on one pooled connection: the primary write, counters,
+        activity rows and achievement grants commit together or not at all
+        """
+        with self.backend.transaction() as conn:
+            uow = _UnitOfWork(conn.cursor())
+            yield uow
+            self._write_activities(uow.cursor, uow.activities)
+        uow.run_after_commit()
+    
+    def _ensure_column(self, conn, table: str, column: str, definition: str) -> bool:
+        """Add a column that older databases were created without; True if added"""
+        
+        try:
+            conn.execute(f'SELECT {column} FROM {table} LIMIT 1')
+            return False
+        except Exception:
+            # PostgreSQL aborts the transaction on the failed probe
+            conn.rollback()
+            conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+            conn.commit()
+            return True
+    
+    def _ensure_unique_index(self, conn, index: str, table: str, columns: str,
+                             id_column: str, repairs: Tuple[str, ...] = ()):
+        """
+        Create a unique index on an existing table. Databases created before
+        the index may hold duplicate rows: all but the first are dropped and
+        the repairs statements re-derive anything the duplicates inflated.
+        """
+        create_index = f'CREATE UNIQUE INDEX IF NOT EXISTS {index} ON {table} ({columns})'
+        cursor = conn.cursor()
+        try:
+            cursor.execute(create_index)
+            conn.commit()
+        except self.backend.IntegrityError:
+            conn.rollback()
+            cursor.execute(f'''
+                DELETE FROM {table} WHERE {id_column} NOT IN (
+                    SELECT MIN({id_column}) FROM {table} GROUP BY {columns}
+                )
+            ''')
+            for repair in repairs:
+                cursor.execute(repair)
+            cursor.execute(create_index)
+            conn.commit()
     
     def _init_database(self):
         """Initialize social platform database tables"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
         # Enhanced users table with social features
@@ -46,7 +212,10 @@ class SocialPlatform:
                 total_swings INTEGER DEFAULT 0,
                 best_score REAL DEFAULT 0,
                 achievement_points INTEGER DEFAULT 0,
-                verified BOOLEAN DEFAULT FALSE
+                verified BOOLEAN DEFAULT FALSE,
+                improvement_score REAL DEFAULT 0,
+                follower_count INTEGER DEFAULT 0,
+                following_count INTEGER DEFAULT 0
             )
         ''')
         
@@ -208,36 +377,190 @@ class SocialPlatform:
             )
         ''')
         
+        # Materialized per-user timelines, filled when activities are written
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feed_timeline (
+                owner_id TEXT,
+                activity_date TEXT,
+                activity_id TEXT,
+                author_id TEXT,
+                PRIMARY KEY (owner_id, activity_date, activity_id)
+            )
+        ''')
+        
+        # High-follower accounts whose activity is pulled at read time
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS feed_pull_authors (
+                user_id TEXT PRIMARY KEY
+            )
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_feed_timeline_author
+            ON feed_timeline (owner_id, author_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_activity_user_date
+            ON activity_feed (user_id, activity_date)
+        ''')
+        # Seek indexes for keyset-paginated lists
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_shared_swings_user_date
+            ON shared_swings (user_id, share_date, share_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_shared_swings_privacy_date
+            ON shared_swings (privacy_level, share_date, share_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_comments_thread
+            ON comments (target_type, target_id, parent_comment_id, comment_date, comment_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_comments_parent
+            ON comments (parent_comment_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_challenge_participants_join
+            ON challenge_participants (challenge_id, join_date, participation_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_reactions_target
+            ON reactions (target_type, target_id, user_id)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_follows_following
+            ON follows (following_id, follower_id)
+        ''')
+        
+        # Precomputed trending scores per window, read top-k by index
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS trending_index (
+                time_window TEXT,
+                share_id TEXT,
+                share_date TEXT,
+                score REAL,
+                PRIMARY KEY (time_window, share_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_trending_window_score
+            ON trending_index (time_window, score DESC)
+        ''')
+        
+        # Swings per user per day, for weekly/monthly activity leaderboards
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS leaderboard_swing_days (
+                user_id TEXT,
+                day TEXT,
+                swing_count INTEGER DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_achievements_user_date
+            ON achievements (user_id, achievement_date)
+        ''')
+        
+        # Ids of applied counter flushes, so a replayed flush is not double-counted
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS counter_flushes (
+                flush_id TEXT PRIMARY KEY,
+                flush_date TEXT
+            )
+        ''')
+        
         conn.commit()
+        
+        # Databases that predate the improvement leaderboard get its column
+        self._ensure_column(conn, 'social_users', 'improvement_score', 'REAL DEFAULT 0')
+        
+        # Databases that predate maintained follow counts get them backfilled
+        added_followers = self._ensure_column(conn, 'social_users', 'follower_count',
+                                              'INTEGER DEFAULT 0')
+        added_following = self._ensure_column(conn, 'social_users', 'following_count',
+                                              'INTEGER DEFAULT 0')
+        if added_followers or added_following:
+            conn.execute('''
+                UPDATE social_users SET
+                    follower_count = (SELECT COUNT(*) FROM follows
+                                      WHERE following_id = social_users.user_id),
+                    following_count = (SELECT COUNT(*) FROM follows
+                                       WHERE follower_id = social_users.user_id)
+            ''')
+            conn.commit()
+        self._ensure_unique_index(conn, 'idx_achievements_user_type', 'achievements',
+                                  'user_id, achievement_type', 'achievement_id', repairs=('''
+            UPDATE social_users SET achievement_points = (
+                SELECT COALESCE(SUM(points), 0) FROM achievements
+                WHERE achievements.user_id = social_users.user_id
+            )
+        ''',))
+        self._ensure_unique_index(conn, 'idx_challenge_participants_user', 'challenge_participants',
+                                  'challenge_id, user_id', 'participation_id', repairs=('''
+            UPDATE challenges SET current_participants = (
+                SELECT COUNT(*) FROM challenge_participants
+                WHERE challenge_participants.challenge_id = challenges.challenge_id
+            )
+        ''',))
+        
+        # Full-text search tables and the triggers that keep them in sync
+        self.search_index.ensure_schema(conn)
+        
+        # Databases that predate the trending index get it built once
+        cursor.execute('SELECT 1 FROM trending_index LIMIT 1')
+        trending_empty = cursor.fetchone() is None
+        cursor.execute('SELECT 1 FROM shared_swings LIMIT 1')
+        if trending_empty and cursor.fetchone() is not None:
+            self._rebuild_trending_index(cursor)
+            conn.commit()
+        
+        # Databases that predate the timeline get it built once
+        cursor.execute('SELECT 1 FROM feed_timeline LIMIT 1')
+        timeline_empty = cursor.fetchone() is None
+        cursor.execute('SELECT 1 FROM activity_feed LIMIT 1')
+        if timeline_empty and cursor.fetchone() is not None:
+            self._rebuild_feed_timelines(cursor)
+            conn.commit()
+        
         conn.close()
     
     def create_social_profile(self, user_id: str, username: str, display_name: str, 
                             email: str, bio: str = "", location: str = "") -> Dict:
         """Create or update social profile"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT OR REPLACE INTO social_users 
-                (user_id, username, display_name, email, bio, location, join_date, last_active)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (user_id, username, display_name, email, bio, location, 
-                  datetime.now().isoformat(), datetime.now().isoformat()))
-            
-            conn.commit()
-            
-            # Create welcome achievement
-            self._grant_achievement(user_id, 'welcome', 'Welcome to Swing Sage!', 
-                                  'Joined the community', 50)
+            with self._transaction() as uow:
+                # Upsert on user_id only, so a username/email clash with another
+                # account is reported instead of silently replacing that account
+                uow.cursor.execute('''
+                    INSERT INTO social_users 
+                    (user_id, username, display_name, email, bio, location, join_date, last_active)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id) DO UPDATE SET
+                        username = excluded.username,
+                        display_name = excluded.display_name,
+                        email = excluded.email,
+                        bio = excluded.bio,
+                        location = excluded.location,
+                        last_active = excluded.last_active
+                ''', (user_id, username, display_name, email, bio, location, 
+                      datetime.now().isoformat(), datetime.now().isoformat()))
+                
+                uow.cursor.execute('SELECT privacy_level FROM social_users WHERE user_id = ?',
+                                   (user_id,))
+                uow.after_commit(self.leaderboards.register_user, user_id,
+                                 uow.cursor.fetchone()[0] in ('public', 'friends'))
+                uow.after_commit(self._invalidate_profiles, user_id)
+                
+                # Create welcome achievement
+                self._grant_achievement(uow, user_id, 'welcome', 'Welcome to Swing Sage!', 
+                                      'Joined the community', 50)
             
             return {'success': True, 'user_id': user_id}
             
-        except sqlite3.IntegrityError as e:
+        except self.backend.IntegrityError as e:
             return {'success': False, 'error': 'Username or email already taken'}
-        finally:
-            conn.close()
     
     def follow_user(self, follower_id: str, following_id: str) -> Dict:
         """Follow another user"""
@@ -245,43 +568,67 @@ class SocialPlatform:
         if follower_id == following_id:
             return {'success': False, 'error': 'Cannot follow yourself'}
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT INTO follows (follower_id, following_id, follow_date)
-                VALUES (?, ?, ?)
-            ''', (follower_id, following_id, datetime.now().isoformat()))
-            
-            conn.commit()
-            
-            # Add to activity feed
-            self._add_activity(follower_id, 'follow', 'user', following_id, 
-                             {'action': 'followed'})
+            with self._transaction() as uow:
+                uow.cursor.execute('''
+                    INSERT INTO follows (follower_id, following_id, follow_date)
+                    VALUES (?, ?, ?)
+                ''', (follower_id, following_id, datetime.now().isoformat()))
+                self._adjust_follow_counts(uow.cursor, follower_id, following_id, 1)
+                uow.after_commit(self.follow_graph.invalidate, follower_id, following_id)
+                uow.after_commit(self._invalidate_profiles, follower_id, following_id)
+                
+                # Seed the follower's timeline with recent activity (pull authors
+                # are merged at read time instead)
+                uow.cursor.execute('''
+                    INSERT OR IGNORE INTO feed_timeline (owner_id, activity_date, activity_id, author_id)
+                    SELECT ?, activity_date, activity_id, user_id
+                    FROM activity_feed
+                    WHERE user_id = ? AND visibility = 'public'
+                    AND user_id NOT IN (SELECT user_id FROM feed_pull_authors)
+                    ORDER BY activity_date DESC
+                    LIMIT ?
+                ''', (follower_id, following_id, FEED_BACKFILL_LIMIT))
+                
+                # Add to activity feed
+                self._add_activity(uow, follower_id, 'follow', 'user', following_id, 
+                                 {'action': 'followed'})
             
             return {'success': True}
             
-        except sqlite3.IntegrityError:
+        except self.backend.IntegrityError:
             return {'success': False, 'error': 'Already following this user'}
-        finally:
-            conn.close()
     
     def unfollow_user(self, follower_id: str, following_id: str) -> Dict:
         """Unfollow a user"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._transaction() as uow:
+            uow.cursor.execute('''
+                DELETE FROM follows 
+                WHERE follower_id = ? AND following_id = ?
+            ''', (follower_id, following_id))
+            removed = uow.cursor.rowcount > 0
+            
+            if removed:
+                self._adjust_follow_counts(uow.cursor, follower_id, following_id, -1)
+                uow.after_commit(self.follow_graph.invalidate, follower_id, following_id)
+                uow.after_commit(self._invalidate_profiles, follower_id, following_id)
+                uow.cursor.execute('''
+                    DELETE FROM feed_timeline 
+                    WHERE owner_id = ? AND author_id = ?
+                ''', (follower_id, following_id))
+        
+        return {'success': removed}
+    
+    def _adjust_follow_counts(self, cursor, follower_id: str, following_id: str, delta: int):
+        """Keep the maintained follower/following counts in step with follows"""
         
         cursor.execute('''
-            DELETE FROM follows 
-            WHERE follower_id = ? AND following_id = ?
-        ''', (follower_id, following_id))
-        
-        conn.commit()
-        conn.close()
-        
-        return {'success': cursor.rowcount > 0}
+            UPDATE social_users SET following_count = following_count + ? WHERE user_id = ?
+        ''', (delta, follower_id))
+        cursor.execute('''
+            UPDATE social_users SET follower_count = follower_count + ? WHERE user_id = ?
+        ''', (delta, following_id))
     
     def share_swing(self, user_id: str, analysis_id: str, title: str, 
                    description: str, video_url: str, privacy_level: str = 'public',
@@ -291,97 +638,447 @@ class SocialPlatform:
         share_id = str(uuid.uuid4())
         tags_json = json.dumps(tags or [])
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO shared_swings 
-            (share_id, user_id, analysis_id, title, description, video_url, 
-             privacy_level, share_date, tags)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (share_id, user_id, analysis_id, title, description, video_url,
-              privacy_level, datetime.now().isoformat(), tags_json))
-        
-        conn.commit()
-        conn.close()
-        
-        # Add to activity feed
-        self._add_activity(user_id, 'share_swing', 'shared_swing', share_id,
-                         {'title': title, 'privacy': privacy_level})
-        
-        # Grant sharing achievement if first time
-        self._check_sharing_achievements(user_id)
+        with self._transaction() as uow:
+            uow.cursor.execute('''
+                INSERT INTO shared_swings 
+                (share_id, user_id, analysis_id, title, description, video_url, 
+                 privacy_level, share_date, tags)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (share_id, user_id, analysis_id, title, description, video_url,
+                  privacy_level, datetime.now().isoformat(), tags_json))
+            
+            self._update_trending(uow.cursor, share_id)
+            
+            # Add to activity feed
+            self._add_activity(uow, user_id, 'share_swing', 'shared_swing', share_id,
+                             {'title': title, 'privacy': privacy_level})
+            
+            # Grant sharing achievement if first time
+            self._check_sharing_achievements(uow, user_id)
         
         return {'success': True, 'share_id': share_id}
     
     def get_user_feed(self, user_id: str, limit: int = 20, offset: int = 0) -> List[Dict]:
         """Get personalized activity feed for user"""
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
-        # Get activities from followed users and own activities
+        # Activity from followed high-follower accounts is pulled on read
+        cursor.execute('''
+            SELECT fp.user_id FROM feed_pull_authors fp
+            JOIN follows f ON f.following_id = fp.user_id
+            WHERE f.follower_id = ?
+        ''', (user_id,))
+        pull_authors = [row[0] for row in cursor.fetchall()]
+        
+        # Everything else is a single range scan of the user's timeline; when
+        # merging, both sources must supply offset + limit candidates
+        window = limit + offset if pull_authors else limit
         cursor.execute('''
             SELECT af.*, su.username, su.display_name, su.avatar_url
-            FROM activity_feed af
+            FROM feed_timeline ft
+            JOIN activity_feed af ON af.activity_id = ft.activity_id
             JOIN social_users su ON af.user_id = su.user_id
-            WHERE af.user_id IN (
-                SELECT following_id FROM follows WHERE follower_id = ?
-                UNION
-                SELECT ?
-            )
-            AND af.visibility = 'public'
-            ORDER BY af.activity_date DESC
+            WHERE ft.owner_id = ?
+            ORDER BY ft.activity_date DESC, ft.activity_id DESC
             LIMIT ? OFFSET ?
-        ''', (user_id, user_id, limit, offset))
+        ''', (user_id, window, 0 if pull_authors else offset))
         
         activities = cursor.fetchall()
+        
+        if pull_authors:
+            placeholders = ', '.join('?' for _ in pull_authors)
+            cursor.execute(f'''
+                SELECT af.*, su.username, su.display_name, su.avatar_url
+                FROM activity_feed af
+                JOIN social_users su ON af.user_id = su.user_id
+                WHERE af.user_id IN ({placeholders})
+                AND af.visibility = 'public'
+                ORDER BY af.activity_date DESC, af.activity_id DESC
+                LIMIT ?
+            ''', (*pull_authors, window))
+            
+            seen = {activity[0] for activity in activities}
+            activities.extend(a for a in cursor.fetchall() if a[0] not in seen)
+            activities.sort(key=lambda a: (a[6], a[0]), reverse=True)
+            activities = activities[offset:offset + limit]
+        
         conn.close()
         
         # Format activities for display
-        formatted_activities = []
-        for activity in activities:
-            formatted_activity = {
-                'activity_id': activity[0],
-                'user_id': activity[1],
-                'username': activity[8],
-                'display_name': activity[9],
-                'avatar_url': activity[10],
-                'activity_type': activity[2],
-                'target_type': activity[3],
-                'target_id': activity[4],
-                'activity_data': json.loads(activity[5]) if activity[5] else {},
-                'activity_date': activity[6],
-                'visibility': activity[7]
-            }
-            formatted_activities.append(formatted_activity)
-        
-        return formatted_activities
+        return [self._format_activity(activity) for activity in activities]
+    
+    def get_user_feed_page(self, user_id: str, limit: int = 20, cursor: str = None) -> Dict:
+        """
+        Feed page for infinite scroll: each page seeks from the previous
+        page's last (activity_date, activity_id), so cost does not grow with depth
+        """
+        
+        try:
+            after = _decode_cursor(cursor, 2)
+        except ValueError:
+            return {'error': 'Invalid cursor'}
+        
+        seek, seek_params = '', ()
+        if after:
+            seek, seek_params = 'AND (af.activity_date, af.activity_id) < (?, ?)', tuple(after)
+        
+        conn = self.backend.connect()
+        db_cursor = conn.cursor()
+        
+        db_cursor.execute('''
+            SELECT fp.user_id FROM feed_pull_authors fp
+            JOIN follows f ON f.following_id = fp.user_id
+            WHERE f.follower_id = ?
+        ''', (user_id,))
+        pull_authors = [row[0] for row in db_cursor.fetchall()]
+        
+        # One extra row tells us whether another page exists
+        db_cursor.execute(f'''
+            SELECT af.*, su.username, su.display_name, su.avatar_url
+            FROM feed_timeline ft
+            JOIN activity_feed af ON af.activity_id = ft.activity_id
+            JOIN social_users su ON af.user_id = su.user_id
+            WHERE ft.owner_id = ? {seek.replace('af.', 'ft.')}
+            ORDER BY ft.activity_date DESC, ft.activity_id DESC
+            LIMIT ?
+        ''', (user_id, *seek_params, limit + 1))
+        activities = db_cursor.fetchall()
+        
+        if pull_authors:
+            placeholders = ', '.join('?' for _ in pull_authors)
+            db_cursor.execute(f'''
+                SELECT af.*, su.username, su.display_name, su.avatar_url
+                FROM activity_feed af
+                JOIN social_users su ON af.user_id = su.user_id
+                WHERE af.user_id IN ({placeholders})
+                AND af.visibility = 'public' {seek}
+                ORDER BY af.activity_date DESC, af.activity_id DESC
+                LIMIT ?
+            ''', (*pull_authors, *seek_params, limit + 1))
+            
+            seen = {activity[0] for activity in activities}
+            activities.extend(a for a in db_cursor.fetchall() if a[0] not in seen)
+            activities.sort(key=lambda a: (a[6], a[0]), reverse=True)
+        
+        conn.close()
+        
+        page = activities[:limit]
+        next_cursor = None
+        if len(activities) > limit:
+            next_cursor = _encode_cursor(page[-1][6], page[-1][0])
+        
+        return {'items': [self._format_activity(activity) for activity in page],
+                'next_cursor': next_cursor}
+    
+    def get_shared_swings_page(self, limit: int = 20, cursor: str = None,
+                               user_id: str = None, viewer_id: str = None) -> Dict:
+        """
+        Newest shared swings, community-wide or for one user, keyset-paginated
+        on (share_date, share_id). Privacy follows the viewer's relationship.
+        """
+        
+        try:
+            after = _decode_cursor(cursor, 2)
+        except ValueError:
+            return {'error': 'Invalid cursor'}
+        
+        conditions, params = [], []
+        if user_id:
+            conditions.append('ss.user_id = ?')
+            params.append(user_id)
+            if viewer_id != user_id:
+                levels = ['public']
+                if self._are_friends(user_id, viewer_id):
+                    levels.append('friends')
+                conditions.append(f"ss.privacy_level IN ({', '.join('?' for _ in levels)})")
+                params.extend(levels)
+        else:
+            conditions.append("ss.privacy_level = 'public'")
+        
+        if after:
+            conditions.append('(ss.share_date, ss.share_id) < (?, ?)')
+            params.extend(after)
+        
+        conn = self.backend.connect()
+        db_cursor = conn.cursor()
+        db_cursor.execute(f'''
+            SELECT {SHARED_SWING_COLUMNS}, su.username, su.display_name, su.avatar_url
+            FROM shared_swings ss
+            JOIN social_users su ON ss.user_id = su.user_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY ss.share_date DESC, ss.share_id DESC
+            LIMIT ?
+        ''', (*params, limit + 1))
+        swings = db_cursor.fetchall()
+        conn.close()
+        
+        page = swings[:limit]
+        next_cursor = None
+        if len(swings) > limit:
+            next_cursor = _encode_cursor(page[-1][9], page[-1][0])
+        
+        return {'items': [self._format_shared_swing(swing) for swing in page],
+                'next_cursor': next_cursor}
+    
+    def get_comments_page(self, target_type: str, target_id: str,
+                          parent_comment_id: str = None, limit: int = 20,
+                          cursor: str = None) -> Dict:
+        """
+        One level of a comment thread, oldest first. Top-level comments by
+        default; pass parent_comment_id to page through its replies. Each
+        comment carries its reply_count so clients can expand threads.
+        """
+        
+        try:
+            after = _decode_cursor(cursor, 2)
+        except ValueError:
+            return {'error': 'Invalid cursor'}
+        
+        conditions = ['c.target_type = ?', 'c.target_id = ?']
+        params = [target_type, target_id]
+        if parent_comment_id:
+            conditions.append('c.parent_comment_id = ?')
+            params.append(parent_comment_id)
+        else:
+            conditions.append('c.parent_comment_id IS NULL')
+        if after:
+            conditions.append('(c.comment_date, c.comment_id) > (?, ?)')
+            params.extend(after)
+        
+        conn = self.backend.connect()
+        db_cursor = conn.cursor()
+        db_cursor.execute(f'''
+            SELECT c.comment_id, c.user_id, su.username, su.display_name, su.avatar_url,
+                   c.parent_comment_id, c.content, c.comment_date, c.like_count
+            FROM comments c
+            JOIN social_users su ON c.user_id = su.user_id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY c.comment_date, c.comment_id
+            LIMIT ?
+        ''', (*params, limit + 1))
+        comments = db_cursor.fetchall()
+        page = comments[:limit]
+        
+        reply_counts = {}
+        if page:
+            placeholders = ', '.join('?' for _ in page)
+            db_cursor.execute(f'''
+                SELECT parent_comment_id, COUNT(*) FROM comments
+                WHERE parent_comment_id IN ({placeholders})
+                GROUP BY parent_comment_id
+            ''', [comment[0] for comment in page])
+            reply_counts = dict(db_cursor.fetchall())
+        conn.close()
+        
+        next_cursor = None
+        if len(comments) > limit:
+            next_cursor = _encode_cursor(page[-1][7], page[-1][0])
+        
+        return {
+            'items': [
+                {
+                    'comment_id': comment[0],
+                    'user_id': comment[1],
+                    'username': comment[2],
+                    'display_name': comment[3],
+                    'avatar_url': comment[4],
+                    'parent_comment_id': comment[5],
+                    'content': comment[6],
+                    'comment_date': comment[7],
+                    'like_count': comment[8],
+                    'reply_count': reply_counts.get(comment[0], 0)
+                } for comment in page
+            ],
+            'next_cursor': next_cursor
+        }
+    
+    def get_challenge_participants_page(self, challenge_id: str, limit: int = 50,
+                                        cursor: str = None) -> Dict:
+        """Challenge participants in join order, keyset-paginated"""
+        
+        try:
+            after = _decode_cursor(cursor, 2)
+        except ValueError:
+            return {'error': 'Invalid cursor'}
+        
+        seek, seek_params = '', ()
+        if after:
+            seek, seek_params = 'AND (cp.join_date, cp.participation_id) > (?, ?)', tuple(after)
+        
+        conn = self.backend.connect()
+        db_cursor = conn.cursor()
+        db_cursor.execute(f'''
+            SELECT cp.participation_id, cp.user_id, su.username, su.display_name,
+                   su.avatar_url, cp.join_date, cp.best_score, cp.submission_count
+            FROM challenge_participants cp
+            JOIN social_users su ON cp.user_id = su.user_id
+            WHERE cp.challenge_id = ? {seek}
+            ORDER BY cp.join_date, cp.participation_id
+            LIMIT ?
+        ''', (challenge_id, *seek_params, limit + 1))
+        participants = db_cursor.fetchall()
+        conn.close()
+        
+        page = participants[:limit]
+        next_cursor = None
+        if len(participants) > limit:
+            next_cursor = _encode_cursor(page[-1][5], page[-1][0])
+        
+        return {
+            'items': [
+                {
+                    'participation_id': participant[0],
+                    'user_id': participant[1],
+                    'username': participant[2],
+                    'display_name': participant[3],
+                    'avatar_url': participant[4],
+                    'join_date': participant[5],
+                    'best_score': participant[6],
+                    'submission_count': participant[7]
+                } for participant in page
+            ],
+            'next_cursor': next_cursor
+        }
+    
+    def get_leaderboard_page(self, leaderboard_type: str = 'overall',
+                             time_period: str = 'all_time', limit: int = 50,
+                             cursor: str = None) -> Dict:
+        """Leaderboard page continuing after the last (score, user_id) seen"""
+        
+        if leaderboard_type not in LEADERBOARD_TYPES:
+            return {'error': 'Unknown leaderboard'}
+        try:
+            after = _decode_cursor(cursor, 2)
+        except ValueError:
+            return {'error': 'Invalid cursor'}
+        
+        entries = self.leaderboards.page(leaderboard_type, time_period, limit + 1,
+                                         after=tuple(after) if after else None)
+        page = entries[:limit]
+        next_cursor = None
+        if len(entries) > limit:
+            _, last_user_id, last_score = page[-1]
+            next_cursor = _encode_cursor(last_score, last_user_id)
+        
+        return {'items': self._format_leaderboard_entries(page), 'next_cursor': next_cursor}
+    
+    def search(self, query: str, types: Tuple[str, ...] = ('shared_swings', 'users', 'groups'),
+               limit: int = 20, viewer_id: str = None) -> Dict[str, List[Dict]]:
+        """
+        Ranked search across public shared swings, users and groups.
+        Words are matched (stemmed) against titles, names, descriptions and
+        tags; #tag terms filter swings and groups to exact tags.
+        """
+        
+        conn = self.backend.connect()
+        cursor = conn.cursor()
+        results = {}
+        
+        try:
+            if 'shared_swings' in types:
+                share_ids = self.search_index.search_shared_swings(cursor, query, limit)
+                swings = {}
+                if share_ids:
+                    placeholders = ','.join('?' * len(share_ids))
+                    cursor.execute(f'''
+                        SELECT {SHARED_SWING_COLUMNS}, su.username, su.display_name, su.avatar_url
+                        FROM shared_swings ss
+                        JOIN social_users su ON ss.user_id = su.user_id
+                        WHERE ss.share_id IN ({placeholders})
+                    ''', share_ids)
+                    swings = {row[0]: row for row in cursor.fetchall()}
+                results['shared_swings'] = [self._format_shared_swing(swings[share_id])
+                                            for share_id in share_ids if share_id in swings]
+            
+            if 'groups' in types:
+                group_ids = self.search_index.search_groups(cursor, query, limit)
+                groups = {}
+                if group_ids:
+                    placeholders = ','.join('?' * len(group_ids))
+                    cursor.execute(f'''
+                        SELECT group_id, name, description, avatar_url, member_count, tags
+                        FROM groups WHERE group_id IN ({placeholders})
+                    ''', group_ids)
+                    groups = {row[0]: row for row in cursor.fetchall()}
+                results['groups'] = [
+                    {
+                        'group_id': group[0],
+                        'name': group[1],
+                        'description': group[2],
+                        'avatar_url': group[3],
+                        'member_count': group[4],
+                        'tags': json.loads(group[5]) if group[5] else []
+                    } for group in (groups[group_id] for group_id in group_ids if group_id in groups)
+                ]
+            
+            user_ids = self.search_index.search_users(cursor, query, limit) if 'users' in types else []
+        finally:
+            conn.close()
+        
+        if 'users' in types:
+            profiles = self.get_user_profiles(user_ids, viewer_id)
+            results['users'] = [profiles[user_id] for user_id in user_ids if user_id in profiles]
+        
+        return results
+    
+    def autocomplete(self, prefix: str, limit: int = 10) -> Dict[str, List[str]]:
+        """Search-as-you-type suggestions: usernames, tags and group names"""
+        
+        conn = self.backend.connect()
+        try:
+            return self.search_index.autocomplete(conn.cursor(), prefix, limit)
+        finally:
+            conn.close()
+    
+    def _format_activity(self, activity) -> Dict:
+        """Format an activity_feed row (plus author columns) for API response"""
+        
+        return {
+            'activity_id': activity[0],
+            'user_id': activity[1],
+            'username': activity[8],
+            'display_name': activity[9],
+            'avatar_url': activity[10],
+            'activity_type': activity[2],
+            'target_type': activity[3],
+            'target_id': activity[4],
+            'activity_data': json.loads(activity[5]) if activity[5] else {},
+            'activity_date': activity[6],
+            'visibility': activity[7]
+        }
     
     def get_trending_swings(self, limit: int = 10, time_period: str = '24h') -> List[Dict]:
         """Get trending swing shares based on engagement"""
         
-        # Calculate time cutoff
-        if time_period == '24h':
-            cutoff = datetime.now() - timedelta(days=1)
-        elif time_period == '7d':
-            cutoff = datetime.now() - timedelta(days=7)
-        else:  # 30d
-            cutoff = datetime.now() - timedelta(days=30)
+        window_key = time_period if time_period in TRENDING_WINDOWS else '30d'
+        return self.cache.get_or_load('trending', f'{window_key}:{limit}',
+                                      lambda: self._load_trending_swings(window_key, limit),
+                                      TRENDING_CACHE_TTL)
+    
+    def _load_trending_swings(self, window_key: str, limit: int) -> List[Dict]:
+        window, _ = TRENDING_WINDOWS[window_key]
+        cutoff = datetime.now() - window
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
         
-        cursor.execute('''
-            SELECT ss.*, su.username, su.display_name, su.avatar_url,
-                   (ss.like_count + ss.comment_count * 2 + ss.view_count * 0.1) as engagement_score
-            FROM shared_swings ss
+        if time.time() - self._last_trending_compaction > TRENDING_COMPACTION_INTERVAL:
+            self._compact_trending_index(cursor)
+            conn.commit()
+        
+        # Top-k walk of the (time_window, score) index
+        cursor.execute(f'''
+            SELECT {SHARED_SWING_COLUMNS}, su.username, su.display_name, su.avatar_url
+            FROM trending_index ti
+            JOIN shared_swings ss ON ss.share_id = ti.share_id
             JOIN social_users su ON ss.user_id = su.user_id
-            WHERE ss.privacy_level = 'public' 
-            AND ss.share_date >= ?
-            ORDER BY engagement_score DESC
+            WHERE ti.time_window = ?
+            AND ti.share_date >= ?
+            ORDER BY ti.score DESC
             LIMIT ?
-        ''', (cutoff.isoformat(), limit))
+        ''', (window_key, cutoff.isoformat(), limit))
         
         trending = cursor.fetchall()
         conn.close()
@@ -390,146 +1087,213 @@ class SocialPlatform:
     
     def create_challenge(self, creator_id: str, title: str, description: str,
                         challenge_type: str, target_metric: str, target_value: float,
-                        duration_days: int = 7, entry_fee: int = 0) -> Dict:
+                        duration_days: int = 7, entry_fee: int = 0,
+                        max_participants: int = None) -> Dict:
         """Create a new community challenge"""
         
         challenge_id = str(uuid.uuid4())
         start_date = datetime.now()
         end_date = start_date + timedelta(days=duration_days)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO challenges 
-            (challenge_id, creator_id, title, description, challenge_type,
-             target_metric, target_value, start_date, end_date, entry_fee)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (challenge_id, creator_id, title, description, challenge_type,
-              target_metric, target_value, start_date.isoformat(),
-              end_date.isoformat(), entry_fee))
-        
-        conn.commit()
-        conn.close()
-        
-        # Add to activity feed
-        self._add_activity(creator_id, 'create_challenge', 'challenge', challenge_id,
-                         {'title': title, 'type': challenge_type})
+        with self._transaction() as uow:
+            uow.cursor.execute('''
+                INSERT INTO challenges 
+                (challenge_id, creator_id, title, description, challenge_type,
+                 target_metric, target_value, start_date, end_date, entry_fee,
+                 max_participants)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (challenge_id, creator_id, title, description, challenge_type,
+                  target_metric, target_value, start_date.isoformat(),
+                  end_date.isoformat(), entry_fee, max_participants))
+            
+            # Add to activity feed
+            self._add_activity(uow, creator_id, 'create_challenge', 'challenge', challenge_id,
+                             {'title': title, 'type': challenge_type})
         
         return {'success': True, 'challenge_id': challenge_id}
     
     def join_challenge(self, user_id: str, challenge_id: str) -> Dict:
         """Join a community challenge"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if challenge exists and is open
-        cursor.execute('''
-            SELECT status, max_participants, current_participants
-            FROM challenges WHERE challenge_id = ?
-        ''', (challenge_id,))
-        
-        challenge = cursor.fetchone()
-        if not challenge:
-            conn.close()
-            return {'success': False, 'error': 'Challenge not found'}
-        
-        if challenge[0] != 'open':
-            conn.close()
-            return {'success': False, 'error': 'Challenge is not open'}
-        
-        if challenge[1] and challenge[2] >= challenge[1]:
-            conn.close()
-            return {'success': False, 'error': 'Challenge is full'}
-        
         try:
-            # Add participant
-            participation_id = str(uuid.uuid4())
-            cursor.execute('''
-                INSERT INTO challenge_participants 
-                (participation_id, challenge_id, user_id, join_date)
-                VALUES (?, ?, ?, ?)
-            ''', (participation_id, challenge_id, user_id, datetime.now().isoformat()))
-            
-            # Update participant count
-            cursor.execute('''
-                UPDATE challenges 
-                SET current_participants = current_participants + 1
-                WHERE challenge_id = ?
-            ''', (challenge_id,))
-            
-            conn.commit()
-            
-            # Add to activity feed
-            self._add_activity(user_id, 'join_challenge', 'challenge', challenge_id,
-                             {'action': 'joined'})
+            with self._transaction() as uow:
+                cursor = uow.cursor
+                
+                # Claim a seat atomically: the count only moves while the
+                # challenge is open and below capacity, so concurrent joins
+                # can never overfill it
+                cursor.execute('''
+                    UPDATE challenges 
+                    SET current_participants = current_participants + 1
+                    WHERE challenge_id = ? AND status = 'open'
+                    AND (max_participants IS NULL OR current_participants < max_participants)
+                ''', (challenge_id,))
+                
+                if cursor.rowcount != 1:
+                    cursor.execute('SELECT status FROM challenges WHERE challenge_id = ?',
+                                   (challenge_id,))
+                    challenge = cursor.fetchone()
+                    if not challenge:
+                        return {'success': False, 'error': 'Challenge not found'}
+                    if challenge[0] != 'open':
+                        return {'success': False, 'error': 'Challenge is not open'}
+                    return {'success': False, 'error': 'Challenge is full'}
+                
+                # Add participant; a repeat join hits the unique index and
+                # rolls the seat claim back with it
+                participation_id = str(uuid.uuid4())
+                cursor.execute('''
+                    INSERT INTO challenge_participants 
+                    (participation_id, challenge_id, user_id, join_date)
+                    VALUES (?, ?, ?, ?)
+                ''', (participation_id, challenge_id, user_id, datetime.now().isoformat()))
+                
+                # Add to activity feed
+                self._add_activity(uow, user_id, 'join_challenge', 'challenge', challenge_id,
+                                 {'action': 'joined'})
             
             return {'success': True, 'participation_id': participation_id}
             
-        except sqlite3.IntegrityError:
+        except self.backend.IntegrityError:
             return {'success': False, 'error': 'Already joined this challenge'}
-        finally:
-            conn.close()
+    
+    def submit_challenge_analyses(self, submissions: List[Tuple[str, Dict, Optional[str]]]) -> Dict:
+        """
+        Score (user_id, analysis_result, analysis_date) swing analyses against
+        every open challenge their users have joined; pass many at once
+        """
+        return self.challenges.ingest(submissions)
+    
+    def get_challenge_rankings(self, challenge_id: str, limit: int = 50,
+                               offset: int = 0) -> List[Dict]:
+        """Live challenge standings by best score"""
+        
+        entries = self.challenges.rankings(challenge_id, limit, offset)
+        return self._format_leaderboard_entries(entries)
+    
+    def get_challenge_rank(self, challenge_id: str, user_id: str) -> Dict:
+        """A participant's live rank in a challenge"""
+        
+        position = self.challenges.rank(challenge_id, user_id)
+        if position is None:
+            return {'user_id': user_id, 'ranked': False}
+        
+        rank, score = position
+        return {'user_id': user_id, 'ranked': True, 'rank': rank, 'best_score': score}
+    
+    def finalize_due_challenges(self) -> int:
+        """Close challenges past their end date and record final ranks"""
+        return self.challenges.finalize_due_challenges()
     
     def get_leaderboard(self, leaderboard_type: str = 'overall', 
-                       time_period: str = 'all_time', limit: int = 50) -> List[Dict]:
-        """Get community leaderboards"""
+                       time_period: str = 'all_time', limit: int = 50,
+                       offset: int = 0) -> List[Dict]:
+        """Get community leaderboards (overall, improvement or activity)"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        if leaderboard_type not in LEADERBOARD_TYPES:
+            return []
+        
+        entries = self.leaderboards.top(leaderboard_type, time_period, limit, offset)
+        return self._format_leaderboard_entries(entries)
+    
+    def get_user_rank(self, user_id: str, leaderboard_type: str = 'overall',
+                      time_period: str = 'all_time') -> Dict:
+        """A user's rank and score on one leaderboard"""
+        
+        if leaderboard_type not in LEADERBOARD_TYPES:
+            return {'error': 'Unknown leaderboard'}
         
-        if leaderboard_type == 'overall':
-            # Overall achievement points
+        position = self.leaderboards.rank(leaderboard_type, time_period, user_id)
+        if position is None:
+            return {'user_id': user_id, 'ranked': False}
+        
+        rank, score = position
+        return {
+            'user_id': user_id,
+            'ranked': True,
+            'rank': rank,
+            'score': score,
+            'total_ranked': self.leaderboards.size(leaderboard_type, time_period)
+        }
+    
+    def get_leaderboard_neighbors(self, user_id: str, leaderboard_type: str = 'overall',
+                                  time_period: str = 'all_time', radius: int = 5) -> List[Dict]:
+        """Leaderboard entries around a user (their rank +/- radius)"""
+        
+        if leaderboard_type not in LEADERBOARD_TYPES:
+            return []
+        
+        entries = self.leaderboards.neighbors(leaderboard_type, time_period, user_id, radius)
+        return self._format_leaderboard_entries(entries)
+    
+    def sync_swing_stats(self, user_id: str, stats: Dict) -> Dict:
+        """
+        Copy a player's swing stats (ProgressTracker.get_user_stats) into
+        their profile and the activity/improvement leaderboards
+        """
+        
+        total_swings = stats.get('total_swings', 0)
+        improvement = stats.get('improvement', 0)
+        
+        with self._transaction() as uow:
+            cursor = uow.cursor
             cursor.execute('''
-                SELECT su.user_id, su.username, su.display_name, su.avatar_url,
-                       su.achievement_points, su.total_swings, su.best_score
-                FROM social_users su
-                WHERE su.privacy_level IN ('public', 'friends')
-                ORDER BY su.achievement_points DESC
-                LIMIT ?
-            ''', (limit,))
+                SELECT total_swings, privacy_level FROM social_users WHERE user_id = ?
+            ''', (user_id,))
+            user = cursor.fetchone()
+            if not user:
+                return {'success': False, 'error': 'User not found'}
             
-        elif leaderboard_type == 'improvement':
-            # Most improved players (based on recent vs historical scores)
-            cursor.execute('''
-                SELECT su.user_id, su.username, su.display_name, su.avatar_url,
-                       su.achievement_points, su.total_swings, su.best_score
-                FROM social_users su
-                WHERE su.privacy_level IN ('public', 'friends')
-                AND su.total_swings >= 5
-                ORDER BY su.best_score DESC
-                LIMIT ?
-            ''', (limit,))
+            previous_swings, privacy_level = user
+            new_swings = total_swings - (previous_swings or 0)
             
-        elif leaderboard_type == 'activity':
-            # Most active players
             cursor.execute('''
-                SELECT su.user_id, su.username, su.display_name, su.avatar_url,
-                       su.achievement_points, su.total_swings, su.best_score
-                FROM social_users su
-                WHERE su.privacy_level IN ('public', 'friends')
-                ORDER BY su.total_swings DESC
-                LIMIT ?
-            ''', (limit,))
+                UPDATE social_users
+                SET total_swings = ?, best_score = ?, improvement_score = ?
+                WHERE user_id = ?
+            ''', (total_swings, stats.get('best_score', 0), improvement, user_id))
+            
+            if new_swings > 0:
+                cursor.execute('''
+                    INSERT INTO leaderboard_swing_days (user_id, day, swing_count)
+                    VALUES (?, ?, ?)
+                    ON CONFLICT (user_id, day) DO UPDATE SET
+                        swing_count = leaderboard_swing_days.swing_count + excluded.swing_count
+                ''', (user_id, datetime.now().date().isoformat(), new_swings))
+            
+            visible = privacy_level in ('public', 'friends')
+            if visible and new_swings:
+                uow.after_commit(self.leaderboards.adjust, 'activity', user_id, new_swings)
+            uow.after_commit(self.leaderboards.set_score, 'improvement', user_id, improvement,
+                             visible and total_swings >= IMPROVEMENT_MIN_SWINGS)
+            uow.after_commit(self._invalidate_profiles, user_id)
+        
+        return {'success': True, 'new_swings': max(new_swings, 0)}
+    
+    def _format_leaderboard_entries(self, entries: List[Tuple[int, str, float]]) -> List[Dict]:
+        """Attach profile fields to (rank, user_id, score) entries"""
         
-        leaderboard = cursor.fetchall()
-        conn.close()
+        if not entries:
+            return []
+        
+        cards = self._profile_cards([user_id for _, user_id, _ in entries])
         
-        # Format leaderboard
         formatted_leaderboard = []
-        for i, entry in enumerate(leaderboard):
-            formatted_entry = {
-                'rank': i + 1,
-                'user_id': entry[0],
-                'username': entry[1],
-                'display_name': entry[2],
-                'avatar_url': entry[3],
-                'achievement_points': entry[4],
-                'total_swings': entry[5],
-                'best_score': entry[6]
-            }
-            formatted_leaderboard.append(formatted_entry)
+        for rank, user_id, score in entries:
+            card = cards.get(user_id)
+            if not card:
+                continue
+            formatted_leaderboard.append({
+                'rank': rank,
+                'user_id': user_id,
+                'username': card['username'],
+                'display_name': card['display_name'],
+                'avatar_url': card['avatar_url'],
+                'achievement_points': card['achievement_points'],
+                'total_swings': card['total_swings'],
+                'best_score': card['best_score'],
+                'score': score
+            })
         
         return formatted_leaderboard
     
@@ -539,32 +1303,23 @@ class SocialPlatform:
         
         reaction_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         try:
-            cursor.execute('''
-                INSERT INTO reactions 
-                (reaction_id, user_id, target_type, target_id, reaction_type, reaction_date)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (reaction_id, user_id, target_type, target_id, reaction_type,
-                  datetime.now().isoformat()))
+            with self._transaction() as uow:
+                uow.cursor.execute('''
+                    INSERT INTO reactions 
+                    (reaction_id, user_id, target_type, target_id, reaction_type, reaction_date)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (reaction_id, user_id, target_type, target_id, reaction_type,
+                      datetime.now().isoformat()))
+                
+                # Like count on the target is coalesced and written in batches
+                if target_type == 'shared_swing':
+                    uow.after_commit(self.counters.increment, target_id, 'like_count')
             
-            # Update like count on target
-            if target_type == 'shared_swing':
-                cursor.execute('''
-                    UPDATE shared_swings 
-                    SET like_count = like_count + 1 
-                    WHERE share_id = ?
-                ''', (target_id,))
-            
-            conn.commit()
             return {'success': True, 'reaction_id': reaction_id}
             
-        except sqlite3.IntegrityError:
+        except self.backend.IntegrityError:
             return {'success': False, 'error': 'Already reacted'}
-        finally:
-            conn.close()
     
     def add_comment(self, user_id: str, target_type: str, target_id: str,
                    content: str, parent_comment_id: str = None) -> Dict:
@@ -572,118 +1327,256 @@ class SocialPlatform:
         
         comment_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._transaction() as uow:
+            uow.cursor.execute('''
+                INSERT INTO comments 
+                (comment_id, user_id, target_type, target_id, parent_comment_id, 
+                 content, comment_date)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (comment_id, user_id, target_type, target_id, parent_comment_id,
+                  content, datetime.now().isoformat()))
+            
+            # Comment count on the target is coalesced and written in batches
+            if target_type == 'shared_swing':
+                uow.after_commit(self.counters.increment, target_id, 'comment_count')
+            
+            # Add to activity feed
+            self._add_activity(uow, user_id, 'comment', target_type, target_id,
+                             {'content': content[:100]})  # Truncate for feed
         
-        cursor.execute('''
-            INSERT INTO comments 
-            (comment_id, user_id, target_type, target_id, parent_comment_id, 
-             content, comment_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (comment_id, user_id, target_type, target_id, parent_comment_id,
-              content, datetime.now().isoformat()))
+        return {'success': True, 'comment_id': comment_id}
+    
+    def record_view(self, share_id: str) -> Dict:
+        """Count a view of a shared swing (buffered, no write on this path)"""
+        
+        self.counters.increment(share_id, 'view_count')
+        return {'success': True}
+    
+    def flush_counters(self) -> int:
+        """Write buffered like/comment/view counts now; returns shares updated"""
+        return self.counters.flush()
+    
+    def _apply_counter_batch(self, flush_id: str, deltas: Dict[str, Dict[str, int]]):
+        """Apply one buffered batch of counter deltas in a single transaction"""
         
-        # Update comment count on target
-        if target_type == 'shared_swing':
+        with self._transaction() as uow:
+            cursor = uow.cursor
             cursor.execute('''
-                UPDATE shared_swings 
-                SET comment_count = comment_count + 1 
+                INSERT OR IGNORE INTO counter_flushes (flush_id, flush_date)
+                VALUES (?, ?)
+            ''', (flush_id, datetime.now().isoformat()))
+            if cursor.rowcount == 0:
+                return  # Already applied before a crash; this is a replay
+            
+            cursor.executemany('''
+                UPDATE shared_swings
+                SET like_count = like_count + ?,
+                    comment_count = comment_count + ?,
+                    view_count = view_count + ?
                 WHERE share_id = ?
-            ''', (target_id,))
+            ''', [tuple(fields.get(column, 0) for column in SHARE_COUNTERS) + (share_id,)
+                  for share_id, fields in deltas.items()])
+            
+            for share_id in deltas:
+                self._update_trending(cursor, share_id)
+            
+            # Replays only ever follow a restart, so old flush ids can go
+            cursor.execute('DELETE FROM counter_flushes WHERE flush_date < ?',
+                           ((datetime.now() - timedelta(days=7)).isoformat(),))
+    
+    def _trending_score(self, engagement: float, share_date: str, decay_seconds: int) -> float:
+        """Log-scaled engagement plus a freshness bonus that grows with share time"""
+        share_timestamp = datetime.fromisoformat(share_date).timestamp()
+        return math.log10(1 + max(engagement, 0)) + share_timestamp / decay_seconds
+    
+    def _update_trending(self, cursor, share_id: str):
+        """Re-score one share in every trending window it still belongs to"""
         
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+            SELECT share_date, privacy_level,
+                   like_count + comment_count * 2 + view_count * 0.1
+            FROM shared_swings WHERE share_id = ?
+        ''', (share_id,))
+        share = cursor.fetchone()
+        if not share:
+            return
+        
+        share_date, privacy_level, engagement = share
+        if privacy_level != 'public':
+            cursor.execute('DELETE FROM trending_index WHERE share_id = ?', (share_id,))
+            return
+        
+        now = datetime.now()
+        for window_key, (window, decay_seconds) in TRENDING_WINDOWS.items():
+            if share_date < (now - window).isoformat():
+                continue
+            cursor.execute('''
+                INSERT INTO trending_index (time_window, share_id, share_date, score)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (time_window, share_id) DO UPDATE SET score = excluded.score
+            ''', (window_key, share_id, share_date,
+                  self._trending_score(engagement, share_date, decay_seconds)))
+    
+    def _compact_trending_index(self, cursor):
+        """Drop entries that have aged out of their window"""
         
-        # Add to activity feed
-        self._add_activity(user_id, 'comment', target_type, target_id,
-                         {'content': content[:100]})  # Truncate for feed
+        now = datetime.now()
+        for window_key, (window, _) in TRENDING_WINDOWS.items():
+            cursor.execute('''
+                DELETE FROM trending_index WHERE time_window = ? AND share_date < ?
+            ''', (window_key, (now - window).isoformat()))
+        self._last_trending_compaction = time.time()
+    
+    def _rebuild_trending_index(self, cursor):
+        """Score every recent public share (one-off migration)"""
         
-        return {'success': True, 'comment_id': comment_id}
+        cutoff = datetime.now() - max(window for window, _ in TRENDING_WINDOWS.values())
+        cursor.execute('''
+            SELECT share_id FROM shared_swings
+            WHERE privacy_level = 'public' AND share_date >= ?
+        ''', (cutoff.isoformat(),))
+        for (share_id,) in cursor.fetchall():
+            self._update_trending(cursor, share_id)
     
-    def _grant_achievement(self, user_id: str, achievement_type: str, 
-                          name: str, description: str, points: int):
-        """Grant achievement to user"""
+    def _grant_achievement(self, uow: _UnitOfWork, user_id: str, achievement_type: str, 
+                          name: str, description: str, points: int) -> bool:
+        """Grant achievement to user inside uow; False if they already have it"""
         
         achievement_id = str(uuid.uuid4())
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        uow.cursor.execute('''
+            INSERT OR IGNORE INTO achievements 
+            (achievement_id, user_id, achievement_type, achievement_name,
+             description, achievement_date, points)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (achievement_id, user_id, achievement_type, name, description,
+              datetime.now().isoformat(), points))
+        if uow.cursor.rowcount != 1:
+            return False  # Achievement already granted
+        
+        # Update user's achievement points
+        uow.cursor.execute('''
+            UPDATE social_users 
+            SET achievement_points = achievement_points + ?
+            WHERE user_id = ?
+        ''', (points, user_id))
+        uow.after_commit(self.leaderboards.adjust, 'overall', user_id, points)
+        uow.after_commit(self._invalidate_profiles, user_id)
         
-        try:
+        # Add to activity feed
+        self._add_activity(uow, user_id, 'achievement', 'achievement', achievement_id,
+                         {'name': name, 'points': points})
+        return True
+    
+    def _add_activity(self, uow: _UnitOfWork, user_id: str, activity_type: str,
+                     target_type: str, target_id: str, activity_data: Dict,
+                     visibility: str = 'public'):
+        """Queue an activity; it is written with the rest of uow at commit"""
+        
+        uow.activities.append((str(uuid.uuid4()), user_id, activity_type, target_type,
+                               target_id, json.dumps(activity_data),
+                               datetime.now().isoformat(), visibility))
+    
+    def _write_activities(self, cursor, activities: List[Tuple]):
+        """Insert queued activities in one batch and fan them out to timelines"""
+        
+        if not activities:
+            return
+        
+        cursor.executemany('''
+            INSERT INTO activity_feed 
+            (activity_id, user_id, activity_type, target_type, target_id,
+             activity_data, activity_date, visibility)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', activities)
+        
+        public = [activity for activity in activities if activity[7] == 'public']
+        for author_id in sorted({activity[1] for activity in public}):
+            self._fan_out_activities(cursor, author_id,
+                                     [(activity[0], activity[6]) for activity in public
+                                      if activity[1] == author_id])
+    
+    def _fan_out_activities(self, cursor, user_id: str, activities: List[Tuple[str, str]]):
+        """Write one author's (activity_id, activity_date) pairs into timelines"""
+        
+        cursor.executemany('''
+            INSERT OR IGNORE INTO feed_timeline (owner_id, activity_date, activity_id, author_id)
+            VALUES (?, ?, ?, ?)
+        ''', [(user_id, activity_date, activity_id, user_id)
+              for activity_id, activity_date in activities])
+        
+        # Count followers only up to the limit - enough to pick a strategy
+        cursor.execute('''
+            SELECT COUNT(*) FROM (
+                SELECT 1 FROM follows WHERE following_id = ? LIMIT ?
+            ) capped
+        ''', (user_id, self.fanout_limit + 1))
+        
+        if cursor.fetchone()[0] > self.fanout_limit:
             cursor.execute('''
-                INSERT INTO achievements 
-                (achievement_id, user_id, achievement_type, achievement_name,
-                 description, achievement_date, points)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (achievement_id, user_id, achievement_type, name, description,
-                  datetime.now().isoformat(), points))
-            
-            # Update user's achievement points
+                INSERT OR IGNORE INTO feed_pull_authors (user_id) VALUES (?)
+            ''', (user_id,))
+            return
+        
+        for activity_id, activity_date in activities:
             cursor.execute('''
-                UPDATE social_users 
-                SET achievement_points = achievement_points + ?
-                WHERE user_id = ?
-            ''', (points, user_id))
-            
-            conn.commit()
-            
-            # Add to activity feed
-            self._add_activity(user_id, 'achievement', 'achievement', achievement_id,
-                             {'name': name, 'points': points})
-            
-        except sqlite3.IntegrityError:
-            pass  # Achievement already granted
-        finally:
-            conn.close()
+                INSERT OR IGNORE INTO feed_timeline (owner_id, activity_date, activity_id, author_id)
+                SELECT follower_id, ?, ?, ?
+                FROM follows WHERE following_id = ?
+            ''', (activity_date, activity_id, user_id, user_id))
     
-    def _add_activity(self, user_id: str, activity_type: str, target_type: str,
-                     target_id: str, activity_data: Dict):
-        """Add activity to user's feed"""
-        
-        activity_id = str(uuid.uuid4())
+    def _rebuild_feed_timelines(self, cursor):
+        """Materialize every timeline from activity_feed (one-off migration)"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT OR IGNORE INTO feed_pull_authors (user_id)
+            SELECT following_id FROM follows
+            GROUP BY following_id
+            HAVING COUNT(*) > ?
+        ''', (self.fanout_limit,))
         
         cursor.execute('''
-            INSERT INTO activity_feed 
-            (activity_id, user_id, activity_type, target_type, target_id,
-             activity_data, activity_date)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (activity_id, user_id, activity_type, target_type, target_id,
-              json.dumps(activity_data), datetime.now().isoformat()))
+            INSERT OR IGNORE INTO feed_timeline (owner_id, activity_date, activity_id, author_id)
+            SELECT user_id, activity_date, activity_id, user_id
+            FROM activity_feed WHERE visibility = 'public'
+        ''')
         
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+            INSERT OR IGNORE INTO feed_timeline (owner_id, activity_date, activity_id, author_id)
+            SELECT f.follower_id, af.activity_date, af.activity_id, af.user_id
+            FROM activity_feed af
+            JOIN follows f ON f.following_id = af.user_id
+            WHERE af.visibility = 'public'
+            AND af.user_id NOT IN (SELECT user_id FROM feed_pull_authors)
+        ''')
     
-    def _check_sharing_achievements(self, user_id: str):
+    def _check_sharing_achievements(self, uow: _UnitOfWork, user_id: str):
         """Check and grant sharing-related achievements"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         # Count user's shares
-        cursor.execute('''
+        uow.cursor.execute('''
             SELECT COUNT(*) FROM shared_swings WHERE user_id = ?
         ''', (user_id,))
         
-        share_count = cursor.fetchone()[0]
-        conn.close()
+        share_count = uow.cursor.fetchone()[0]
         
         # Grant achievements based on share count
         if share_count == 1:
-            self._grant_achievement(user_id, 'first_share', 'First Share',
+            self._grant_achievement(uow, user_id, 'first_share', 'First Share',
                                   'Shared your first swing', 100)
         elif share_count == 5:
-            self._grant_achievement(user_id, 'active_sharer', 'Active Sharer',
+            self._grant_achievement(uow, user_id, 'active_sharer', 'Active Sharer',
                                   'Shared 5 swings', 250)
         elif share_count == 25:
-            self._grant_achievement(user_id, 'swing_ambassador', 'Swing Ambassador',
+            self._grant_achievement(uow, user_id, 'swing_ambassador', 'Swing Ambassador',
                                   'Shared 25 swings', 500)
     
     def _format_shared_swing(self, swing_data) -> Dict:
         """Format shared swing data for API response"""
         
+        # Include counts that are still buffered
+        pending = self.counters.pending(swing_data[0])
+        
         return {
             'share_id': swing_data[0],
             'user_id': swing_data[1],
@@ -695,9 +1588,9 @@ class SocialPlatform:
             'privacy_level': swing_data[7],
             'allow_comments': swing_data[8],
             'share_date': swing_data[9],
-            'view_count': swing_data[10],
-            'like_count': swing_data[11],
-            'comment_count': swing_data[12],
+            'view_count': swing_data[10] + pending.get('view_count', 0),
+            'like_count': swing_data[11] + pending.get('like_count', 0),
+            'comment_count': swing_data[12] + pending.get('comment_count', 0),
             'tags': json.loads(swing_data[13]) if swing_data[13] else [],
             'username': swing_data[14] if len(swing_data) > 14 else None,
             'display_name': swing_data[15] if len(swing_data) > 15 else None,
@@ -707,84 +1600,127 @@ class SocialPlatform:
     def get_user_profile(self, user_id: str, viewer_id: str = None) -> Dict:
         """Get user's social profile with privacy filtering"""
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM social_users WHERE user_id = ?
-        ''', (user_id,))
-        
-        user = cursor.fetchone()
-        if not user:
-            conn.close()
-            return {'error': 'User not found'}
-        
-        # Check if viewer can see full profile
-        can_view_full = (user_id == viewer_id or 
-                        user[8] == 'public' or  # privacy_level
-                        self._are_friends(user_id, viewer_id))
-        
-        # Get follower/following counts
-        cursor.execute('SELECT COUNT(*) FROM follows WHERE following_id = ?', (user_id,))
-        follower_count = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM follows WHERE follower_id = ?', (user_id,))
-        following_count = cursor.fetchone()[0]
-        
-        # Get recent achievements
-        cursor.execute('''
-            SELECT achievement_name, description, points, achievement_date
-            FROM achievements WHERE user_id = ?
-            ORDER BY achievement_date DESC LIMIT 5
-        ''', (user_id,))
+        profiles = self.get_user_profiles([user_id], viewer_id)
+        return profiles.get(user_id, {'error': 'User not found'})
+    
+    def get_user_profiles(self, user_ids: List[str], viewer_id: str = None) -> Dict[str, Dict]:
+        """
+        Profiles for many users as seen by viewer_id, keyed by user id.
+        Cards come from the cache; misses are loaded with a fixed handful of
+        set-based queries per chunk of ids. Unknown ids are left out.
+        """
+        
+        cards = self._profile_cards(user_ids)
+        
+        # Users who follow the viewer and are followed back (friends)
+        friends = set(self.follow_graph.friends(viewer_id)) if viewer_id and cards else set()
+        
+        profiles = {}
+        for user_id, card in cards.items():
+            # Check if viewer can see full profile
+            can_view_full = (user_id == viewer_id or
+                             card['privacy_level'] == 'public' or
+                             user_id in friends)
+            profile = dict(card)
+            del profile['privacy_level']
+            if not can_view_full:
+                profile.update(bio=None, location=None, handicap=None)
+            profiles[user_id] = profile
+        
+        return profiles
+    
+    def _profile_cards(self, user_ids: List[str]) -> Dict[str, Dict]:
+        """Unfiltered profile fields per user id, read through the cache"""
         
-        recent_achievements = cursor.fetchall()
+        cards = self.cache.get_many_or_load('profile', user_ids, self._load_profile_cards,
+                                            PROFILE_CACHE_TTL)
+        # Unknown ids are cached as None so repeated misses stay cheap
+        return {user_id: card for user_id, card in cards.items() if card}
+    
+    def _load_profile_cards(self, user_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        cards = dict.fromkeys(user_ids)
         
-        conn.close()
+        conn = self.backend.connect()
+        cursor = conn.cursor()
         
-        profile = {
-            'user_id': user[0],
-            'username': user[1],
-            'display_name': user[2],
-            'bio': user[4] if can_view_full else None,
-            'avatar_url': user[5],
-            'location': user[6] if can_view_full else None,
-            'handicap': user[7] if can_view_full else None,
-            'join_date': user[9],
-            'total_swings': user[10],
-            'best_score': user[11],
-            'achievement_points': user[12],
-            'verified': user[13],
-            'follower_count': follower_count,
-            'following_count': following_count,
-            'recent_achievements': [
-                {
-                    'name': ach[0],
-                    'description': ach[1],
-                    'points': ach[2],
-                    'date': ach[3]
-                } for ach in recent_achievements
-            ]
-        }
+        try:
+            for start in range(0, len(user_ids), PROFILE_BATCH_SIZE):
+                chunk = user_ids[start:start + PROFILE_BATCH_SIZE]
+                placeholders = ','.join('?' * len(chunk))
+                
+                cursor.execute(f'''
+                    SELECT user_id, username, display_name, bio, avatar_url, location,
+                           handicap, privacy_level, join_date, total_swings, best_score,
+                           achievement_points, verified, follower_count, following_count
+                    FROM social_users WHERE user_id IN ({placeholders})
+                ''', chunk)
+                users = cursor.fetchall()
+                if not users:
+                    continue
+                
+                # Five most recent achievements per user in one pass
+                cursor.execute(f'''
+                    SELECT user_id, achievement_name, description, points, achievement_date
+                    FROM (
+                        SELECT user_id, achievement_name, description, points, achievement_date,
+                               ROW_NUMBER() OVER (
+                                   PARTITION BY user_id ORDER BY achievement_date DESC
+                               ) AS position
+                        FROM achievements WHERE user_id IN ({placeholders})
+                    ) ranked
+                    WHERE position <= 5
+                    ORDER BY user_id, achievement_date DESC
+                ''', chunk)
+                recent_achievements = {}
+                for row in cursor.fetchall():
+                    recent_achievements.setdefault(row[0], []).append({
+                        'name': row[1],
+                        'description': row[2],
+                        'points': row[3],
+                        'date': row[4]
+                    })
+                
+                for user in users:
+                    cards[user[0]] = {
+                        'user_id': user[0],
+                        'username': user[1],
+                        'display_name': user[2],
+                        'bio': user[3],
+                        'avatar_url': user[4],
+                        'location': user[5],
+                        'handicap': user[6],
+                        'privacy_level': user[7],
+                        'join_date': user[8],
+                        'total_swings': user[9],
+                        'best_score': user[10],
+                        'achievement_points': user[11],
+                        'verified': user[12],
+                        'follower_count': user[13],
+                        'following_count': user[14],
+                        'recent_achievements': recent_achievements.get(user[0], [])
+                    }
+        finally:
+            conn.close()
         
-        return profile
+        return cards
+    
+    def _invalidate_profiles(self, *user_ids: str):
+        self.cache.invalidate('profile', *user_ids)
     
     def _are_friends(self, user1_id: str, user2_id: str) -> bool:
         """Check if two users follow each other (mutual follow = friends)"""
+        return self.follow_graph.are_mutual(user1_id, user2_id)
+    
+    def get_friends_who_liked(self, user_id: str, share_id: str) -> List[str]:
+        """Friends of user_id who reacted to a shared swing"""
         
-        if not user2_id:
-            return False
-        
-        conn = sqlite3.connect(self.db_path)
+        conn = self.backend.connect()
         cursor = conn.cursor()
-        
         cursor.execute('''
-            SELECT COUNT(*) FROM follows 
-            WHERE (follower_id = ? AND following_id = ?)
-            OR (follower_id = ? AND following_id = ?)
-        ''', (user1_id, user2_id, user2_id, user1_id))
-        
-        mutual_follows = cursor.fetchone()[0]
+            SELECT DISTINCT user_id FROM reactions
+            WHERE target_type = 'shared_swing' AND target_id = ?
+        ''', (share_id,))
+        reactor_ids = [row[0] for row in cursor.fetchall()]
         conn.close()
         
-        return mutual_follows == 2  # Both follow each other 
\ No newline at end of file
+        return self.follow_graph.friends_who_also(user_id, reactor_ids)
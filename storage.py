@@ -0,0 +1,295 @@
+# storage.py - Pluggable database backends for Swing Sage
+import os
+import queue
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict
+
+from instrumentation import DB_BUCKETS, REGISTRY
+
+# PostgreSQL support is optional - SQLite remains the default for local runs
+try:
+    import psycopg2
+    from psycopg2 import pool as pg_pool
+    POSTGRES_AVAILABLE = True
+except ImportError:
+    psycopg2 = None
+    pg_pool = None
+    POSTGRES_AVAILABLE = False
+
+
+class SQLiteBackend:
+    """
+    Local SQLite file storage.
+    Fine for development and single-node deployments; every replica gets
+    its own file, so use PostgresBackend when running more than one app.
+    Up to pool_size idle connections are kept for reuse between calls.
+    """
+
+    dialect = 'sqlite'
+    IntegrityError = sqlite3.IntegrityError
+
+    def __init__(self, db_path: str, timeout: float = 30.0, pool_size: int = 5):
+        self.db_path = db_path
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+
+        # WAL lets readers proceed while a writer holds the lock; the
+        # setting is persistent, so it only needs to be applied once
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+
+    def connect(self):
+        """Borrow a DB-API connection; close() hands it back"""
+        try:
+            raw_connection = self._idle.get_nowait()
+        except queue.Empty:
+            # Pooled connections move between threads, one user at a time
+            raw_connection = sqlite3.connect(self.db_path, timeout=self.timeout,
+                                             check_same_thread=False)
+        return _PooledSQLiteConnection(self._idle, raw_connection)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Connection for one unit of work: committed on success, rolled back
+        on error. BEGIN IMMEDIATE takes the write lock up front, so two
+        writers never deadlock upgrading from a read lock.
+        """
+        conn = self.connect()
+        try:
+            started = perf_counter()
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+            except sqlite3.OperationalError:
+                REGISTRY.inc('db_lock_timeouts_total', backend=self.dialect)
+                raise
+            REGISTRY.observe('db_lock_wait_seconds', perf_counter() - started, DB_BUCKETS,
+                             backend=self.dialect)
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def ping(self):
+        """Run a trivial query on a pooled connection; raises if the database is unreachable"""
+        conn = self.connect()
+        try:
+            conn.execute('SELECT 1').fetchone()
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close every idle pooled connection"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+class _PooledSQLiteConnection:
+    """sqlite3 connection that returns to its backend's pool when closed"""
+
+    def __init__(self, idle, raw_connection):
+        self._idle = idle
+        self._conn = raw_connection
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def streaming_cursor(self):
+        """Cursor for reads too big for memory; sqlite3 cursors already stream"""
+        return self._conn.cursor()
+
+    def close(self):
+        if self._conn is None:
+            return
+        # Never hand a connection with an open transaction back to the pool
+        self._conn.rollback()
+        try:
+            self._idle.put_nowait(self._conn)
+        except queue.Full:
+            self._conn.close()
+        self._conn = None
+
+
+class PostgresBackend:
+    """
+    Shared PostgreSQL storage with a thread-safe connection pool.
+    Connections handed out translate the SQLite-flavoured SQL used by the
+    trackers (qmark placeholders, INSERT OR IGNORE) and return to the pool
+    when closed.
+    """
+
+    dialect = 'postgresql'
+
+    def __init__(self, dsn: str, min_connections: int = 1, max_connections: int = 10):
+        if not POSTGRES_AVAILABLE:
+            raise RuntimeError("psycopg2 is required for PostgreSQL storage")
+
+        self.dsn = dsn
+        self.IntegrityError = psycopg2.IntegrityError
+        self.pool = pg_pool.ThreadedConnectionPool(min_connections, max_connections, dsn)
+
+    def connect(self):
+        """Borrow a pooled connection; close() hands it back"""
+        return _PooledConnection(self.pool, self.pool.getconn())
+
+    @contextmanager
+    def transaction(self):
+        """Connection for one unit of work: committed on success, rolled back on error"""
+        conn = self.connect()
+        try:
+            yield conn
+            conn.commit()
+        finally:
+            conn.close()
+
+    def ping(self):
+        """Run a trivial query on a pooled connection; raises if the database is unreachable"""
+        conn = self.connect()
+        try:
+            conn.execute('SELECT 1').fetchone()
+        finally:
+            conn.close()
+
+    def close(self):
+        """Close every pooled connection"""
+        self.pool.closeall()
+
+
+class _PooledConnection:
+    """sqlite3-style connection facade over a pooled psycopg2 connection"""
+
+    def __init__(self, pool, raw_connection):
+        self._pool = pool
+        self._conn = raw_connection
+
+    def cursor(self):
+        return _TranslatingCursor(self._conn.cursor())
+
+    def streaming_cursor(self):
+        """
+        Server-side (named) cursor, so fetchmany pulls rows from PostgreSQL a
+        batch at a time instead of the whole result on execute. It can run
+        one statement, inside the connection's current transaction.
+        """
+        return _TranslatingCursor(self._conn.cursor(name=f"stream_{uuid.uuid4().hex}"))
+
+    def execute(self, sql: str, params=()):
+        cursor = self.cursor()
+        cursor.execute(sql, params)
+        return cursor
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        if self._conn is None:
+            return
+        # Never hand a connection with an open transaction back to the pool
+        self._conn.rollback()
+        self._pool.putconn(self._conn)
+        self._conn = None
+
+
+class _TranslatingCursor:
+    """Cursor wrapper that rewrites SQLite SQL into PostgreSQL SQL"""
+
+    def __init__(self, raw_cursor):
+        self._cursor = raw_cursor
+
+    def execute(self, sql: str, params=()):
+        self._cursor.execute(translate_sql(sql), tuple(params))
+        return self
+
+    def executemany(self, sql: str, seq_of_params):
+        self._cursor.executemany(translate_sql(sql), [tuple(p) for p in seq_of_params])
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int = 1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+_INSERT_OR_IGNORE = re.compile(r'INSERT\s+OR\s+IGNORE\s+INTO', re.IGNORECASE)
+_RETURNING = re.compile(r'\bRETURNING\b', re.IGNORECASE)
+# Single-quoted literals ('' is an escaped quote); split() keeps them at odd indexes
+_STRING_LITERAL = re.compile(r"('(?:[^']|'')*')")
+
+
+@lru_cache(maxsize=512)
+def translate_sql(sql: str) -> str:
+    """
+    Rewrite a SQLite statement for psycopg2. Placeholders and keywords are
+    only rewritten outside string literals; every % is escaped, since
+    psycopg2 reads them inside literals too.
+    """
+    parts = [part.replace('%', '%%') if index % 2 else part.replace('%', '%%').replace('?', '%s')
+             for index, part in enumerate(_STRING_LITERAL.split(sql))]
+
+    code = range(0, len(parts), 2)
+    if any(_INSERT_OR_IGNORE.search(parts[index]) for index in code):
+        parts = [_INSERT_OR_IGNORE.sub('INSERT INTO', part) if index % 2 == 0 else part
+                 for index, part in enumerate(parts)]
+        # ON CONFLICT goes before a RETURNING clause, else at the end
+        returning = [index for index in code if _RETURNING.search(parts[index])]
+        if returning:
+            index = returning[-1]
+            match = list(_RETURNING.finditer(parts[index]))[-1]
+            parts[index] = (parts[index][:match.start()] + 'ON CONFLICT DO NOTHING '
+                            + parts[index][match.start():])
+        else:
+            parts[-1] = parts[-1].rstrip().rstrip(';') + ' ON CONFLICT DO NOTHING'
+
+    return ''.join(parts)
+
+
+_postgres_backends: Dict[str, PostgresBackend] = {}
+_postgres_lock = threading.Lock()
+
+
+def create_backend(database: str):
+    """
+    Build a backend from a path or URL.
+    postgres:// and postgresql:// URLs share one pool per process;
+    anything else is treated as a SQLite file path.
+    """
+    if database.startswith(('postgres://', 'postgresql://')):
+        with _postgres_lock:
+            if database not in _postgres_backends:
+                max_connections = int(os.environ.get('DB_POOL_SIZE', '10'))
+                _postgres_backends[database] = PostgresBackend(
+                    database, max_connections=max_connections)
+            return _postgres_backends[database]
+
+    return SQLiteBackend(database)
@@ -0,0 +1,125 @@
+"""
+Analyzer Loader Tests for Swing Sage
+No video dependencies needed: stand-in modules exercise the lazy loading
+"""
+
+import threading
+
+import analyzer_loader
+from analyzer_loader import WARMUP_FRAMES, AnalyzerUnavailable, LazyAnalyzer
+
+
+class _StandInAnalyzer:
+    def analyze_swing(self, input_path, output_path):
+        return {'input': input_path, 'output': output_path}
+
+
+class _FlakyWarmUpAnalyzer(_StandInAnalyzer):
+    failures = 1
+
+    def warm_up(self, frames):
+        if _FlakyWarmUpAnalyzer.failures:
+            _FlakyWarmUpAnalyzer.failures -= 1
+            raise RuntimeError("graph failed to load")
+
+
+class _SlowToWarmAnalyzer(_StandInAnalyzer):
+    release = threading.Event()
+
+    def warm_up(self, frames):
+        self.warm_frames = len(frames)
+        self.release.wait(5)
+
+
+def test_analyzer_loads_once_on_first_use():
+    """Nothing is imported until the first analysis, then one instance is reused"""
+    analyzer = LazyAnalyzer('coaching_rules', 'RulesEngine', role='all')
+    assert not analyzer.loaded
+
+    first = analyzer.get()
+    assert analyzer.loaded and analyzer.get() is first
+
+
+def test_roles_and_fallback():
+    """Web-only processes refuse to analyze; missing deps use the fallback"""
+    web = LazyAnalyzer('video_processor', 'SwingAnalyzer', role='web',
+                       fallback=_StandInAnalyzer)
+    try:
+        web.analyze_swing('in.mp4', 'out.mp4')
+        assert False, "web role must not analyze"
+    except AnalyzerUnavailable:
+        pass
+    assert not web.loaded
+
+    missing = LazyAnalyzer('swing_sage_missing_module', 'SwingAnalyzer', role='worker',
+                           fallback=_StandInAnalyzer)
+    assert missing.analyze_swing('in.mp4', 'out.mp4') == {'input': 'in.mp4', 'output': 'out.mp4'}
+
+
+def test_not_ready_until_warmed_up():
+    """Analyses are refused while warming; ready flips once frames have run"""
+    analyzer = LazyAnalyzer('swing_sage_missing_module', 'SwingAnalyzer', role='all',
+                            fallback=_SlowToWarmAnalyzer)
+    assert not analyzer.ready
+
+    thread = analyzer.start_warm_up()
+    try:
+        analyzer.analyze_swing('in.mp4', 'out.mp4')
+        assert False, "cold analyzer must not analyze"
+    except AnalyzerUnavailable:
+        pass
+    assert analyzer.status()['warm_up'] == 'warming'
+
+    _SlowToWarmAnalyzer.release.set()
+    thread.join(5)
+    status = analyzer.status()
+    assert status['ready'] and status['warm_up'] == 'ready'
+    assert analyzer.get().warm_frames == WARMUP_FRAMES
+    assert analyzer.analyze_swing('in.mp4', 'out.mp4')['input'] == 'in.mp4'
+
+    # Web-only processes have nothing to warm and are ready straight away
+    web = LazyAnalyzer('video_processor', 'SwingAnalyzer', role='web')
+    assert web.start_warm_up() is None and web.ready and not web.loaded
+
+
+def test_deferred_and_failed_warm_ups():
+    """A preloading master defers warm-up to the worker; failures are retried"""
+    analyzer_loader.defer_warm_ups()
+    try:
+        analyzer = LazyAnalyzer('swing_sage_missing_module', 'SwingAnalyzer', role='all',
+                                fallback=_FlakyWarmUpAnalyzer)
+        assert analyzer.start_warm_up() is None
+        assert analyzer.status()['warm_up'] == 'pending' and not analyzer.loaded
+    finally:
+        analyzer_loader._defer_warm_ups = False
+
+    retry_seconds = analyzer_loader.WARMUP_RETRY_SECONDS
+    analyzer_loader.WARMUP_RETRY_SECONDS = 3600
+    try:
+        analyzer_loader.start_pending_warm_ups()
+        for thread in threading.enumerate():
+            if thread.name == 'warm-up-SwingAnalyzer':
+                thread.join(5)
+        assert analyzer.status()['warm_up'] == 'failed' and not analyzer.ready
+        try:
+            analyzer.analyze_swing('in.mp4', 'out.mp4')
+            assert False, "failed analyzer must not analyze"
+        except AnalyzerUnavailable:
+            pass
+
+        # The retry is due once the pause has passed
+        analyzer_loader.WARMUP_RETRY_SECONDS = 0
+        assert analyzer.status()['warm_up'] in ('warming', 'ready')
+        for thread in threading.enumerate():
+            if thread.name == 'warm-up-SwingAnalyzer':
+                thread.join(5)
+        assert analyzer.ready
+    finally:
+        analyzer_loader.WARMUP_RETRY_SECONDS = retry_seconds
+
+
+if __name__ == "__main__":
+    test_analyzer_loads_once_on_first_use()
+    test_roles_and_fallback()
+    test_not_ready_until_warmed_up()
+    test_deferred_and_failed_warm_ups()
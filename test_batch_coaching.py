@@ -0,0 +1,87 @@
+"""
+Batch Coaching Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import os
+import tempfile
+import uuid
+
+from advanced_coaching_ai import AdvancedCoachingAI
+from batch_coaching import backfill_coaching_tips, generate_sessions
+from progress_tracker import ProgressTracker
+
+
+def _analysis(score):
+    return {
+        'overall_score': score,
+        'fault_percentages': {'trail_arm_collapse': 100 - score},
+        'primary_issues': [{'fault': 'trail_arm_collapse', 'percentage': 100 - score}]
+    }
+
+
+def test_backfill_is_grouped_deterministic_and_parallel():
+    """Every analysis is recoached once, identically inline and in a pool"""
+    db_dir = tempfile.mkdtemp()
+    tracker = ProgressTracker(os.path.join(db_dir, "progress_test.db"))
+    for index in range(6):
+        user_id = tracker.create_or_get_user(f"batch_user_{index}", "competitive", "advanced")
+        for score in (40, 55, 70, 85)[:index % 4 + 1]:
+            tracker.save_swing_analysis(user_id, _analysis(score), "old tip", "video.mp4")
+
+    inline = list(generate_sessions(tracker.iter_user_histories()))
+    pooled = list(generate_sessions(tracker.iter_user_histories(users_per_batch=2),
+                                    workers=2, users_per_task=1))
+    assert len(inline) == 13
+    assert inline == pooled
+
+    # The first analysis has no history; later ones see the earlier swings
+    first_sessions = [session for _, _, session in inline
+                      if 'first session' in session['coaching_session']['primary_coaching']]
+    assert len(first_sessions) == 6
+
+    result = backfill_coaching_tips(tracker, user_ids=["batch_user_3"], write_batch_size=3)
+    print(f"🔁 Backfill: {result}")
+    assert result['analyses_recoached'] == 4
+
+    tips = [metric['coaching_tip']
+            for metric in tracker.get_user_progress("batch_user_3")['progress_metrics']]
+    assert "old tip" not in tips
+    assert tracker.get_user_progress("batch_user_2")['progress_metrics'][0]['coaching_tip'] == "old tip"
+
+
+def test_backfill_reproduces_live_coaching():
+    """The app's seeding (analysis id chosen before saving) matches the backfill's"""
+    db_dir = tempfile.mkdtemp()
+    tracker = ProgressTracker(os.path.join(db_dir, "progress_test.db"))
+    user_id = tracker.create_or_get_user("live_user", "senior", "beginner")
+    profile = {'golfer_type': 'senior', 'experience': 'beginner', 'user_id': user_id}
+    coach = AdvancedCoachingAI(deterministic=True)
+
+    live_tips = {}
+    for score in (45, 60, 50):
+        analysis_id = str(uuid.uuid4())
+        session = coach.generate_coaching_session(_analysis(score), tracker.get_user_progress(user_id),
+                                                  profile, analysis_id=analysis_id)
+        live_tips[analysis_id] = session['coaching_session']['primary_coaching']
+        tracker.save_swing_analysis(user_id, _analysis(score), live_tips[analysis_id], "video.mp4",
+                                    analysis_id=analysis_id)
+
+    recoached = {analysis_id: session['coaching_session']['primary_coaching']
+                 for _, analysis_id, session in generate_sessions(tracker.iter_user_histories())}
+    assert recoached == live_tips
+
+    # Past tips and dates in the progress don't defeat the memo
+    progress = tracker.get_user_progress(user_id)
+    for metric in progress['progress_metrics']:
+        metric['coaching_tip'], metric['date'] = 'edited', 'later'
+    hits = coach.cache.hits
+    coach.generate_coaching_session(_analysis(70), progress, profile, analysis_id='again')
+    coach.generate_coaching_session(_analysis(70), tracker.get_user_progress(user_id), profile,
+                                    analysis_id='again')
+    assert coach.cache.hits == hits + 1
+
+
+if __name__ == "__main__":
+    test_backfill_is_grouped_deterministic_and_parallel()
+    test_backfill_reproduces_live_coaching()
@@ -0,0 +1,62 @@
+"""
+Database Benchmark Tests for Swing Sage
+Generates a tiny synthetic population and runs every benchmarked method against it
+"""
+
+import sqlite3
+import tempfile
+from datetime import datetime
+
+from bench_database import NOT_BENCHMARKED, compare_results, percentile, run_benchmark
+from progress_tracker import ProgressTracker
+from social_platform import SocialPlatform
+from datagen import SyntheticDataset, generate
+
+
+def test_generated_population_is_consistent():
+    """Same seed, same data; denormalized counts match the rows behind them"""
+    now = datetime(2026, 6, 1)
+    assert SyntheticDataset(50, 3, now).user_analyses(7) == SyntheticDataset(50, 3, now).user_analyses(7)
+
+    out_dir = tempfile.mkdtemp()
+    manifest = generate(120, out_dir, seed=3)
+    assert manifest['progress']['users'] == 120
+    assert manifest['social']['social_users'] == 120
+
+    conn = sqlite3.connect(f"{out_dir}/social_platform.db")
+    follows = conn.execute('SELECT COUNT(*) FROM follows').fetchone()[0]
+    assert follows == manifest['social']['follows'] > 0
+    assert conn.execute('SELECT SUM(follower_count), SUM(following_count) FROM social_users').fetchone() == \
+        (follows, follows)
+    # Reopening the platform derived each follower's timeline from the shares
+    assert conn.execute('SELECT COUNT(*) FROM feed_timeline').fetchone()[0] > 0
+    conn.close()
+
+
+def test_benchmark_reports_every_method():
+    """Both phases report percentiles per method, and compare flags slowdowns"""
+    report = run_benchmark(users=80, seed=3, ops=5, writers=2, data_dir=tempfile.mkdtemp())
+    phases = {result['phase'] for result in report['results']}
+    assert phases == {'single', 'concurrent'}
+    assert report['background_writers']['completed'] > 0
+
+    # Every public method is benchmarked or deliberately left out
+    public = {f"{prefix}.{name}" for prefix, cls in (('progress', ProgressTracker), ('social', SocialPlatform))
+              for name in vars(cls) if not name.startswith('_') and callable(getattr(cls, name))}
+    benchmarked = {'.'.join(result['method'].split('.')[:2]) for result in report['results']}
+    assert public - set(NOT_BENCHMARKED) == benchmarked
+    for result in report['results']:
+        assert result['calls'] + result['errors'] == 5
+        if result['phase'] == 'single':
+            assert result['errors'] == 0, result['case']
+        assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+
+    assert percentile([1.0, 2.0, 3.0, 4.0], 0.5) == 2.0
+    slower = {'results': [dict(result, p95_ms=result['p95_ms'] * 2 + 1) for result in report['results']]}
+    regressions = [change for change in compare_results(report, slower) if change['regression']]
+    assert {change['metric'] for change in regressions} == {'p95_ms'}
+
+
+if __name__ == "__main__":
+    test_generated_population_is_consistent()
+    test_benchmark_reports_every_method()
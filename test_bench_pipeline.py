@@ -0,0 +1,44 @@
+"""
+Pipeline Benchmark Tests for Swing Sage
+Covers stage reports and regression comparison; no video dependencies needed
+"""
+
+import time
+
+from bench_pipeline import build_cases, compare_results, stage_report
+from instrumentation import StageRecorder
+
+
+def test_stage_report_from_instrumentation():
+    """Analyzer stage summaries become per-frame costs"""
+    timings = StageRecorder()
+    for _ in range(4):
+        with timings.time('inference'):
+            time.sleep(0.005)
+    stages = stage_report(timings.summary(), frames=4)
+    assert stages['inference']['calls'] == 4
+    assert 4.0 < stages['inference']['per_frame_ms'] < 20.0
+    assert stage_report(None, frames=0) == {}
+
+
+def test_compare_flags_only_regressions():
+    """Slower stages and lower frames/s beyond the threshold are regressions"""
+    def result(fps, inference_ms, draw_ms):
+        return {'case': 'swing/clip', 'frames_per_second': fps, 'peak_rss_mb': 300.0,
+                'stages': {'inference': {'per_frame_ms': inference_ms},
+                           'draw': {'per_frame_ms': draw_ms}}}
+
+    baseline = {'results': [result(30.0, 20.0, 2.0)]}
+    current = {'results': [result(25.0, 24.0, 1.0)]}
+    regressions = {change['metric'] for change in compare_results(baseline, current)
+                   if change['regression']}
+    assert regressions == {'frames_per_second', 'inference_ms_per_frame'}
+
+    quick = build_cases(['swing', 'optimize'], quick=True, bundled=False)
+    assert [case['id'] for case in quick] == ['swing/synthetic-480p-30fps-2s-r0',
+                                              'optimize/synthetic-480p-30fps-2s-r0']
+
+
+if __name__ == "__main__":
+    test_stage_report_from_instrumentation()
+    test_compare_flags_only_regressions()
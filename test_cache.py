@@ -0,0 +1,97 @@
+"""
+Cache Tests for Swing Sage
+Runs against the in-memory store and throwaway SQLite databases
+"""
+
+import os
+import tempfile
+
+from cache import Cache, LocalStore
+from progress_tracker import ProgressTracker
+from social_platform import SocialPlatform
+
+
+def test_local_store_lru_and_invalidation():
+    """Loaders run once per key, the oldest entry is evicted, namespaces clear"""
+    cache = Cache(LocalStore(max_entries=2))
+    loads = []
+
+    def loader(key):
+        loads.append(key)
+        return {'key': key}
+
+    assert cache.get_or_load('ns', 'a', lambda: loader('a')) == {'key': 'a'}
+    cache.get_or_load('ns', 'a', lambda: loader('a'))['key'] = 'mutated'
+    assert cache.get_or_load('ns', 'a', lambda: loader('a')) == {'key': 'a'}
+    assert loads == ['a']
+
+    cache.get_or_load('ns', 'b', lambda: loader('b'))
+    cache.get_or_load('other', 'c', lambda: loader('c'))  # evicts 'a'
+    cache.get_or_load('ns', 'a', lambda: loader('a'))
+    assert loads == ['a', 'b', 'c', 'a']
+
+    cache.invalidate_namespace('ns')
+    cache.get_or_load('other', 'c', lambda: loader('c'))
+    cache.get_or_load('ns', 'a', lambda: loader('a'))
+    assert loads == ['a', 'b', 'c', 'a', 'a']
+
+    stats = cache.stats()
+    print(f"📦 Cache stats: {stats}")
+    assert stats['hits'] == 3 and stats['misses'] == 5
+    assert stats['evictions'] == 2 and stats['size'] == 2
+
+
+def test_invalidation_during_load_wins():
+    """A value loaded before a concurrent invalidation is returned but not cached"""
+    for store in (LocalStore(), LocalStore(max_entries=1)):
+        cache = Cache(store)
+        loads = []
+
+        def stale_loader():
+            loads.append('stale')
+            cache.invalidate('stats', 'u1')  # a write commits mid-load
+            cache.invalidate_namespace('progress:u1')
+            return {'total_swings': 1}
+
+        assert cache.get_or_load('stats', 'u1', stale_loader) == {'total_swings': 1}
+        assert cache.get_or_load('stats', 'u1', lambda: loads.append('fresh') or {'total_swings': 2}) == \
+            {'total_swings': 2}
+        assert cache.get_or_load('stats', 'u1', lambda: {'total_swings': 3}) == {'total_swings': 2}
+        assert loads == ['stale', 'fresh']
+
+
+def test_cached_reads_invalidate_on_writes():
+    """Profiles and stats are served from cache until their writes land"""
+    db_dir = tempfile.mkdtemp()
+    platform = SocialPlatform(os.path.join(db_dir, "social_test.db"))
+    for user_id in ("alice", "bob"):
+        platform.create_social_profile(user_id, user_id, user_id.title(), f"{user_id}@example.com")
+
+    assert platform.get_user_profile("bob")['follower_count'] == 0
+    misses = platform.cache.misses
+    platform.get_user_profile("bob", viewer_id="alice")
+    assert platform.cache.misses == misses
+
+    platform.follow_user("alice", "bob")
+    assert platform.get_user_profile("bob")['follower_count'] == 1
+    assert platform.get_user_profile("alice")['following_count'] == 1
+
+    platform.share_swing("alice", "a1", "Draw", "", "/videos/1.mp4")
+    alice = platform.get_user_profile("alice")
+    assert alice['achievement_points'] == 150
+    assert 'privacy_level' not in alice
+
+    tracker = ProgressTracker(os.path.join(db_dir, "progress_test.db"))
+    user_id = tracker.create_or_get_user("cached_user")
+    assert tracker.get_user_stats(user_id)['total_swings'] == 0
+    assert tracker.get_user_progress(user_id)['total_swings'] == 0
+
+    tracker.save_swing_analysis(user_id, {'overall_score': 72}, "tip", "video.mp4")
+    assert tracker.get_user_stats(user_id)['total_swings'] == 1
+    assert tracker.get_user_progress(user_id)['total_swings'] == 1
+
+
+if __name__ == "__main__":
+    test_local_store_lru_and_invalidation()
+    test_invalidation_during_load_wins()
+    test_cached_reads_invalidate_on_writes()
@@ -0,0 +1,72 @@
+"""
+Challenge Engine Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+from social_platform import SocialPlatform
+
+
+def test_challenge_scoring_and_finalization():
+    """Capacity holds, submissions rank live and final ranks are stored"""
+    db_dir = tempfile.mkdtemp()
+    platform = SocialPlatform(os.path.join(db_dir, "social_test.db"))
+    user_ids = [f"user_{index}" for index in range(4)]
+    for index, user_id in enumerate(user_ids):
+        platform.create_social_profile(user_id, f"golfer{index}", f"Golfer {index}",
+                                       f"golfer{index}@example.com")
+
+    challenge_id = platform.create_challenge(user_ids[0], "Arm challenge", "Keep it straight",
+                                             'improvement', 'trail_arm_collapse', 20,
+                                             max_participants=3)['challenge_id']
+    results = [platform.join_challenge(user_id, challenge_id) for user_id in user_ids]
+    assert [result['success'] for result in results] == [True, True, True, False]
+    assert results[3]['error'] == 'Challenge is full'
+    assert platform.join_challenge(user_ids[0], challenge_id)['success'] is False
+
+    def analysis(fault):
+        return {'overall_score': 100 - fault, 'fault_percentages': {'trail_arm_collapse': fault}}
+
+    platform.submit_challenge_analyses([
+        (user_ids[0], analysis(40), None),
+        (user_ids[1], analysis(15), None),
+        (user_ids[0], analysis(10), None),
+        (user_ids[3], analysis(5), None),  # Not a participant
+    ])
+    standings = platform.get_challenge_rankings(challenge_id)
+    print(f"🏌️ Standings: {[(entry['user_id'], entry['score']) for entry in standings]}")
+    assert [(entry['user_id'], entry['score']) for entry in standings] == \
+        [(user_ids[0], 90.0), (user_ids[1], 85.0)]
+
+    # Large batches are looked up a chunk of users at a time
+    result = platform.submit_challenge_analyses(
+        [(f"idle_{index}", analysis(50), None) for index in range(1200)]
+        + [(user_ids[1], analysis(12), None)])
+    assert result == {'submissions': 1201, 'participants_updated': 1}
+    assert platform.get_challenge_rank(challenge_id, user_ids[1])['best_score'] == 88.0
+
+    # An analysis without fault data scores nothing instead of failing the batch
+    result = platform.submit_challenge_analyses(
+        [(user_ids[0], {'overall_score': 70, 'fault_percentages': None}, None)])
+    assert result == {'submissions': 1, 'participants_updated': 0}
+
+    platform.submit_challenge_analyses([(user_ids[2], analysis(0), None)])
+    assert platform.get_challenge_rank(challenge_id, user_ids[2])['rank'] == 1
+
+    finalized = platform.challenges.finalize_due_challenges(now=datetime.now() + timedelta(days=8))
+    assert finalized == 1
+    conn = platform.backend.connect()
+    final = conn.execute('''
+        SELECT user_id, final_rank, submission_count FROM challenge_participants
+        WHERE challenge_id = ? ORDER BY final_rank
+    ''', (challenge_id,)).fetchall()
+    conn.close()
+    assert final == [(user_ids[2], 1, 1), (user_ids[0], 2, 2), (user_ids[1], 3, 2)]
+    assert platform.join_challenge(user_ids[3], challenge_id)['error'] == 'Challenge is not open'
+
+
+if __name__ == "__main__":
+    test_challenge_scoring_and_finalization()
@@ -41,5 +41,60 @@ def test_coaching_feedback():
     print(f"   {feedback}")
 
 
+def test_advanced_coaching_content_is_shared_read_only():
+    """Sessions get their own drill copies; the compiled tables never change"""
+    from advanced_coaching_ai import AdvancedCoachingAI, DRILL_INDEX
+
+    coach = AdvancedCoachingAI()
+    analysis = {'overall_score': 55,
+                'primary_issues': [{'fault': 'trail_arm_collapse', 'percentage': 60}]}
+    progress = {'total_swings': 3, 'progress_metrics': [{'overall_score': 50}]}
+
+    session = coach.generate_coaching_session(analysis, progress, {'experience': 'beginner'})
+    drills = session['drill_recommendations']
+    assert [drill['name'] for drill in drills] == ['Right Arm Extension Drill',
+                                                   'Connection Drill with Towel']
+    assert drills[0]['estimated_improvement_time'] == '2-3 weeks'
+
+    drills[0]['estimated_improvement_time'] = 'changed'
+    session['next_session_preview']['focus'] = 'changed'
+    again = coach.generate_coaching_session(analysis, progress, {'experience': 'beginner'})
+    assert again['drill_recommendations'][0]['estimated_improvement_time'] == '2-3 weeks'
+    assert again['next_session_preview']['focus'] == 'Arm extension and connection'
+    assert 'estimated_improvement_time' not in coach.drill_database['trail_arm_collapse'][0]
+    assert len(DRILL_INDEX[('over_the_top', 'moderate')]) == 2
+
+
+def test_deterministic_coaching_is_a_pure_function():
+    """Seeded coaches give identical text for identical inputs and memoize it"""
+    from advanced_coaching_ai import AdvancedCoachingAI
+    from coaching_engine import CoachingEngine
+
+    analysis = {'overall_score': 65, 'collapse_percentage': 40, 'total_frames': 90,
+                'primary_issues': [{'fault': 'over_the_top', 'percentage': 35}]}
+    progress = {'total_swings': 2, 'progress_metrics': [{'overall_score': 60},
+                                                        {'overall_score': 62}]}
+    profile = {'user_id': 'seeded_user', 'experience': 'intermediate'}
+
+    tips = {CoachingEngine(deterministic=True).generate_feedback(analysis, user_id='seeded_user')
+            for _ in range(20)}
+    assert len(tips) == 1
+
+    first, second = AdvancedCoachingAI(deterministic=True), AdvancedCoachingAI(deterministic=True)
+    sessions = [coach.generate_coaching_session(analysis, progress, profile, analysis_id='a1')
+                for coach in (first, second, first)]
+    assert sessions[0] == sessions[1] == sessions[2]
+    assert first.cache.hits == 1
+
+    # Different analyses for the same user draw different variants overall
+    openers = {first.generate_coaching_session(analysis, progress, profile,
+                                               analysis_id=f'a{index}')
+               ['coaching_session']['primary_coaching'].split('.')[0]
+               for index in range(30)}
+    assert len(openers) > 1
+
+
 if __name__ == "__main__":
     test_coaching_feedback()
+    test_advanced_coaching_content_is_shared_read_only()
+    test_deterministic_coaching_is_a_pure_function()
@@ -0,0 +1,68 @@
+"""
+Coaching Rules Tests for Swing Sage
+Runs against a throwaway copy of coaching_rules.json
+"""
+
+import json
+import os
+import shutil
+import tempfile
+
+from coaching_engine import CoachingEngine
+from coaching_rules import DEFAULT_RULES_PATH, RulesEngine
+
+
+def _copy_rules():
+    path = os.path.join(tempfile.mkdtemp(), "coaching_rules.json")
+    shutil.copy(DEFAULT_RULES_PATH, path)
+    return path
+
+
+def test_rules_match_thresholds_and_rewrite_text():
+    """Bands, priorities and experience wording come from the rules file"""
+    rules = RulesEngine(_copy_rules())
+    assert rules.primary_fault({'collapse_percentage': 35, 'posture_loss_percentage': 65}) == \
+        'severe_posture_loss'
+    assert rules.primary_fault({'collapse_percentage': 10}) == 'good_swing'
+    assert [rules.difficulty_level(score) for score in (39, 40, 79.9, 80)] == \
+        ['basic', 'fundamental', 'intermediate', 'refinement']
+    assert [rules.fault_severity(pct) for pct in (25, 26, 50, 51)] == \
+        ['minor', 'moderate', 'moderate', 'severe']
+
+    engine = CoachingEngine(deterministic=True, rules=rules)
+    tip = engine.generate_feedback({'collapse_percentage': 40}, 'competitive', 'beginner')
+    print(f"📐 Beginner tip: {tip}")
+    assert 'right arm' in tip and 'trail arm' not in tip
+
+
+def test_rules_hot_reload_keeps_last_good_version():
+    """Edits take effect without a restart; a broken file is ignored"""
+    path = _copy_rules()
+    rules = RulesEngine(path, check_interval=0)
+    engine = CoachingEngine(rules=rules)
+    assert engine._identify_primary_fault({'collapse_percentage': 20}) == 'mild_trail_arm_collapse'
+    original_version = rules.version
+
+    with open(path) as rules_file:
+        raw = json.load(rules_file)
+    raw['primary_fault_rules'][-2]['above'] = 25
+    with open(path, 'w') as rules_file:
+        json.dump(raw, rules_file)
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 10**9))
+
+    assert engine._identify_primary_fault({'collapse_percentage': 20}) == 'good_swing'
+    edited_version = rules.version
+    assert edited_version != original_version
+    # Derived from the content, so another process loading the file agrees
+    assert RulesEngine(path).version == edited_version
+
+    with open(path, 'w') as rules_file:
+        rules_file.write('{ not json')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 2 * 10**9))
+    assert engine._identify_primary_fault({'collapse_percentage': 20}) == 'good_swing'
+    assert rules.version == edited_version
+
+
+if __name__ == "__main__":
+    test_rules_match_thresholds_and_rewrite_text()
+    test_rules_hot_reload_keeps_last_good_version()
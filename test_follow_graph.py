@@ -0,0 +1,67 @@
+"""
+Follow Graph Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import os
+import tempfile
+
+from follow_graph import FollowGraph
+from social_platform import SocialPlatform
+
+
+def test_follow_graph_tracks_follows():
+    """Mutual checks and overlaps follow writes without going stale"""
+    db_dir = tempfile.mkdtemp()
+    platform = SocialPlatform(os.path.join(db_dir, "social_test.db"))
+    alice, bob, carol, dave = "alice", "bob", "carol", "dave"
+    for user_id in (alice, bob, carol, dave):
+        platform.create_social_profile(user_id, user_id, user_id.title(), f"{user_id}@example.com")
+
+    graph = platform.follow_graph
+    platform.follow_user(alice, bob)
+    assert not platform._are_friends(alice, bob)
+
+    # The cached adjacency is invalidated by the follow back
+    platform.follow_user(bob, alice)
+    assert platform._are_friends(alice, bob)
+
+    platform.follow_user(carol, alice)
+    platform.follow_user(carol, bob)
+    platform.follow_user(alice, carol)
+    assert graph.common_followers(alice, bob) == [carol]
+    assert sorted(graph.friends(alice)) == [bob, carol]
+
+    share_id = platform.share_swing(dave, "a1", "Draw", "", "/videos/1.mp4")['share_id']
+    for fan in (bob, carol, dave):
+        platform.add_reaction(fan, 'shared_swing', share_id)
+    liked = platform.get_friends_who_liked(alice, share_id)
+    print(f"🤝 Friends who liked: {liked}")
+    assert sorted(liked) == [bob, carol]
+
+    platform.unfollow_user(carol, alice)
+    assert platform.get_friends_who_liked(alice, share_id) == [bob]
+
+
+def test_interned_ids_stay_bounded():
+    """Evicted lists don't leave their ids interned forever"""
+    db_dir = tempfile.mkdtemp()
+    platform = SocialPlatform(os.path.join(db_dir, "social_test.db"))
+    conn = platform.backend.connect()
+    conn.executemany('INSERT INTO follows (follower_id, following_id) VALUES (?, ?)',
+                     [(f"fan_{index}", f"star_{index % 20}") for index in range(400)])
+    conn.commit()
+    conn.close()
+
+    graph = FollowGraph(platform.backend, max_cached_users=2, max_interned_ids=50)
+    for star in range(20):
+        assert len(graph.followers(f"star_{star}")) == 20
+        assert len(graph._names) <= 50 + 21
+    # Numbers were reassigned, and the cached lists still resolve correctly
+    assert sorted(graph.followers("star_19")) == sorted(f"fan_{index}" for index in range(19, 400, 20))
+    assert graph.follows("fan_39", "star_19") and not graph.follows("fan_39", "star_18")
+
+
+if __name__ == "__main__":
+    test_follow_graph_tracks_follows()
+    test_interned_ids_stay_bounded()
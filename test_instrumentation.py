@@ -0,0 +1,125 @@
+"""
+Instrumentation Tests for Swing Sage
+Stage timers, histograms and the Prometheus rendering; no video dependencies needed
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from flask import Flask
+
+from cache import Cache
+from instrumentation import (NULL_RECORDER, REGISTRY, Histogram, MetricsRegistry, StageRecorder,
+                             finish_video, install_request_metrics, timed_methods)
+from storage import SQLiteBackend
+
+
+def test_histogram_buckets_and_quantiles():
+    """Values land in the first bucket at or above them"""
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for value in (0.0005, 0.001, 0.005, 0.005, 0.05, 2.0):
+        histogram.observe(value)
+
+    assert histogram.counts == [2, 2, 1, 1]
+    assert histogram.count == 6 and histogram.max == 2.0
+    assert histogram.quantile(0.5) == 0.01
+    assert histogram.quantile(0.99) == 2.0
+    print("✅ Histogram buckets and quantiles")
+
+
+def test_video_timings_reach_result_and_prometheus():
+    """A finished video's stages are attached to its result and exported"""
+    registry = MetricsRegistry()
+    timings = StageRecorder()
+    for _ in range(3):
+        with timings.time('inference'):
+            pass
+    timings.count('frames', 3)
+
+    registry.record_video('SwingAnalyzer', timings)
+    registry.record_video('SwingAnalyzer', timings)
+    text = registry.render_prometheus()
+    labels = 'analyzer="SwingAnalyzer",stage="inference"'
+    assert f'swing_sage_analysis_stage_seconds_bucket{{{labels},le="+Inf"}} 6' in text
+    assert f'swing_sage_analysis_stage_seconds_count{{{labels}}} 6' in text
+    assert 'swing_sage_analysis_events_total{analyzer="SwingAnalyzer",event="frames"} 6' in text
+    assert 'swing_sage_analyzed_videos_total{analyzer="SwingAnalyzer"} 2' in text
+
+    result = finish_video('SwingAnalyzer', timings, {'total_frames': 3})
+    assert result['instrumentation']['stages']['inference']['count'] == 3
+    assert result['instrumentation']['counters'] == {'frames': 3}
+
+    # Disabled instrumentation records nothing and leaves results alone
+    with NULL_RECORDER.time('inference'):
+        pass
+    assert finish_video('SwingAnalyzer', NULL_RECORDER, {'total_frames': 3}) == {'total_frames': 3}
+    print("✅ Video timings reach the result and /metrics")
+
+
+def test_scrape_merges_worker_snapshots():
+    """Counters of every worker add up; exited workers are folded and lose their gauges"""
+    metrics_dir = tempfile.mkdtemp()
+    registry = MetricsRegistry(metrics_dir)
+    exited = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                            capture_output=True, text=True).stdout.strip()
+    with open(os.path.join(metrics_dir, f"metrics_{exited}.json"), 'w') as snapshot_file:
+        json.dump({'pid': int(exited),
+                   'histograms': [['upload_bytes', [], [1e6, 1e7], [1, 1, 0], 6e6, 5e6]],
+                   'counters': [['cache_requests_total', [['cache', 'stats'], ['result', 'hit']], 4]],
+                   'gauges': [['analyses_in_progress', [['analyzer', 'SwingAnalyzer']], 1]]}, snapshot_file)
+
+    registry.inc('cache_requests_total', 2, cache='stats', result='hit')
+    registry.observe('upload_bytes', 2e6, (1e6, 1e7))
+    registry.add_gauge('analyses_in_progress', 2, analyzer='SwingAnalyzer')
+
+    text = registry.render_prometheus()
+    assert 'swing_sage_cache_requests_total{cache="stats",result="hit"} 6' in text
+    assert 'swing_sage_upload_bytes_count 3' in text
+    assert 'swing_sage_upload_bytes_bucket{le="10000000.0"} 3' in text
+    assert 'swing_sage_analyses_in_progress{analyzer="SwingAnalyzer"} 2' in text
+
+    # Exited workers are folded into one file, so recycled workers don't pile up
+    assert os.listdir(metrics_dir).count('exited_workers.json') == 1
+    assert f"metrics_{exited}.json" not in os.listdir(metrics_dir)
+    again = MetricsRegistry(metrics_dir).render_prometheus()
+    assert 'swing_sage_cache_requests_total{cache="stats",result="hit"} 4' in again
+    assert 'swing_sage_upload_bytes_count 2' in again
+    print("✅ Worker snapshots merge at scrape time")
+
+
+def test_database_cache_and_request_metrics():
+    """Method latency, lock waits, cache lookups and requests reach REGISTRY"""
+    @timed_methods('example')
+    class Store:
+        def lookup(self, key):
+            return key
+
+    backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "metrics.db"))
+    with backend.transaction() as conn:
+        conn.execute('CREATE TABLE t (a INTEGER)')
+    Store().lookup(1)
+    cache = Cache()
+    cache.get_or_load('progress:user1', '30', lambda: {'days': 30})
+    cache.get_or_load('progress:user1', '30', lambda: {'days': 30})
+
+    app = install_request_metrics(Flask(__name__))
+    app.add_url_rule('/items/<item_id>', 'item', lambda item_id: item_id)
+    app.test_client().get('/items/42')
+
+    text = REGISTRY.render_prometheus()
+    assert 'swing_sage_db_query_seconds_count{store="example",method="lookup"}' in text
+    assert 'swing_sage_db_lock_wait_seconds_count{backend="sqlite"}' in text
+    assert 'swing_sage_cache_requests_total{cache="progress",result="hit"}' in text
+    assert 'swing_sage_cache_requests_total{cache="progress",result="miss"}' in text
+    assert 'swing_sage_http_request_seconds_count{method="GET",endpoint="/items/<item_id>",status="200"}' in text
+    print("✅ Database, cache and request metrics are exported")
+
+
+if __name__ == "__main__":
+    test_histogram_buckets_and_quantiles()
+    test_video_timings_reach_result_and_prometheus()
+    test_scrape_merges_worker_snapshots()
+    test_database_cache_and_request_metrics()
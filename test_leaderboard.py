@@ -0,0 +1,65 @@
+"""
+Leaderboard Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import os
+import random
+import tempfile
+
+from leaderboard import SortedRankList
+from social_platform import SocialPlatform
+
+
+def test_sorted_rank_list_matches_sorted():
+    """Block splits and removals keep positions identical to a sorted list"""
+    rng = random.Random(7)
+    ranks = SortedRankList(block_size=4)
+    reference = []
+
+    for _ in range(500):
+        item = (rng.randint(0, 50), rng.random())
+        if reference and rng.random() < 0.3:
+            item = rng.choice(reference)
+            ranks.remove(item)
+            reference.remove(item)
+        else:
+            ranks.add(item)
+            reference.append(item)
+        reference.sort()
+
+    assert len(ranks) == len(reference)
+    assert ranks.slice(0, len(ranks)) == reference
+    assert all(ranks.index(item) == i for i, item in enumerate(reference))
+    assert ranks.slice(10, 15) == reference[10:15]
+
+
+def test_leaderboard_ranks_and_neighbors():
+    """Ranks follow points incrementally and neighbors surround the user"""
+    db_dir = tempfile.mkdtemp()
+    platform = SocialPlatform(os.path.join(db_dir, "social_test.db"))
+    user_ids = [f"user_{index}" for index in range(8)]
+    for index, user_id in enumerate(user_ids):
+        platform.create_social_profile(user_id, f"golfer{index}", f"Golfer {index}",
+                                       f"golfer{index}@example.com")
+
+    assert platform.get_user_rank("user_5")['rank'] == 6  # Ties fall back to user id
+
+    platform.share_swing("user_5", "a1", "First share", "", "/videos/1.mp4")  # +100 points
+    board = platform.get_leaderboard('overall')
+    print(f"🏅 Leaderboard: {[(entry['rank'], entry['user_id']) for entry in board[:3]]}")
+    assert board[0]['user_id'] == "user_5" and board[0]['score'] == 150
+    assert platform.get_user_rank("user_5", time_period='weekly')['rank'] == 1
+
+    neighbors = platform.get_leaderboard_neighbors("user_3", radius=1)
+    assert [entry['user_id'] for entry in neighbors] == ["user_2", "user_3", "user_4"]
+
+    platform.sync_swing_stats("user_7", {'total_swings': 6, 'best_score': 88, 'improvement': 12.5})
+    platform.sync_swing_stats("user_2", {'total_swings': 2, 'best_score': 95, 'improvement': 30})
+    assert [entry['user_id'] for entry in platform.get_leaderboard('improvement')] == ["user_7"]
+    assert platform.get_user_rank("user_7", 'activity', 'weekly')['rank'] == 1
+
+
+if __name__ == "__main__":
+    test_sorted_rank_list_matches_sorted()
+    test_leaderboard_ranks_and_neighbors()
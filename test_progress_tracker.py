@@ -0,0 +1,152 @@
+"""
+Progress Tracker Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import io
+import os
+import tempfile
+
+from progress_tracker import ProgressTracker
+
+
+def _make_tracker():
+    db_dir = tempfile.mkdtemp()
+    return ProgressTracker(os.path.join(db_dir, "progress_test.db"))
+
+
+def _analysis(score):
+    return {
+        'overall_score': score,
+        'fault_percentages': {'trail_arm_collapse': 100 - score},
+        'primary_issues': [{'fault': 'trail_arm_collapse', 'percentage': 100 - score}]
+    }
+
+
+def test_milestones_granted_once():
+    """Milestones are written with the analysis and never double-granted"""
+    tracker = _make_tracker()
+    user_id = tracker.create_or_get_user("milestone_user")
+
+    tracker.save_swing_analysis(user_id, _analysis(85), "tip", "video.mp4")
+    tracker.save_swing_analysis(user_id, _analysis(92), "tip", "video.mp4")
+    tracker.save_swing_analysis(user_id, _analysis(95), "tip", "video.mp4")
+
+    progress = tracker.get_user_progress(user_id)
+    milestone_types = sorted(m['type'] for m in progress['recent_milestones'])
+
+    print(f"🏆 Milestones: {milestone_types}")
+    assert milestone_types == ['first_good_swing', 'great_swing', 'outstanding_swing']
+
+
+def test_custom_milestone_rules():
+    """New milestone rules can be declared as data"""
+    tracker = _make_tracker()
+    tracker.milestone_rules = [
+        {'type': 'steady_swing', 'metric': 'overall_score', 'threshold': 50,
+         'description': 'Steady swing!'}
+    ]
+    user_id = tracker.create_or_get_user("rules_user")
+
+    tracker.save_swing_analysis(user_id, _analysis(40), "tip", "video.mp4")
+    assert tracker.get_user_progress(user_id)['recent_milestones'] == []
+
+    tracker.save_swing_analysis(user_id, _analysis(55), "tip", "video.mp4")
+    milestones = tracker.get_user_progress(user_id)['recent_milestones']
+    assert [m['type'] for m in milestones] == ['steady_swing']
+
+
+def test_bulk_export_import_roundtrip():
+    """History moves between instances with milestones recomputed on import"""
+    source = _make_tracker()
+    for user_index in range(3):
+        user_id = source.create_or_get_user(f"bulk_user_{user_index}")
+        for score in (60, 75, 82):
+            source.save_swing_analysis(user_id, _analysis(score), "tip", "video.mp4")
+
+    stream = io.StringIO()
+    exported = source.export_history(stream, batch_size=4)
+    assert exported['swing_analyses'] == 9
+
+    # Drop milestones from the stream to exercise deferred recomputation
+    lines = [line for line in stream.getvalue().splitlines() if '"milestones"' not in line]
+
+    target = _make_tracker()
+    local_user = target.create_or_get_user("local_user")
+    target.get_user_stats(local_user)
+    assert target.get_user_stats("bulk_user_1")['total_swings'] == 0  # Cached until the import
+    imported = target.import_history(io.StringIO("\n".join(lines)))
+    print(f"📦 Imported: {imported}")
+
+    assert imported['users'] == 3
+    assert imported['swing_analyses'] == 9
+    assert imported['milestones_granted'] == 6
+    assert target.get_user_stats("bulk_user_1")['total_swings'] == 3
+    # Users outside the import keep their cache entries
+    misses = target.cache.misses
+    target.get_user_stats(local_user)
+    assert target.cache.misses == misses
+
+    # Importing the same stream twice is a no-op, and counts only new rows
+    again = target.import_history(io.StringIO("\n".join(lines)))
+    assert again['users'] == again['swing_analyses'] == again['milestones_granted'] == 0
+    assert target.get_user_stats("bulk_user_1")['total_swings'] == 3
+
+
+def test_archive_keeps_stats_and_windows():
+    """Archived analyses leave live windows alone and keep lifetime stats"""
+    tracker = _make_tracker()
+    user_id = tracker.create_or_get_user("archive_user")
+    for score in (65, 88, 72):
+        tracker.save_swing_analysis(user_id, _analysis(score), "tip", "video.mp4")
+
+    # Age the first two swings by two years
+    conn = tracker.backend.connect()
+    conn.execute('''
+        UPDATE swing_analyses SET analysis_date = '2020-03-15T10:00:00'
+        WHERE overall_score IN (65, 88)
+    ''')
+    conn.commit()
+    conn.close()
+
+    before = tracker.get_user_stats(user_id)
+    result = tracker.archive_old_analyses(retain_days=365, batch_size=1)
+    after = tracker.get_user_stats(user_id)
+    print(f"🗄️ Archive: {result}")
+
+    assert result['archived'] == 2
+    assert after['total_swings'] == before['total_swings'] == 3
+    assert after['best_score'] == before['best_score'] == 88
+    assert after['days_active'] == before['days_active'] == 2
+
+    assert tracker.get_user_progress(user_id, days=30)['total_swings'] == 1
+    assert tracker.get_user_progress(user_id, days=3650)['total_swings'] == 3
+    assert tracker.compare_swings(user_id)['comparison_available']
+
+    stream = io.StringIO()
+    exported = tracker.export_history(stream)
+    assert exported['swing_analyses'] == 3 and exported['analysis_daily_rollups'] == 1
+
+    # Archived rows go back into partitions, so the rollups don't count them twice
+    target = _make_tracker()
+    stream.seek(0)
+    target.import_history(stream)
+    stream.seek(0)
+    target.import_history(stream)
+    assert target.get_user_stats(user_id) == after
+    assert target.get_user_progress(user_id, days=30)['total_swings'] == 1
+
+    # Batch jobs see archived analyses too
+    histories = list(target.iter_user_histories())
+    assert [(history[0], len(history[2])) for history in histories] == [(user_id, 3)]
+    assert target.update_coaching_tips([(user_id, analysis[0], "new tip")
+                                        for analysis in histories[0][2]]) == 3
+    assert {metric['coaching_tip'] for metric in
+            target.get_user_progress(user_id, days=3650)['progress_metrics']} == {"new tip"}
+
+
+if __name__ == "__main__":
+    test_milestones_granted_once()
+    test_custom_milestone_rules()
+    test_bulk_export_import_roundtrip()
+    test_archive_keeps_stats_and_windows()
@@ -0,0 +1,142 @@
+"""
+Search Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import json
+import os
+import tempfile
+
+from search_index import SearchIndex
+from social_platform import SocialPlatform
+
+
+class _RecordingCursor:
+    """Records statements; every lookup finds nothing"""
+
+    def __init__(self):
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append((' '.join(sql.split()), params))
+
+    def fetchone(self):
+        return (None,)
+
+    def fetchall(self):
+        return []
+
+
+class _RecordingConnection:
+    def __init__(self):
+        self.recorder = _RecordingCursor()
+
+    def cursor(self):
+        return self.recorder
+
+    def commit(self):
+        pass
+
+
+def test_search_ranks_and_stays_in_sync():
+    """Triggers keep search current; tags, privacy and prefixes are honoured"""
+    db_dir = tempfile.mkdtemp()
+    platform = SocialPlatform(os.path.join(db_dir, "social_test.db"))
+    platform.create_social_profile("u1", "drawqueen", "Dana Draw", "d@example.com",
+                                   bio="Loves a gentle draw")
+    platform.create_social_profile("u2", "slicefixer", "Sam Slice", "s@example.com")
+
+    driver = platform.share_swing("u1", "a1", "Driver draw finally", "Closed the face",
+                                  "/videos/1.mp4", tags=["#Driver", "draw"])['share_id']
+    platform.share_swing("u2", "a2", "Iron practice", "Working on a draw", "/videos/2.mp4",
+                         tags=["irons"])
+    platform.share_swing("u2", "a3", "Secret draw", "", "/videos/3.mp4",
+                         privacy_level='private', tags=["draw"])
+
+    results = platform.search("draws")  # Stemmed match
+    titles = [swing['title'] for swing in results['shared_swings']]
+    print(f"🔎 Results: {titles}")
+    assert titles == ["Driver draw finally", "Iron practice"]  # Title beats description
+    assert [user['username'] for user in results['users']] == ["drawqueen"]
+
+    assert [s['share_id'] for s in platform.search("#driver")['shared_swings']] == [driver]
+    assert len(platform.search('draw" NEAR(')['shared_swings']) == 0  # Syntax is quoted away
+    assert len(platform.search('(draw*')['shared_swings']) == 2
+
+    suggestions = platform.autocomplete("dr")
+    assert suggestions['users'] == ["drawqueen"]
+    assert suggestions['tags'] == ["draw", "driver"]
+
+    # Edits and deletes flow through the triggers
+    conn = platform.backend.connect()
+    conn.execute("UPDATE shared_swings SET title = 'Driver fade', tags = ? WHERE share_id = ?",
+                 (json.dumps(["fade"]), driver))
+    conn.execute("UPDATE social_users SET privacy_level = 'private' WHERE user_id = 'u1'")
+    conn.execute('''
+        INSERT INTO groups (group_id, creator_id, name, description, tags)
+        VALUES ('g1', 'u2', 'Draw Club', 'Right to left', '["draw"]')
+    ''')
+    conn.commit()
+    conn.close()
+
+    results = platform.search("draw")
+    assert [swing['title'] for swing in results['shared_swings']] == ["Iron practice"]
+    assert results['users'] == []
+    assert [group['name'] for group in results['groups']] == ["Draw Club"]
+    assert platform.autocomplete("fa")['tags'] == ["fade"]
+
+
+def test_postgres_schema_is_indexed():
+    """PostgreSQL gets GIN-indexed tsvectors and trigger-maintained tag tables"""
+    index = SearchIndex(type('Backend', (), {'dialect': 'postgresql'})())
+    conn = _RecordingConnection()
+    index.ensure_schema(conn)
+    statements = [sql for sql, _ in conn.recorder.statements]
+
+    for table in ('shared_swings', 'social_users', 'groups'):
+        assert any(f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector' in sql
+                   for sql in statements)
+        assert any(f'ON {table} USING GIN (search_vector)' in sql for sql in statements)
+    assert any("setweight(to_tsvector('english', COALESCE(title, '')), 'A')" in sql
+               for sql in statements)
+    for tag_table in ('shared_swing_tags', 'group_tags'):
+        assert any(f'CREATE TABLE IF NOT EXISTS {tag_table}' in sql for sql in statements)
+        assert any(f'CREATE TRIGGER {tag_table}_sync' in sql for sql in statements)
+        assert any(sql.startswith(f'INSERT INTO {tag_table}') for sql in statements)  # Backfill
+
+    cursor = _RecordingCursor()
+    index.search_shared_swings(cursor, 'driver "draw #Irons', 10)
+    sql, params = cursor.statements[-1]
+    assert 'ss.search_vector @@ plainto_tsquery' in sql and 'shared_swing_tags' in sql
+    assert params == ('driver draw', 'irons', 'driver draw', 10)
+
+    index.autocomplete(cursor, 'dr', 5)
+    assert 'FROM shared_swing_tags' in cursor.statements[-1][0]
+
+
+def test_shares_format_with_search_vector_column():
+    """Shares read back with PostgreSQL's extra search_vector column keep their author fields"""
+    db_path = os.path.join(tempfile.mkdtemp(), "social_test.db")
+    platform = SocialPlatform(db_path)
+    platform.create_social_profile("user_0", "golfer0", "Golfer 0", "golfer0@example.com")
+
+    # Stand-in for the generated tsvector _ensure_postgres_schema appends
+    conn = platform.backend.connect()
+    conn.execute('ALTER TABLE shared_swings ADD COLUMN search_vector TEXT '
+                 'GENERATED ALWAYS AS (title) VIRTUAL')
+    conn.commit()
+    conn.close()
+
+    platform.share_swing("user_0", "a1", "Smooth driver swing", "", "/videos/1.mp4")
+    swings = (platform.get_shared_swings_page()['items'] + platform.get_trending_swings()
+              + platform.search("driver", types=('shared_swings',))['shared_swings'])
+    print(f"🔎 Authors: {[(swing['username'], swing['display_name']) for swing in swings]}")
+    assert len(swings) == 3
+    for swing in swings:
+        assert (swing['username'], swing['display_name'], swing['tags']) == ("golfer0", "Golfer 0", [])
+
+
+if __name__ == "__main__":
+    test_search_ranks_and_stays_in_sync()
+    test_postgres_schema_is_indexed()
+    test_shares_format_with_search_vector_column()
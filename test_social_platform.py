@@ -0,0 +1,248 @@
+"""
+Social Platform Tests for Swing Sage
+Runs against a throwaway SQLite database
+"""
+
+import os
+import tempfile
+
+from social_platform import SocialPlatform
+
+
+def _make_platform(**kwargs):
+    db_dir = tempfile.mkdtemp()
+    return SocialPlatform(os.path.join(db_dir, "social_test.db"), **kwargs)
+
+
+def _make_users(platform, count):
+    user_ids = []
+    for index in range(count):
+        user_id = f"user_{index}"
+        platform.create_social_profile(user_id, f"golfer{index}", f"Golfer {index}",
+                                       f"golfer{index}@example.com")
+        user_ids.append(user_id)
+    return user_ids
+
+
+def test_feed_fan_out_and_unfollow():
+    """Followed activity lands in the timeline and leaves on unfollow"""
+    platform = _make_platform()
+    reader, author = _make_users(platform, 2)
+
+    platform.follow_user(reader, author)
+    platform.share_swing(author, "analysis_1", "My best swing", "Finally!", "/videos/1.mp4")
+
+    feed = platform.get_user_feed(reader)
+    print(f"📰 Feed: {[item['activity_type'] for item in feed]}")
+    assert any(item['activity_type'] == 'share_swing' and item['user_id'] == author for item in feed)
+
+    platform.unfollow_user(reader, author)
+    assert all(item['user_id'] == reader for item in platform.get_user_feed(reader))
+
+
+def test_feed_pulls_high_follower_accounts():
+    """Accounts over the fan-out limit are merged into feeds at read time"""
+    platform = _make_platform(fanout_limit=1)
+    star, fan_a, fan_b = _make_users(platform, 3)
+
+    platform.follow_user(fan_a, star)
+    platform.follow_user(fan_b, star)
+    platform.share_swing(star, "analysis_2", "Tour swing", "", "/videos/2.mp4")
+
+    for fan in (fan_a, fan_b):
+        feed = platform.get_user_feed(fan)
+        assert any(item['activity_type'] == 'share_swing' for item in feed)
+
+    # Paging over the merged feed neither repeats nor drops items
+    full = [item['activity_id'] for item in platform.get_user_feed(fan_a, limit=50)]
+    paged = [item['activity_id'] for offset in range(0, len(full), 2)
+             for item in platform.get_user_feed(fan_a, limit=2, offset=offset)]
+    assert paged == full
+
+
+def test_trending_index_tracks_engagement():
+    """Reactions, comments and views reorder the trending index"""
+    platform = _make_platform()
+    author, fan_a, fan_b = _make_users(platform, 3)
+
+    quiet = platform.share_swing(author, "a1", "Quiet swing", "", "/videos/1.mp4")['share_id']
+    popular = platform.share_swing(author, "a2", "Popular swing", "", "/videos/2.mp4")['share_id']
+    hidden = platform.share_swing(author, "a3", "Private swing", "", "/videos/3.mp4",
+                                  privacy_level='private')['share_id']
+
+    for fan in (fan_a, fan_b):
+        platform.add_reaction(fan, 'shared_swing', quiet)
+    platform.add_comment(fan_a, 'shared_swing', quiet, "Great tempo")
+    platform.record_view(quiet)
+    platform.flush_counters()
+
+    trending = platform.get_trending_swings(time_period='7d')
+    print(f"🔥 Trending: {[swing['title'] for swing in trending]}")
+    assert [swing['share_id'] for swing in trending] == [quiet, popular]
+    assert hidden not in [swing['share_id'] for swing in trending]
+    assert trending[0]['like_count'] == 2 and trending[0]['view_count'] == 1
+
+
+def test_counters_buffer_and_replay():
+    """Buffered counts are readable before a flush and survive a crash"""
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, "social_test.db")
+    platform = SocialPlatform(db_path, counter_flush_interval=0)
+    author, fan = _make_users(platform, 2)
+    share_id = platform.share_swing(author, "a1", "Viral swing", "", "/videos/1.mp4")['share_id']
+
+    for _ in range(3):
+        platform.record_view(share_id)
+    platform.add_reaction(fan, 'shared_swing', share_id)
+    assert platform.get_trending_swings()[0]['view_count'] == 3
+
+    assert platform.flush_counters() == 1
+    platform.record_view(share_id)
+
+    # Simulate a crash: drop the log's lock without flushing
+    platform.counters._closed.set()
+    platform.counters._log_file.close()
+
+    restarted = SocialPlatform(db_path, counter_flush_interval=0)
+    restarted.flush_counters()
+    swing = restarted.get_trending_swings()[0]
+    print(f"👀 Counts after replay: {swing['view_count']} views, {swing['like_count']} likes")
+    assert swing['view_count'] == 4 and swing['like_count'] == 1
+
+
+def test_committed_flush_is_not_replayed():
+    """A flush that committed before the crash is not applied again on restart"""
+    db_dir = tempfile.mkdtemp()
+    db_path = os.path.join(db_dir, "social_test.db")
+    platform = SocialPlatform(db_path, counter_flush_interval=0)
+    author, = _make_users(platform, 1)
+    share_id = platform.share_swing(author, "a1", "Viral swing", "", "/videos/1.mp4")['share_id']
+
+    for _ in range(3):
+        platform.record_view(share_id)
+    # Crash between the commit and removing the .flushing segment
+    platform.counters._discard_segment = lambda segment: segment[0].close()
+    assert platform.flush_counters() == 1
+    platform.counters._closed.set()
+    platform.counters._log_file.close()
+
+    restarted = SocialPlatform(db_path, counter_flush_interval=0)
+    restarted.flush_counters()
+    views = restarted.get_trending_swings()[0]['view_count']
+    print(f"👀 Views after replaying a committed flush: {views}")
+    assert views == 3
+    assert not [name for name in os.listdir(os.path.join(db_dir, 'counter_logs'))
+                if name.endswith('.flushing')]
+
+
+def test_share_is_one_atomic_unit_of_work():
+    """A share, its activity and its achievement commit together, once"""
+    platform = _make_platform()
+    author, = _make_users(platform, 1)
+    platform.create_social_profile(author, "golfer0", "Golfer 0", "golfer0@example.com")
+
+    share_id = platform.share_swing(author, "a1", "First", "", "/videos/1.mp4")['share_id']
+    conn = platform.backend.connect()
+    points = conn.execute('SELECT achievement_points FROM social_users WHERE user_id = ?',
+                          (author,)).fetchone()[0]
+    print(f"🎖️ Points: {points}")
+    assert points == 150  # Welcome granted once, plus first share
+
+    activity_types = sorted(row[0] for row in conn.execute(
+        'SELECT activity_type FROM activity_feed WHERE user_id = ?', (author,)))
+    conn.close()
+    assert activity_types == ['achievement', 'achievement', 'share_swing']
+
+    # A failing write rolls back everything it queued
+    try:
+        with platform._transaction() as uow:
+            platform._add_activity(uow, author, 'comment', 'shared_swing', share_id, {})
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert len(platform.get_user_feed(author)) == 3
+
+
+def test_batch_profiles_apply_privacy():
+    """Profiles come back in bulk with counts and per-viewer privacy"""
+    platform = _make_platform()
+    viewer, friend, stranger = _make_users(platform, 3)
+
+    conn = platform.backend.connect()
+    conn.execute("UPDATE social_users SET privacy_level = 'friends', bio = 'secret'")
+    conn.commit()
+    conn.close()
+
+    platform.follow_user(viewer, friend)
+    platform.follow_user(friend, viewer)
+    platform.follow_user(viewer, stranger)
+
+    profiles = platform.get_user_profiles([friend, stranger, "missing"], viewer_id=viewer)
+    print(f"👥 Profiles: {sorted(profiles)}")
+    assert sorted(profiles) == [friend, stranger]
+    assert profiles[friend]['bio'] == 'secret' and profiles[stranger]['bio'] is None
+    assert profiles[stranger]['follower_count'] == 1
+    assert profiles[friend]['recent_achievements'][0]['name'] == 'Welcome to Swing Sage!'
+
+    platform.unfollow_user(viewer, stranger)
+    profile = platform.get_user_profile(viewer, viewer_id=viewer)
+    assert profile['following_count'] == 1 and profile['achievement_points'] == 50
+
+
+def _collect_pages(fetch_page):
+    items, cursor = [], None
+    while True:
+        page = fetch_page(cursor)
+        items.extend(page['items'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            return items
+
+
+def test_keyset_pages_cover_every_item_once():
+    """Cursor pages concatenate to the full list for feeds, threads and boards"""
+    platform = _make_platform(fanout_limit=1)
+    reader, author, star, fan = _make_users(platform, 4)
+    platform.follow_user(reader, author)
+    platform.follow_user(reader, star)
+    platform.follow_user(fan, star)  # Pushes star over the fan-out limit
+
+    for index in range(4):
+        platform.share_swing(author, f"a{index}", f"Swing {index}", "", "/videos/a.mp4")
+        platform.share_swing(star, f"s{index}", f"Star swing {index}", "", "/videos/s.mp4")
+
+    full = [item['activity_id'] for item in platform.get_user_feed(reader, limit=100)]
+    paged = [item['activity_id'] for item in
+             _collect_pages(lambda cursor: platform.get_user_feed_page(reader, 3, cursor))]
+    print(f"📜 Feed: {len(full)} items, {len(paged)} via cursors")
+    assert paged == full
+
+    swings = _collect_pages(lambda cursor: platform.get_shared_swings_page(3, cursor))
+    assert len(swings) == 8 and len({swing['share_id'] for swing in swings}) == 8
+
+    share_id = swings[0]['share_id']
+    root = platform.add_comment(fan, 'shared_swing', share_id, "Nice")['comment_id']
+    platform.add_comment(reader, 'shared_swing', share_id, "Agreed", parent_comment_id=root)
+    platform.add_comment(author, 'shared_swing', share_id, "Thanks", parent_comment_id=root)
+    platform.add_comment(reader, 'shared_swing', share_id, "Tempo looks good")
+
+    top_level = platform.get_comments_page('shared_swing', share_id, limit=1)
+    assert top_level['items'][0]['reply_count'] == 2 and top_level['next_cursor']
+    replies = _collect_pages(lambda cursor: platform.get_comments_page(
+        'shared_swing', share_id, parent_comment_id=root, limit=1, cursor=cursor))
+    assert [reply['content'] for reply in replies] == ["Agreed", "Thanks"]
+
+    board = _collect_pages(lambda cursor: platform.get_leaderboard_page(limit=2, cursor=cursor))
+    assert [entry['rank'] for entry in board] == [1, 2, 3, 4]
+    assert platform.get_user_feed_page(reader, cursor="not-a-cursor") == {'error': 'Invalid cursor'}
+
+
+if __name__ == "__main__":
+    test_feed_fan_out_and_unfollow()
+    test_feed_pulls_high_follower_accounts()
+    test_trending_index_tracks_engagement()
+    test_counters_buffer_and_replay()
+    test_committed_flush_is_not_replayed()
+    test_share_is_one_atomic_unit_of_work()
+    test_batch_profiles_apply_privacy()
+    test_keyset_pages_cover_every_item_once()
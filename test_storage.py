@@ -0,0 +1,195 @@
+"""
+Storage Backend Tests for Swing Sage
+PostgreSQL SQL translation is checked without needing a server
+"""
+
+import io
+import os
+import sqlite3
+import tempfile
+import uuid
+
+from storage import POSTGRES_AVAILABLE, PostgresBackend, SQLiteBackend, create_backend, translate_sql
+from progress_tracker import ProgressTracker
+from social_platform import SocialPlatform
+
+
+def test_translate_sql_for_postgres():
+    """SQLite-flavoured statements are rewritten for psycopg2"""
+    translated = translate_sql(
+        "INSERT OR IGNORE INTO milestones (user_id, milestone_type) VALUES (?, ?)")
+    assert translated == (
+        "INSERT INTO milestones (user_id, milestone_type) VALUES (%s, %s) ON CONFLICT DO NOTHING")
+
+    assert translate_sql("SELECT * FROM t WHERE a LIKE '50%' AND b = ?") == \
+        "SELECT * FROM t WHERE a LIKE '50%%' AND b = %s"
+
+
+def test_translate_sql_leaves_string_literals_alone():
+    """Only code is rewritten; ON CONFLICT lands before RETURNING"""
+    assert translate_sql("SELECT '?' AS q, 'it''s ?' AS r WHERE a = ?") == \
+        "SELECT '?' AS q, 'it''s ?' AS r WHERE a = %s"
+    assert translate_sql("INSERT OR IGNORE INTO t (a, b) VALUES (?, 'OR IGNORE?') RETURNING a") == \
+        "INSERT INTO t (a, b) VALUES (%s, 'OR IGNORE?') ON CONFLICT DO NOTHING RETURNING a"
+
+
+class _FakePsycopgCursor:
+    """psycopg2-style cursor over sqlite3: %s placeholders and %% escapes"""
+
+    def __init__(self, raw_cursor):
+        self._cursor = raw_cursor
+
+    @staticmethod
+    def _sql(sql):
+        return sql.replace('%s', '?').replace('%%', '%')
+
+    def execute(self, sql, params=()):
+        self._cursor.execute(self._sql(sql), params)
+
+    def executemany(self, sql, seq_of_params):
+        self._cursor.executemany(self._sql(sql), seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _FakePsycopgConnection:
+    def __init__(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self.named_cursors = []
+
+    def cursor(self, name=None):
+        if name is not None:
+            self.named_cursors.append(name)
+        return _FakePsycopgCursor(self._db.cursor())
+
+    def commit(self):
+        self._db.commit()
+
+    def rollback(self):
+        self._db.rollback()
+
+
+class _FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+        self.returned = 0
+
+    def getconn(self):
+        return self.connection
+
+    def putconn(self, connection):
+        self.returned += 1
+
+    def closeall(self):
+        pass
+
+
+def _fake_postgres_backend(db_path):
+    backend = PostgresBackend.__new__(PostgresBackend)
+    backend.dsn = f"postgresql://fake/{db_path}"
+    backend.IntegrityError = sqlite3.IntegrityError
+    backend.pool = _FakePool(_FakePsycopgConnection(db_path))
+    return backend
+
+
+def _export_round_trip(source_backend, target_backend):
+    source = ProgressTracker(backend=source_backend)
+    # Unique per run, so a shared server's leftovers don't change the counts
+    run_id = uuid.uuid4().hex[:8]
+    user_ids = [source.create_or_get_user(f"pg_user_{run_id}_{index}") for index in range(3)]
+    for user_id in user_ids:
+        for score in (55, 85):
+            source.save_swing_analysis(user_id, {'overall_score': score}, "tip", "video.mp4")
+
+    stream = io.StringIO()
+    exported = source.export_history(stream, user_ids=user_ids, batch_size=2)
+    assert exported['users'] == 3 and exported['swing_analyses'] == 6
+
+    stream.seek(0)
+    target = ProgressTracker(backend=target_backend)
+    imported = target.import_history(stream)
+    assert imported['swing_analyses'] == 6
+    assert imported['milestones'] == exported['milestones'] > 0
+    assert target.get_user_stats(user_ids[1])['total_swings'] == 2
+
+
+def test_postgres_backend_streams_and_round_trips():
+    """The PostgreSQL code path: translated SQL, pooled connections, server-side cursors"""
+    db_dir = tempfile.mkdtemp()
+    source_backend = _fake_postgres_backend(os.path.join(db_dir, "source.db"))
+    target_backend = _fake_postgres_backend(os.path.join(db_dir, "target.db"))
+    _export_round_trip(source_backend, target_backend)
+
+    # Bulk reads went through named cursors, one per exported table
+    assert len(source_backend.pool.connection.named_cursors) == 4
+    assert target_backend.pool.connection.named_cursors
+    assert source_backend.pool.returned > 0
+    source_backend.ping()
+
+    # Against a real server when one is configured
+    database_url = os.environ.get('TEST_POSTGRES_URL')
+    if not (database_url and POSTGRES_AVAILABLE):
+        print("⏭️  Set TEST_POSTGRES_URL (with psycopg2 installed) to run against PostgreSQL")
+        return
+    backend = PostgresBackend(database_url)
+    _export_round_trip(backend, backend)
+    backend.close()
+
+
+def test_sqlite_backend_is_default():
+    """Plain paths keep using local SQLite files"""
+    db_path = os.path.join(tempfile.mkdtemp(), "storage_test.db")
+    backend = create_backend(db_path)
+    assert isinstance(backend, SQLiteBackend)
+    backend.ping()
+
+
+def test_trackers_share_an_explicit_backend():
+    """Both trackers run against an injected backend"""
+    backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "shared.db"))
+    tracker = ProgressTracker(backend=backend)
+    social = SocialPlatform(backend=backend)
+
+    tracker.create_or_get_user("backend_user")
+    tracker.save_swing_analysis("backend_user", {'overall_score': 72}, "tip", "video.mp4")
+    stats = tracker.get_user_stats("backend_user")
+    print(f"📊 Stats: {stats}")
+    assert stats['total_swings'] == 1
+    assert stats['days_active'] == 1
+
+    assert social.create_social_profile("backend_user", "backend", "Backend", "b@example.com")['success']
+    assert not social.create_social_profile("other_user", "backend", "Other", "o@example.com")['success']
+
+
+def test_sqlite_pool_and_transactions():
+    """Connections are reused and a failed unit of work leaves no trace"""
+    backend = SQLiteBackend(os.path.join(tempfile.mkdtemp(), "pool.db"))
+    with backend.transaction() as conn:
+        conn.execute('CREATE TABLE items (name TEXT PRIMARY KEY)')
+        conn.execute("INSERT INTO items VALUES ('kept')")
+
+    try:
+        with backend.transaction() as conn:
+            conn.execute("INSERT INTO items VALUES ('dropped')")
+            conn.execute("INSERT INTO items VALUES ('kept')")
+    except backend.IntegrityError:
+        pass
+
+    first = backend.connect()
+    raw = first._conn
+    assert [row[0] for row in first.execute('SELECT name FROM items')] == ['kept']
+    first.close()
+
+    second = backend.connect()
+    assert second._conn is raw
+    second.close()
+
+
+if __name__ == "__main__":
+    test_translate_sql_for_postgres()
+    test_translate_sql_leaves_string_literals_alone()
+    test_postgres_backend_streams_and_round_trips()
+    test_sqlite_backend_is_default()
+    test_trackers_share_an_explicit_backend()
+    test_sqlite_pool_and_transactions()
@@ -1,6 +1,5 @@
 # utils.py - Drop this file in your root directory
 import os
-import cv2
 import subprocess
 from datetime import datetime, timedelta
 from pathlib import Path
@@ -8,6 +7,9 @@ from typing import Set
 
 ALLOWED_EXTENSIONS: Set[str] = {'mp4', 'avi', 'mov', 'mkv', 'quicktime'}
 
+# cv2 is imported inside the few helpers that read video, so web processes
+# importing this module for file handling never load OpenCV
+
 def allowed_file(filename: str) -> bool:
     """Check if file extension is allowed"""
     if not filename or '.' not in filename:
@@ -147,6 +149,7 @@ def _create_corrected_video(video_path: str, rotation: int) -> str:
 def get_video_info(video_path: str) -> dict:
     """Get basic video information using OpenCV"""
     try:
+        import cv2
         cap = cv2.VideoCapture(video_path)
         
         if not cap.isOpened():
@@ -181,6 +184,7 @@ def ensure_directory(path: str) -> bool:
 def is_video_file_valid(file_path: str) -> bool:
     """Check if video file is valid"""
     try:
+        import cv2
         cap = cv2.VideoCapture(file_path)
         is_valid = cap.isOpened()
         cap.release()
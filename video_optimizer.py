@@ -12,6 +12,8 @@ import json
 from pathlib import Path
 import hashlib
 
+from instrumentation import NULL_RECORDER, finish_video, stage_recorder
+
 class VideoOptimizer:
     """
     Advanced video processing system with:
@@ -298,6 +300,8 @@ class VideoOptimizer:
         
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         frame_count = 0
+        # Each stage below runs on its own thread, so stage times overlap
+        timings = stage_recorder()
         
         # Frame processing with threading for speed
         frame_buffer = queue.Queue(maxsize=10)
@@ -306,14 +310,14 @@ class VideoOptimizer:
         # Start frame reader thread
         reader_thread = threading.Thread(
             target=self._frame_reader_worker,
-            args=(cap, frame_buffer, total_frames, params)
+            args=(cap, frame_buffer, total_frames, params, timings)
         )
         reader_thread.start()
         
         # Start frame processor thread
         processor_thread = threading.Thread(
             target=self._frame_processor_worker,
-            args=(frame_buffer, processed_buffer, params)
+            args=(frame_buffer, processed_buffer, params, timings)
         )
         processor_thread.start()
         
@@ -324,7 +328,8 @@ class VideoOptimizer:
                 if processed_frame is None:  # End signal
                     break
                 
-                out.write(processed_frame)
+                with timings.time('encode'):
+                    out.write(processed_frame)
                 frame_count += 1
                 
                 if progress_callback and frame_count % 10 == 0:
@@ -345,22 +350,25 @@ class VideoOptimizer:
         if progress_callback:
             progress_callback(100, "Video optimization complete!")
         
-        return {
+        timings.count('frames', frame_count)
+        return finish_video('VideoOptimizer', timings, {
             'success': True,
             'processing_time': processing_time,
             'frames_processed': frame_count,
             'optimization_params': params,
             'output_path': output_path
-        }
+        })
     
-    def _frame_reader_worker(self, cap, frame_buffer: queue.Queue, total_frames: int, params: Dict):
+    def _frame_reader_worker(self, cap, frame_buffer: queue.Queue, total_frames: int, params: Dict,
+                             timings=NULL_RECORDER):
         """Worker thread for reading frames"""
         
         frame_skip = max(1, int(cap.get(cv2.CAP_PROP_FPS) / params['target_fps']))
         frame_idx = 0
         
         while frame_idx < total_frames:
-            ret, frame = cap.read()
+            with timings.time('decode'):
+                ret, frame = cap.read()
             if not ret:
                 break
             
@@ -375,7 +383,8 @@ class VideoOptimizer:
         # Signal end
         frame_buffer.put(None)
     
-    def _frame_processor_worker(self, frame_buffer: queue.Queue, processed_buffer: queue.Queue, params: Dict):
+    def _frame_processor_worker(self, frame_buffer: queue.Queue, processed_buffer: queue.Queue, params: Dict,
+                                timings=NULL_RECORDER):
         """Worker thread for processing frames"""
         
         while True:
@@ -386,7 +395,8 @@ class VideoOptimizer:
                     break
                 
                 # Process frame
-                processed_frame = self._optimize_frame(frame, params)
+                with timings.time('resize_enhance'):
+                    processed_frame = self._optimize_frame(frame, params)
                 processed_buffer.put(processed_frame)
                 
             except queue.Empty:
@@ -574,11 +584,14 @@ class AsyncVideoProcessor:
         active_count = len(self.active_jobs)
         completed_jobs = []
         processing_jobs = []
+        queued_count = 0
         
-        for job_id, job in self.active_jobs.items():
+        for job_id, job in list(self.active_jobs.items()):
             if job['future'].done():
                 completed_jobs.append(job_id)
             else:
+                if not job['future'].running():
+                    queued_count += 1
                 processing_jobs.append({
                     'job_id': job_id,
                     'elapsed_time': time.time() - job['start_time']
@@ -586,10 +599,11 @@ class AsyncVideoProcessor:
         
         return {
             'active_jobs': active_count,
+            'queue_depth': queued_count,
             'processing_jobs': processing_jobs,
             'completed_jobs': completed_jobs
         }
     
     def shutdown(self):
         """Shutdown the processor"""
-        self.executor.shutdown(wait=True) 
\ No newline at end of file
+        self.executor.shutdown(wait=True)
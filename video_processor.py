@@ -10,6 +10,8 @@ from math import atan2, degrees
 from typing import Dict, List
 import traceback
 
+from instrumentation import finish_video, stage_recorder
+
 class SwingAnalyzer:
     def __init__(self):
         self.mp_pose = mp.solutions.pose
@@ -25,6 +27,11 @@ class SwingAnalyzer:
             min_tracking_confidence=0.5
         )
     
+    def warm_up(self, frames: List) -> None:
+        """Run RGB frames through the pose graph so real analyses start warm"""
+        for frame in frames:
+            self.pose.process(frame)
+    
     def analyze_swing(self, input_path: str, output_path: str) -> Dict:
         """Main analysis function"""
         try:
@@ -61,24 +68,32 @@ class SwingAnalyzer:
         posture_loss_frames = 0
         processed_frames = 0
         
+        timings = stage_recorder()
+        
         print(f"Processing {total_video_frames} frames...")
         
         while cap.isOpened():
-            ret, frame = cap.read()
+            with timings.time('decode'):
+                ret, frame = cap.read()
             if not ret:
                 break
             
             # Convert BGR to RGB for MediaPipe
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            results = self.pose.process(rgb_frame)
+            with timings.time('color_convert'):
+                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            with timings.time('inference'):
+                results = self.pose.process(rgb_frame)
             
             if results.pose_landmarks:
                 # Draw skeleton
-                self._draw_pose_landmarks(frame, results.pose_landmarks)
+                with timings.time('draw'):
+                    self._draw_pose_landmarks(frame, results.pose_landmarks)
                 
                 # Detect faults
-                arm_fault = self._detect_trail_arm_collapse(results.pose_landmarks.landmark)
-                posture_fault = self._detect_posture_loss(results.pose_landmarks.landmark)
+                with timings.time('detect_trail_arm_collapse'):
+                    arm_fault = self._detect_trail_arm_collapse(results.pose_landmarks.landmark)
+                with timings.time('detect_posture_loss'):
+                    posture_fault = self._detect_posture_loss(results.pose_landmarks.landmark)
                 
                 # Update counters
                 if arm_fault['is_collapsing']:
@@ -87,13 +102,16 @@ class SwingAnalyzer:
                     posture_loss_frames += 1
                 
                 # Add visual feedback
-                self._add_frame_annotations(frame, arm_fault, posture_fault)
+                with timings.time('draw'):
+                    self._add_frame_annotations(frame, arm_fault, posture_fault)
                 processed_frames += 1
             else:
-                cv2.putText(frame, "No golfer detected", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                with timings.time('draw'):
+                    cv2.putText(frame, "No golfer detected", (10, 30),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
             
-            out.write(frame)
+            with timings.time('encode'):
+                out.write(frame)
             frame_count += 1
             
             if frame_count % 30 == 0:
@@ -105,7 +123,10 @@ class SwingAnalyzer:
         
         print(f"Analysis complete. Processed {processed_frames} frames with pose data.")
         
-        return self._calculate_metrics(frame_count, collapse_frames, posture_loss_frames, processed_frames)
+        timings.count('frames', frame_count)
+        timings.count('pose_frames', processed_frames)
+        return finish_video('SwingAnalyzer', timings, self._calculate_metrics(
+            frame_count, collapse_frames, posture_loss_frames, processed_frames))
     
     def _draw_pose_landmarks(self, frame, landmarks):
         self.mp_drawing.draw_landmarks(